@@ -87,6 +87,9 @@ class AnalysisResult(BaseModel):
     medication_timing: MedicationTimingSchedule = Field(..., description="Medication timing schedule")
     suggestions: HospitalDoctorSuggestions = Field(..., description="Hospital and doctor suggestions")
     additional_insights: AdditionalInsights = Field(..., description="Additional red-flag insights")
+    knowledge_base_version: Optional[str] = Field(
+        None, description="Version of the knowledge base bundle the analysis ran against"
+    )
     
     model_config = ConfigDict(
         json_schema_extra={
@@ -126,7 +129,20 @@ class AnalysisResult(BaseModel):
                 "additional_insights": {
                     "red_flags": [],
                     "general_advice": "Complete the full course of antibiotics"
-                }
+                },
+                "knowledge_base_version": "5f0c6a1e9b3d4e2f8a7c6b5d4e3f2a1b"
             }
         }
     )
+
+
+class PartialAnalysisResult(BaseModel):
+    """Analysis result restricted to the requested sections; skipped sections are None."""
+    
+    prescription_summary: Optional[PrescriptionSummary] = Field(None, description="Summary of all prescriptions")
+    medication_timing: Optional[MedicationTimingSchedule] = Field(None, description="Medication timing schedule")
+    suggestions: Optional[HospitalDoctorSuggestions] = Field(None, description="Hospital and doctor suggestions")
+    additional_insights: Optional[AdditionalInsights] = Field(None, description="Additional red-flag insights")
+    knowledge_base_version: Optional[str] = Field(
+        None, description="Version of the knowledge base bundle the analysis ran against"
+    )
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional
+
+if TYPE_CHECKING:
+    from backend.app.schemas import AnalysisResult, PartialAnalysisResult
+
+
+class PrescriptionRecord(NamedTuple):
+    """Internal counterpart of schemas.PrescriptionItem."""
+    
+    medication_name: str
+    dosage: str
+    frequency: str
+    duration: Optional[str] = None
+    notes: Optional[str] = None
+
+
+class PrescriptionSummaryRecord(NamedTuple):
+    """Internal counterpart of schemas.PrescriptionSummary."""
+    
+    items: List[PrescriptionRecord]
+    total_medications: int
+
+
+class TimingSlotRecord(NamedTuple):
+    """Internal counterpart of schemas.MedicationTimingSlot."""
+    
+    time: str
+    medications: List[str]
+    instructions: Optional[str] = None
+
+
+class TimingScheduleRecord(NamedTuple):
+    """Internal counterpart of schemas.MedicationTimingSchedule."""
+    
+    schedule: List[TimingSlotRecord]
+    general_instructions: Optional[str] = None
+
+
+class DoctorRecord(NamedTuple):
+    """Internal counterpart of schemas.DoctorSuggestion."""
+    
+    specialty: str
+    reason: str
+    priority: str
+
+
+class HospitalRecord(NamedTuple):
+    """Internal counterpart of schemas.HospitalSuggestion."""
+    
+    facility_type: str
+    purpose: str
+    urgency: str
+
+
+class SuggestionsRecord(NamedTuple):
+    """Internal counterpart of schemas.HospitalDoctorSuggestions."""
+    
+    doctors: List[DoctorRecord]
+    hospitals: List[HospitalRecord]
+
+
+class RedFlagRecord(NamedTuple):
+    """Internal counterpart of schemas.RedFlagInsight."""
+    
+    category: str
+    description: str
+    severity: str
+    recommendation: str
+
+
+class InsightsRecord(NamedTuple):
+    """Internal counterpart of schemas.AdditionalInsights."""
+    
+    red_flags: List[RedFlagRecord]
+    general_advice: Optional[str] = None
+
+
+class AnalysisRecord(NamedTuple):
+    """Internal counterpart of schemas.AnalysisResult."""
+    
+    prescription_summary: PrescriptionSummaryRecord
+    medication_timing: TimingScheduleRecord
+    suggestions: SuggestionsRecord
+    additional_insights: InsightsRecord
+    knowledge_base_version: Optional[str] = None
+
+
+def summarize_prescriptions(prescriptions: List[PrescriptionRecord]) -> PrescriptionSummaryRecord:
+    return PrescriptionSummaryRecord(prescriptions, len(prescriptions))
+
+
+def section_model(section: str, record: NamedTuple):
+    """
+    Convert one section record into its schemas model.
+    
+    Args:
+        section: AnalysisResult field name, e.g. ``medication_timing``
+        record: The matching record
+    
+    Returns:
+        Validated pydantic model for the section
+    """
+    from backend.app.schemas import AnalysisResult
+    
+    return AnalysisResult.model_fields[section].annotation.model_validate(record, from_attributes=True)
+
+
+def to_analysis_result(record: AnalysisRecord) -> AnalysisResult:
+    """
+    Convert a complete record tree into an AnalysisResult in one call.
+    
+    The whole tree is validated by pydantic-core reading record attributes
+    directly, which is faster than building each nested model separately
+    (and than model_construct, which runs in Python).
+    
+    Args:
+        record: AnalysisRecord produced by the internal stages
+    
+    Returns:
+        AnalysisResult
+    """
+    from backend.app.schemas import AnalysisResult
+    
+    return AnalysisResult.model_validate(record, from_attributes=True)
+
+
+def to_partial_result(sections: Dict[str, Any], knowledge_base_version: Optional[str] = None) -> PartialAnalysisResult:
+    """
+    Convert the selected sections into a PartialAnalysisResult.
+    
+    Args:
+        sections: Section records (or models) by AnalysisResult field name
+        knowledge_base_version: Version of the knowledge base bundle used
+    
+    Returns:
+        PartialAnalysisResult with the other sections set to None
+    """
+    from backend.app.schemas import PartialAnalysisResult
+    
+    return PartialAnalysisResult.model_validate(
+        {**sections, "knowledge_base_version": knowledge_base_version}, from_attributes=True
+    )
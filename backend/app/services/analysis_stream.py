@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterable, NamedTuple, Optional, Tuple, Union
+import json
+
+if TYPE_CHECKING:
+    from backend.app.schemas import (
+        AnalysisResult,
+        PrescriptionSummary,
+        MedicationTimingSchedule,
+        HospitalDoctorSuggestions,
+        AdditionalInsights,
+    )
+
+
+SECTION_PRESCRIPTIONS = "prescription_summary"
+SECTION_TIMING = "medication_timing"
+SECTION_SUGGESTIONS = "suggestions"
+SECTION_INSIGHTS = "additional_insights"
+
+SECTIONS = (SECTION_PRESCRIPTIONS, SECTION_TIMING, SECTION_SUGGESTIONS, SECTION_INSIGHTS)
+
+
+def select_sections(
+    include: Optional[Iterable[str]] = None,
+    exclude: Optional[Iterable[str]] = None
+) -> Optional[Tuple[str, ...]]:
+    """
+    Resolve an include/exclude section selection.
+    
+    Args:
+        include: Sections to compute; None means every section
+        exclude: Sections to skip
+    
+    Returns:
+        Selected sections in stream order, or None when neither argument is given
+    
+    Raises:
+        ValueError: If a name is not a section or nothing is selected
+    """
+    if include is None and exclude is None:
+        return None
+    include = SECTIONS if include is None else tuple(include)
+    exclude = () if exclude is None else tuple(exclude)
+    unknown = [name for name in include + exclude if name not in SECTIONS]
+    if unknown:
+        raise ValueError(f"Unknown sections: {', '.join(unknown)}")
+    selected = tuple(section for section in SECTIONS if section in include and section not in exclude)
+    if not selected:
+        raise ValueError("No sections selected")
+    return selected
+
+
+class AnalysisEvent(NamedTuple):
+    """
+    One completed section of an AnalysisResult.
+    
+    ``section`` is the AnalysisResult field name and ``data`` the model for
+    that field, so events can be rendered as they arrive and reassembled
+    with assemble_result.
+    """
+    
+    section: str
+    data: Union[PrescriptionSummary, MedicationTimingSchedule, HospitalDoctorSuggestions, AdditionalInsights]
+
+
+def events_from_result(result: AnalysisResult) -> Iterable[AnalysisEvent]:
+    """Split a complete result into its section events, in stream order."""
+    for section in SECTIONS:
+        yield AnalysisEvent(section, getattr(result, section))
+
+
+def assemble_result(events: Iterable[AnalysisEvent], knowledge_base_version: Optional[str] = None) -> AnalysisResult:
+    """
+    Collect a stream of section events into an AnalysisResult.
+    
+    Args:
+        events: Events covering every section
+        knowledge_base_version: Version of the knowledge base bundle used
+    
+    Returns:
+        AnalysisResult
+    """
+    from backend.app.schemas import AnalysisResult
+    
+    return AnalysisResult(
+        **{event.section: event.data for event in events}, knowledge_base_version=knowledge_base_version
+    )
+
+
+def format_ndjson(event: AnalysisEvent) -> str:
+    """Serialize an event as one NDJSON line: ``{"event": ..., "data": {...}}``."""
+    from backend.app.services.serialization import dumps
+    
+    return f'{{"event": {json.dumps(event.section)}, "data": {dumps(event.data).decode("utf-8")}}}\n'
+
+
+def format_sse(event: AnalysisEvent) -> str:
+    """Serialize an event as a Server-Sent Events message named after its section."""
+    from backend.app.services.serialization import dumps
+    
+    return f"event: {event.section}\ndata: {dumps(event.data).decode('utf-8')}\n\n"
@@ -0,0 +1,181 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote, urlsplit
+import asyncio
+import contextvars
+import json
+
+from backend.app.services.document_context import DocumentLike, document_text
+from backend.app.services.knowledge_base_client import KnowledgeBaseError, MedicalKnowledgeBaseClient
+
+
+class AsyncMedicalKnowledgeBaseClient:
+    """
+    Asyncio client for the medical knowledge base API.
+    
+    Every call is an independent request, so callers can fan lookups out
+    with ``asyncio.gather`` and pay for the slowest call rather than the sum.
+    Without a ``base_url`` the client answers from a local
+    MedicalKnowledgeBaseClient, which keeps offline use and tests working.
+    If that client sends its lookups through a transport, the blocking
+    calls run on a thread pool as large as the transport's connection pool,
+    so they overlap instead of stalling the event loop.
+    """
+    
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        timeout: float = 10.0,
+        fallback_client: Optional[MedicalKnowledgeBaseClient] = None
+    ):
+        """
+        Initialize the async knowledge base client.
+        
+        Args:
+            base_url: Root URL of the knowledge base API; None serves locally
+            timeout: Per-request timeout in seconds
+            fallback_client: Local client used when no base_url is set
+        """
+        self.base_url = base_url.rstrip("/") if base_url else None
+        self.timeout = timeout
+        self._local = None if base_url else (fallback_client or MedicalKnowledgeBaseClient())
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    async def _call_local(self, method: str, *args: Any) -> Any:
+        """Call the local client, off the event loop if it makes network round-trips."""
+        call = getattr(self._local, method)
+        transport = getattr(self._local, "transport", None)
+        if transport is None:
+            return call(*args)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=getattr(transport, "pool_size", None), thread_name_prefix="kb-client"
+            )
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(self._executor, context.run, call, *args)
+    
+    async def _request(self, method: str, path: str, payload: Optional[Dict] = None) -> Any:
+        """Send one HTTP request and decode the JSON response."""
+        url = urlsplit(self.base_url + path)
+        secure = url.scheme == "https"
+        port = url.port or (443 if secure else 80)
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        target = url.path + (f"?{url.query}" if url.query else "")
+        
+        head = (
+            f"{method} {target} HTTP/1.1\r\n"
+            f"Host: {url.hostname}:{port}\r\n"
+            "Accept: application/json\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n"
+        ).encode("latin-1")
+        
+        async def exchange():
+            reader, writer = await asyncio.open_connection(url.hostname, port, ssl=secure or None)
+            try:
+                writer.write(head + body)
+                await writer.drain()
+                status_line = await reader.readline()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if "content-length" in headers:
+                    data = await reader.readexactly(int(headers["content-length"]))
+                else:
+                    data = await reader.read()
+                return status_line, data
+            finally:
+                writer.close()
+                
+        try:
+            status_line, data = await asyncio.wait_for(exchange(), self.timeout)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as exc:
+            raise KnowledgeBaseError(f"{method} {path} failed: {exc!r}") from exc
+            
+        parts = status_line.split()
+        status = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 0
+        if not 200 <= status < 300:
+            raise KnowledgeBaseError(f"{method} {path} returned HTTP {status}")
+        return json.loads(data)
+    
+    async def get_medication_info(self, medication_name: str) -> Optional[Dict]:
+        """
+        Get detailed information about a medication.
+        
+        Args:
+            medication_name: Name of the medication
+            
+        Returns:
+            Dictionary containing medication information
+        """
+        if self._local is not None:
+            return await self._call_local("get_medication_info", medication_name)
+        return await self._request("GET", f"/medications/{quote(medication_name, safe='')}")
+    
+    async def get_medication_info_many(self, medication_names: List[str]) -> Dict[str, Dict]:
+        """
+        Get information about several medications in one request.
+        
+        Args:
+            medication_names: Medication names; duplicates are sent once
+            
+        Returns:
+            Mapping of each requested name to its medication information
+        """
+        names = list(dict.fromkeys(medication_names))
+        if self._local is not None:
+            return await self._call_local("get_medication_info_many", names)
+        return await self._request("POST", "/medications/batch", {"names": names})
+    
+    async def check_interactions(self, medications: List[str]) -> List[Dict]:
+        """
+        Check for drug interactions among a list of medications.
+        
+        Args:
+            medications: List of medication names
+            
+        Returns:
+            List of interaction warnings
+        """
+        if self._local is not None:
+            return await self._call_local("check_interactions", medications)
+        return await self._request("POST", "/interactions", {"medications": medications})
+    
+    async def get_specialty_recommendations(self, conditions: List[DocumentLike]) -> List[Dict]:
+        """
+        Get specialist recommendations based on conditions or medications.
+        
+        Args:
+            conditions: List of medical conditions or concerns; the document
+                itself may be passed as a DocumentContext
+            
+        Returns:
+            List of specialist recommendations
+        """
+        if self._local is not None:
+            return await self._call_local("get_specialty_recommendations", conditions)
+        return await self._request(
+            "POST", "/specialty-recommendations", {"conditions": [document_text(item) for item in conditions]}
+        )
+    
+    async def identify_red_flags(self, document: DocumentLike, medications: List[str]) -> List[Dict]:
+        """
+        Identify potential red flags in the medical document.
+        
+        Args:
+            document: Full text of the document, or its DocumentContext
+            medications: List of medications
+            
+        Returns:
+            List of red flag concerns
+        """
+        if self._local is not None:
+            return await self._call_local("identify_red_flags", document, medications)
+        return await self._request(
+            "POST", "/red-flags", {"text": document_text(document), "medications": medications}
+        )
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from dataclasses import dataclass
+from itertools import islice
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, List, Optional, Tuple
+import os
+
+from backend.app.services.knowledge_base_client import MedicalKnowledgeBaseClient
+from backend.app.services.medical_agent import MedicalAnalysisAgent
+
+if TYPE_CHECKING:
+    from backend.app.schemas import ParsedDocument, AnalysisResult
+
+
+KnowledgeBaseFactory = Callable[[], MedicalKnowledgeBaseClient]
+
+_worker_agent: Optional[MedicalAnalysisAgent] = None
+
+
+@dataclass
+class BatchItemResult:
+    """Outcome of analyzing one document in a batch."""
+    
+    index: int
+    result: Optional[AnalysisResult] = None
+    error: Optional[str] = None
+    
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _build_agent(knowledge_base_factory: Optional[KnowledgeBaseFactory] = None) -> MedicalAnalysisAgent:
+    """Build an agent whose knowledge base client comes from ``knowledge_base_factory``."""
+    knowledge_base_client = knowledge_base_factory() if knowledge_base_factory else None
+    return MedicalAnalysisAgent(knowledge_base_client=knowledge_base_client)
+
+
+def _initialize_worker(knowledge_base_factory: Optional[KnowledgeBaseFactory] = None):
+    """Build the per-process agent once, when the worker starts."""
+    global _worker_agent
+    _worker_agent = _build_agent(knowledge_base_factory)
+
+
+def _analyze_chunk(
+    chunk: List[Tuple[int, ParsedDocument]],
+    agent: Optional[MedicalAnalysisAgent] = None
+) -> List[BatchItemResult]:
+    """Analyze a chunk of documents with ``agent`` (default: the worker's), capturing errors per document."""
+    agent = agent or _worker_agent
+    results = []
+    for index, parsed in chunk:
+        try:
+            results.append(BatchItemResult(index=index, result=agent.analyze_document(parsed)))
+        except Exception as exc:
+            results.append(BatchItemResult(index=index, error=f"{type(exc).__name__}: {exc}"))
+    return results
+
+
+def _collect(future, indices: List[int]) -> List[BatchItemResult]:
+    """Return a chunk's results, turning a failed task into per-document errors."""
+    try:
+        return future.result()
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+        return [BatchItemResult(index=index, error=error) for index in indices]
+
+
+def _chunks(documents: Iterable[ParsedDocument], chunksize: int) -> Iterator[List[Tuple[int, ParsedDocument]]]:
+    iterator = enumerate(documents)
+    while True:
+        chunk = list(islice(iterator, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def analyze_documents(
+    documents: Iterable[ParsedDocument],
+    workers: Optional[int] = None,
+    chunksize: int = 8,
+    ordered: bool = True,
+    knowledge_base_factory: Optional[KnowledgeBaseFactory] = None
+) -> Iterator[BatchItemResult]:
+    """
+    Analyze many parsed documents across a process pool.
+    
+    Each worker process builds one agent (and knowledge base client) at
+    startup and reuses it for every chunk it receives. Documents are read
+    lazily and only a bounded number of chunks are in flight at once, so the
+    input can be a generator over an arbitrarily large archive.
+    
+    Args:
+        documents: Iterable of ParsedDocument objects
+        workers: Number of worker processes; defaults to the CPU count.
+            ``workers=1`` analyzes in the calling process without a pool
+        chunksize: Number of documents sent to a worker per task
+        ordered: Yield results in input order; if False, yield chunks as
+            they complete
+        knowledge_base_factory: Optional picklable callable returning the
+            knowledge base client each worker should use
+    
+    Returns:
+        Iterator of BatchItemResult, one per input document. Failures are
+        reported through ``BatchItemResult.error`` instead of raising
+    """
+    if chunksize < 1:
+        raise ValueError("chunksize must be at least 1")
+    workers = workers or os.cpu_count() or 1
+    
+    if workers == 1:
+        agent = _build_agent(knowledge_base_factory)
+        for chunk in _chunks(documents, chunksize):
+            yield from _analyze_chunk(chunk, agent)
+        return
+    
+    from concurrent.futures import ProcessPoolExecutor
+    
+    max_in_flight = workers * 2
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_initialize_worker,
+        initargs=(knowledge_base_factory,)
+    ) as executor:
+        pending = deque()
+        chunks = _chunks(documents, chunksize)
+        
+        def submit_next() -> bool:
+            chunk = next(chunks, None)
+            if chunk is None:
+                return False
+            try:
+                future = executor.submit(_analyze_chunk, chunk)
+            except Exception as exc:
+                # A broken pool refuses new work; report it per document like a failed task.
+                future = Future()
+                future.set_exception(exc)
+            pending.append((future, [index for index, _ in chunk]))
+            return True
+            
+        while len(pending) < max_in_flight and submit_next():
+            pass
+            
+        while pending:
+            if ordered:
+                future, indices = pending.popleft()
+            else:
+                done, _ = wait([future for future, _ in pending], return_when=FIRST_COMPLETED)
+                future, indices = next(item for item in pending if item[0] in done)
+                pending.remove((future, indices))
+                
+            yield from _collect(future, indices)
+            submit_next()
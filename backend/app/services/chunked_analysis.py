@@ -0,0 +1,337 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+import io
+
+from backend.app.services import batch
+from backend.app.services.analysis_records import AnalysisRecord, summarize_prescriptions, to_analysis_result
+from backend.app.services.document_context import DocumentContext
+from backend.app.services.medical_agent import MEDICATION_PATTERNS, MedicalAnalysisAgent, get_agent
+from backend.app.services.medication_scanner import MedicationScanner
+from backend.app.services.prescription_parser import AttributeSpan, bind_mentions, details_from_bindings
+from backend.app.services.result_cache import normalize_document_text
+
+if TYPE_CHECKING:
+    from backend.app.schemas import AnalysisResult, ParsedDocument
+
+
+DEFAULT_WINDOW_SIZE = 64 * 1024
+DEFAULT_OVERLAP = 1024
+
+LineSource = Callable[[], Iterable[str]]
+
+
+class TextWindow(NamedTuple):
+    """
+    A line-aligned slice of a document.
+    
+    ``text`` holds the window's own lines (the first ``core_length``
+    characters) followed by a few look-ahead lines, so matches starting in
+    the window but running past its last line are still seen whole, and
+    mentions on its last line can bind attributes on the next.
+    """
+    
+    start: int
+    core_length: int
+    text: str
+    
+    @property
+    def core(self) -> str:
+        return self.text[:self.core_length]
+
+
+class WindowScan(NamedTuple):
+    """Medication names and rule triggers found in one window, in text order."""
+    
+    lexicon_names: List[str]
+    pattern_names: Tuple[List[str], ...]
+    triggers: frozenset
+
+
+def iter_windows(
+    lines: Iterable[str],
+    window_size: int = DEFAULT_WINDOW_SIZE,
+    overlap: int = DEFAULT_OVERLAP
+) -> Iterator[TextWindow]:
+    """
+    Group lines into windows of about ``window_size`` characters.
+    
+    Windows never split a line and consecutive windows share ``overlap``
+    characters (rounded up to whole lines) of look-ahead. The look-ahead
+    always reaches the next non-blank line, which a mention on the window's
+    last line may bind attributes from. Only the current window and its
+    look-ahead are held in memory.
+    
+    Args:
+        lines: Lines including their ``\\n`` terminators
+        window_size: Target characters per window (a longer line forms its own window)
+        overlap: Minimum look-ahead characters appended to each window
+    
+    Yields:
+        TextWindow objects covering the document in order
+    """
+    source = iter(lines)
+    pending: deque = deque()
+    pending_size = 0
+    offset = 0
+    
+    while True:
+        for line in source:
+            pending.append(line)
+            pending_size += len(line)
+            if pending_size >= window_size + overlap:
+                break
+        if not pending:
+            return
+            
+        core: List[str] = []
+        core_length = 0
+        while pending and (not core or core_length + len(pending[0]) <= window_size):
+            line = pending.popleft()
+            core.append(line)
+            core_length += len(line)
+        pending_size -= core_length
+        
+        lookahead: List[str] = []
+        lookahead_length = 0
+        has_text = False
+        while not (has_text and lookahead_length >= overlap):
+            if len(lookahead) == len(pending):
+                line = next(source, None)
+                if line is None:
+                    break
+                pending.append(line)
+                pending_size += len(line)
+            line = pending[len(lookahead)]
+            lookahead.append(line)
+            lookahead_length += len(line)
+            has_text = has_text or bool(line.strip())
+            
+        yield TextWindow(offset, core_length, "".join(core + lookahead))
+        offset += core_length
+
+
+def _scan_window(window: TextWindow, agent: Optional[MedicalAnalysisAgent] = None) -> WindowScan:
+    """First pass: medication candidates and text-rule triggers of one window."""
+    agent = agent or batch._worker_agent
+    limit = window.core_length
+    lexicon_names = [
+        match.name.capitalize()
+        for match in agent.medication_scanner.find_all(window.text)
+        if match.start < limit
+    ]
+    pattern_names = tuple(
+        [match.group(1) for match in pattern.finditer(window.text) if match.start(1) < limit]
+        for pattern in MEDICATION_PATTERNS
+    )
+    return WindowScan(lexicon_names, pattern_names, _text_triggers(agent, window.core))
+
+
+def _text_triggers(agent: MedicalAnalysisAgent, text: str) -> frozenset:
+    """
+    Everything the text-dependent rules report for ``text`` alone.
+    
+    Text rules fire on keywords that never span a line break, so the rules
+    fired by a whole document are exactly the union over its windows.
+    """
+    kb = agent.kb_client
+    document = DocumentContext(text)
+    triggers = {("red_flag", flag["category"]) for flag in kb.identify_red_flags(document, [])}
+    triggers.update(("specialty", rec["specialty"]) for rec in kb.get_specialty_recommendations([document]))
+    suggestions = agent._build_suggestions(document, [])
+    triggers.update(("facility", hospital.facility_type) for hospital in suggestions.hospitals)
+    insights = agent._build_insights(document, [], [], [])
+    triggers.add(("advice", insights.general_advice))
+    return frozenset(triggers)
+
+
+def _bind_window(window: TextWindow, scanner: MedicationScanner) -> Dict[str, Dict[str, AttributeSpan]]:
+    """Second pass: first attributed mention of each medication in one window."""
+    return bind_mentions(window.text, scanner, limit=window.core_length)
+
+
+def _merge_names(scans: List[WindowScan]) -> List[str]:
+    """Combine per-window candidates in the order a full-document pass reports them."""
+    medications = []
+    seen = set()
+    groups = [scan.lexicon_names for scan in scans]
+    for position in range(len(MEDICATION_PATTERNS)):
+        groups.extend(scan.pattern_names[position] for scan in scans)
+    for names in groups:
+        for name in names:
+            if name not in seen:
+                seen.add(name)
+                medications.append(name)
+    return medications or ["Unknown Medication"]
+
+
+class _Runner:
+    """Applies a window task in-process or over a bounded process pool."""
+    
+    def __init__(self, agent: MedicalAnalysisAgent, workers: int, knowledge_base_factory):
+        self.agent = agent
+        self.workers = workers
+        self.knowledge_base_factory = knowledge_base_factory
+        self._executor = None
+    
+    def __enter__(self) -> "_Runner":
+        if self.workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=batch._initialize_worker,
+                initargs=(self.knowledge_base_factory,)
+            )
+        return self
+    
+    def __exit__(self, *exc_info):
+        if self._executor is not None:
+            self._executor.shutdown()
+    
+    @property
+    def local_agent(self) -> Optional[MedicalAnalysisAgent]:
+        """Agent for tasks run in-process; None lets pool workers use their own."""
+        return self.agent if self._executor is None else None
+    
+    def map(self, task, windows: Iterable[TextWindow], *args) -> Iterator:
+        if self._executor is None:
+            for window in windows:
+                yield task(window, *args)
+            return
+            
+        pending: deque = deque()
+        for window in windows:
+            pending.append(self._executor.submit(task, window, *args))
+            if len(pending) >= self.workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def analyze_lines_chunked(
+    open_lines: LineSource,
+    agent: Optional[MedicalAnalysisAgent] = None,
+    window_size: int = DEFAULT_WINDOW_SIZE,
+    overlap: int = DEFAULT_OVERLAP,
+    workers: int = 1,
+    knowledge_base_factory=None
+) -> AnalysisResult:
+    """
+    Analyze a document window by window with bounded memory.
+    
+    The document is read twice: once to collect medication candidates and
+    the text rules each window fires, and once to bind dosage, frequency and
+    duration to the final medication list. Suggestions and insights are then
+    computed from a short evidence text made of one window per distinct
+    rule, so the result equals analyze_document on the whole text while only
+    O(window) text is held at a time.
+    
+    Args:
+        open_lines: Callable returning a fresh iterable of the document's lines
+        agent: Agent whose rules and knowledge base are used; defaults to the shared agent
+        window_size: Target characters per window
+        overlap: Minimum look-ahead characters per window (always at least
+            the next non-blank line); medication names spanning more than
+            this across lines may be missed
+        workers: Worker processes for the per-window passes; 1 runs in-process
+        knowledge_base_factory: Knowledge base factory for worker processes,
+            required with an explicit ``agent`` when ``workers`` > 1
+    
+    Returns:
+        AnalysisResult
+        
+    Raises:
+        ValueError: If ``agent`` is given for a worker pool without a
+            ``knowledge_base_factory``; workers build their own agents and
+            could not answer from its knowledge base
+    """
+    if agent is not None and workers > 1 and knowledge_base_factory is None:
+        raise ValueError("workers > 1 with an explicit agent requires a knowledge_base_factory")
+    agent = agent or get_agent()
+    with agent.kb_client.pinned():
+        return _analyze_lines(open_lines, agent, window_size, overlap, workers, knowledge_base_factory)
+
+
+def _analyze_lines(
+    open_lines: LineSource,
+    agent: MedicalAnalysisAgent,
+    window_size: int,
+    overlap: int,
+    workers: int,
+    knowledge_base_factory
+) -> AnalysisResult:
+    with _Runner(agent, workers, knowledge_base_factory) as runner:
+        scans = []
+        evidence_windows = set()
+        covered = set()
+        windows = iter_windows(open_lines(), window_size, overlap)
+        for index, scan in enumerate(runner.map(_scan_window, windows, runner.local_agent)):
+            if index == 0 or not scan.triggers <= covered:
+                covered |= scan.triggers
+                evidence_windows.add(index)
+            scans.append(scan._replace(triggers=frozenset()))
+        medications = _merge_names(scans)
+        del scans
+        
+        evidence: List[str] = []
+        
+        def collect_evidence(windows: Iterable[TextWindow]) -> Iterator[TextWindow]:
+            for index, window in enumerate(windows):
+                if index in evidence_windows:
+                    evidence.append(window.core)
+                yield window
+                
+        bound: Dict[str, Dict[str, AttributeSpan]] = {}
+        windows = collect_evidence(iter_windows(open_lines(), window_size, overlap))
+        for window_bound in runner.map(_bind_window, windows, MedicationScanner(medications)):
+            for name, attributes in window_bound.items():
+                bound.setdefault(name, attributes)
+    
+    details = details_from_bindings(medications, bound)
+    infos = agent.kb_client.get_medication_info_many([item.medication_name for item in details])
+    prescriptions = agent._build_prescription_items(details, [infos.get(item.medication_name) for item in details])
+    
+    evidence_document = DocumentContext("".join(evidence))
+    return to_analysis_result(AnalysisRecord(
+        prescription_summary=summarize_prescriptions(prescriptions),
+        medication_timing=agent._generate_timing_schedule(prescriptions),
+        suggestions=agent._generate_suggestions(evidence_document, medications),
+        additional_insights=agent._generate_insights(evidence_document, medications),
+        knowledge_base_version=agent.kb_client.data_version
+    ))
+
+
+def analyze_document_chunked(parsed: ParsedDocument, **options) -> AnalysisResult:
+    """
+    Chunked analysis of an in-memory document.
+    
+    Args:
+        parsed: ParsedDocument containing the text and metadata
+        **options: Passed to analyze_lines_chunked
+    
+    Returns:
+        AnalysisResult equal to analyze_document(parsed)
+    """
+    text = normalize_document_text(parsed.text)
+    return analyze_lines_chunked(lambda: io.StringIO(text), **options)
+
+
+def analyze_file_chunked(path: str, encoding: str = "utf-8", **options) -> AnalysisResult:
+    """
+    Chunked analysis of a text file, streamed from disk.
+    
+    Args:
+        path: Text file holding the document
+        encoding: File encoding
+        **options: Passed to analyze_lines_chunked
+    
+    Returns:
+        AnalysisResult
+    """
+    def open_lines() -> Iterator[str]:
+        with open(path, "r", encoding=encoding) as handle:
+            yield from handle
+    
+    return analyze_lines_chunked(open_lines, **options)
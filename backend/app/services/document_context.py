@@ -0,0 +1,119 @@
+from bisect import bisect_right
+from functools import cached_property
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Tuple, TypeVar, Union
+import re
+
+
+# A segment is a line or a sentence: it ends at a line break or at sentence
+# punctuation followed by whitespace.
+SEGMENT_BREAK_PATTERN = re.compile(r'\n|[.!?;](?=\s)')
+_LINE_BREAK_PATTERN = re.compile("\n")
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+T = TypeVar("T")
+
+
+def fold_text(text: str) -> str:
+    """Lowercase text while keeping character offsets aligned."""
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    return "".join(char.lower()[:1] or char for char in text)
+
+
+class Token(NamedTuple):
+    """One word of a document, lowercased, with its character offsets."""
+    
+    start: int
+    end: int
+    text: str
+
+
+class DocumentContext:
+    """
+    Preprocessed view of one document, built once per analysis.
+    
+    Every stage and knowledge base method receives the same context instead
+    of the raw text. Views of the text (lowercase copy, tokens, line and
+    segment boundaries) are computed on first use and then shared, so each
+    is built at most once per analysis whichever stages run. Components
+    that derive their own data from the document, such as rule matches,
+    memoize it with ``derived``.
+    """
+    
+    def __init__(self, text: str):
+        """
+        Args:
+            text: Normalized document text (see result_cache.normalize_document_text)
+        """
+        self.text = text
+        self._derived: Dict[Hashable, Any] = {}
+    
+    @classmethod
+    def of(cls, document: "DocumentLike") -> "DocumentContext":
+        """Return ``document`` if it is already a context, else a new context over it."""
+        return document if isinstance(document, DocumentContext) else cls(document)
+    
+    def __len__(self) -> int:
+        return len(self.text)
+    
+    def __repr__(self) -> str:
+        return f"DocumentContext({len(self.text)} characters)"
+    
+    @cached_property
+    def lowered(self) -> str:
+        """``text.lower()``."""
+        return self.text.lower()
+    
+    @cached_property
+    def folded(self) -> str:
+        """Lowercase text with offsets aligned to ``text``; the same string as ``lowered`` unless lengths differ."""
+        lowered = self.lowered
+        return lowered if len(lowered) == len(self.text) else fold_text(self.text)
+    
+    @cached_property
+    def tokens(self) -> Tuple[Token, ...]:
+        """Lowercase words with their offsets in ``text``."""
+        return tuple(Token(match.start(), match.end(), match.group()) for match in _TOKEN_PATTERN.finditer(self.folded))
+    
+    @cached_property
+    def line_starts(self) -> Tuple[int, ...]:
+        """Offset of the first character of each line."""
+        return (0, *(match.end() for match in _LINE_BREAK_PATTERN.finditer(self.text)))
+    
+    @cached_property
+    def segment_starts(self) -> Tuple[int, ...]:
+        """Offset of the first character of each line or sentence."""
+        return (0, *(match.end() for match in SEGMENT_BREAK_PATTERN.finditer(self.text)))
+    
+    def line_of(self, position: int) -> int:
+        """Index of the line containing a character offset."""
+        return bisect_right(self.line_starts, position) - 1
+    
+    def segment_of(self, position: int) -> int:
+        """Index of the line or sentence containing a character offset."""
+        return bisect_right(self.segment_starts, position) - 1
+    
+    def derived(self, key: Hashable, build: Callable[[], T]) -> T:
+        """
+        Memoize a view of the document computed by another component.
+        
+        Args:
+            key: Identifies the view, e.g. the object that computes it
+            build: Computes the view on first use
+            
+        Returns:
+            The view built for ``key``
+        """
+        try:
+            return self._derived[key]
+        except KeyError:
+            return self._derived.setdefault(key, build())
+
+
+DocumentLike = Union[str, DocumentContext]
+
+
+def document_text(document: DocumentLike) -> str:
+    """The text of a document given as a string or a DocumentContext."""
+    return document.text if isinstance(document, DocumentContext) else document
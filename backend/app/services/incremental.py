@@ -0,0 +1,328 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from backend.app.services.analysis_records import AnalysisRecord, summarize_prescriptions, to_analysis_result
+from backend.app.services.chunked_analysis import TextWindow, WindowScan, _bind_window, _merge_names, _scan_window
+from backend.app.services.document_context import DocumentContext
+from backend.app.services.interaction_graph import SEVERITY_WEIGHTS
+from backend.app.services.medical_agent import MedicalAnalysisAgent, get_agent
+from backend.app.services.medication_scanner import MedicationScanner, normalize_medication_name
+from backend.app.services.prescription_parser import AttributeSpan, details_from_bindings
+from backend.app.services.result_cache import normalize_document_text
+
+if TYPE_CHECKING:
+    from backend.app.schemas import AnalysisResult, ParsedDocument
+
+
+DEFAULT_BLOCK_SIZE = 2048
+DEFAULT_OVERLAP = 256
+
+
+class TextEdit(NamedTuple):
+    """Replace ``text[start:end]`` with ``replacement``; offsets refer to the normalized text."""
+    
+    start: int
+    end: int
+    replacement: str
+
+
+class _Block(NamedTuple):
+    """A line-aligned window of the document with its memoized scan and bindings."""
+    
+    window: TextWindow
+    scan: WindowScan
+    bound: Optional[Dict[str, Dict[str, AttributeSpan]]]
+
+
+class IncrementalState(NamedTuple):
+    """
+    Analysis of one document version, reusable for the next one.
+    
+    States are never modified; update returns a new state that shares the
+    unchanged blocks and lookups with the previous one.
+    """
+    
+    text: str
+    data_version: str
+    blocks: Tuple[_Block, ...]
+    medications: Tuple[str, ...]
+    medication_infos: Dict[str, Optional[Dict]]
+    interactions: Dict[Tuple[str, str], List[Dict]]
+    result: AnalysisResult
+
+
+def _common_length(old: str, new: str, limit: int, from_end: bool) -> int:
+    """Length of the common prefix (or suffix) of two strings, up to ``limit``, compared in slices."""
+    length = 0
+    step = 4096
+    while length < limit:
+        end = min(length + step, limit)
+        if from_end:
+            same = old[len(old) - end:len(old) - length] == new[len(new) - end:len(new) - length]
+        else:
+            same = old[length:end] == new[length:end]
+        if same:
+            length = end
+        elif step > 1:
+            step //= 8
+        else:
+            break
+    return length
+
+
+def diff_texts(old: str, new: str) -> TextEdit:
+    """
+    Smallest single edit turning ``old`` into ``new``.
+    
+    Args:
+        old: Previous text
+        new: Edited text
+    
+    Returns:
+        TextEdit spanning everything between the common prefix and suffix
+    """
+    limit = min(len(old), len(new))
+    prefix = _common_length(old, new, limit, from_end=False)
+    suffix = _common_length(old, new, limit - prefix, from_end=True)
+    return TextEdit(prefix, len(old) - suffix, new[prefix:len(new) - suffix])
+
+
+def _line_end(text: str, position: int) -> int:
+    newline = text.find("\n", position)
+    return len(text) if newline < 0 else newline + 1
+
+
+def _windows(text: str, start: int, end: int, block_size: int, overlap: int) -> Iterator[TextWindow]:
+    """
+    Split ``text[start:end]`` (line-aligned) into windows of about ``block_size``.
+    
+    Each window carries at least ``overlap`` characters of the whole lines
+    after it as look-ahead, read from the full text, and always the next
+    non-blank line, which its last line's mentions may bind forward into.
+    """
+    position = start
+    while position < end:
+        core_end = _line_end(text, position)
+        while core_end < end:
+            next_end = _line_end(text, core_end)
+            if next_end - position > block_size:
+                break
+            core_end = next_end
+        lookahead_end = core_end
+        has_text = False
+        while not (has_text and lookahead_end - core_end >= overlap) and lookahead_end < len(text):
+            line_end = _line_end(text, lookahead_end)
+            has_text = has_text or bool(text[lookahead_end:line_end].strip())
+            lookahead_end = line_end
+        yield TextWindow(position, core_end - position, text[position:lookahead_end])
+        position = core_end
+
+
+def _sort_interactions(interactions: List[Dict]) -> List[Dict]:
+    return sorted(interactions, key=lambda item: -SEVERITY_WEIGHTS.get(item["severity"], 0))
+
+
+class IncrementalAnalyzer:
+    """
+    Re-analyze edited documents by redoing only the work an edit affects.
+    
+    The document is held as line-aligned blocks, each with its medication
+    candidates, rule triggers and prescription bindings memoized. An edit
+    re-scans only the blocks it touches (and the block whose look-ahead
+    reaches into it). Knowledge base lookups run for new medications only
+    and interaction checks for new pairs only; suggestions and insights are
+    rebuilt from a short evidence text, as in chunked analysis. The result
+    equals analyze_document on the edited text.
+    """
+    
+    def __init__(
+        self,
+        agent: Optional[MedicalAnalysisAgent] = None,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        overlap: int = DEFAULT_OVERLAP
+    ):
+        """
+        Args:
+            agent: Agent whose rules and knowledge base are used; defaults to the shared agent
+            block_size: Target characters per memoized block
+            overlap: Minimum look-ahead characters per block (always at
+                least the next non-blank line); medication names spanning
+                more than this across lines may be missed
+        """
+        self.agent = agent or get_agent()
+        self.block_size = block_size
+        self.overlap = overlap
+    
+    def analyze(self, parsed: ParsedDocument) -> IncrementalState:
+        """
+        Analyze a document from scratch, keeping the state for later edits.
+        
+        Args:
+            parsed: ParsedDocument containing the text and metadata
+            
+        Returns:
+            IncrementalState whose ``result`` equals analyze_document(parsed)
+        """
+        return self._analyze_text(normalize_document_text(parsed.text))
+    
+    def update(self, state: IncrementalState, edit: TextEdit) -> IncrementalState:
+        """
+        Apply one edit to an analyzed document.
+        
+        Args:
+            state: State of the previous document version
+            edit: Edit against ``state.text``
+            
+        Returns:
+            IncrementalState for the edited document
+            
+        Raises:
+            ValueError: If the edit range lies outside the document
+        """
+        text = state.text
+        if not 0 <= edit.start <= edit.end <= len(text):
+            raise ValueError(f"Edit range {edit.start}:{edit.end} outside document of length {len(text)}")
+        replacement = normalize_document_text(edit.replacement)
+        new_text = text[:edit.start] + replacement + text[edit.end:]
+        with self.agent.kb_client.pinned():
+            return self._update(state, edit, new_text)
+    
+    def _update(self, state: IncrementalState, edit: TextEdit, new_text: str) -> IncrementalState:
+        text = state.text
+        if state.data_version != self.agent.kb_client.data_version:
+            return self._analyze_text(new_text)
+            
+        blocks = state.blocks
+        first = 0
+        while first < len(blocks) and blocks[first].window.start + len(blocks[first].window.text) < edit.start:
+            first += 1
+        last = first
+        while last < len(blocks) and blocks[last].window.start <= edit.end:
+            last += 1
+        delta = len(new_text) - len(text)
+        region_start = blocks[first].window.start if first < len(blocks) else 0
+        if last > first:
+            region_end = blocks[last - 1].window.start + blocks[last - 1].window.core_length + delta
+        else:
+            region_end = len(new_text)
+        
+        rescanned = [
+            _Block(window, _scan_window(window, self.agent), None)
+            for window in _windows(new_text, region_start, region_end, self.block_size, self.overlap)
+        ]
+        shifted = [
+            block._replace(window=block.window._replace(start=block.window.start + delta))
+            for block in blocks[last:]
+        ]
+        return self._finish(new_text, list(blocks[:first]) + rescanned + shifted, state)
+    
+    def update_text(self, state: IncrementalState, text: str) -> IncrementalState:
+        """Re-analyze a new version of the document, diffing it against the previous one."""
+        return self.update(state, diff_texts(state.text, normalize_document_text(text)))
+    
+    def append(self, state: IncrementalState, text: str) -> IncrementalState:
+        """Re-analyze after appending ``text`` to the document."""
+        end = len(state.text)
+        return self.update(state, TextEdit(end, end, text))
+    
+    def _analyze_text(self, text: str) -> IncrementalState:
+        with self.agent.kb_client.pinned():
+            windows = _windows(text, 0, len(text), self.block_size, self.overlap)
+            blocks = [_Block(window, _scan_window(window, self.agent), None) for window in windows]
+            return self._finish(text, blocks, None)
+    
+    def _finish(self, text: str, blocks: List[_Block], previous: Optional[IncrementalState]) -> IncrementalState:
+        """Merge block scans, rebind where needed and rebuild the result."""
+        agent = self.agent
+        kb = agent.kb_client
+        medications = _merge_names([block.scan for block in blocks])
+        key = tuple(medications)
+        
+        changed_names = set()
+        if previous is not None:
+            old = {normalize_medication_name(name) for name in previous.medications}
+            changed_names = old ^ {normalize_medication_name(name) for name in medications}
+        scanner = MedicationScanner(medications)
+        bound: Dict[str, Dict[str, AttributeSpan]] = {}
+        for index, block in enumerate(blocks):
+            if block.bound is None or self._mentions_any(block.window, changed_names):
+                block = blocks[index] = block._replace(bound=_bind_window(block.window, scanner))
+            for name, attributes in block.bound.items():
+                bound.setdefault(name, attributes)
+                
+        infos = dict(previous.medication_infos) if previous is not None else {}
+        details = details_from_bindings(medications, bound)
+        missing = [item.medication_name for item in details if item.medication_name not in infos]
+        if missing:
+            infos.update(kb.get_medication_info_many(missing))
+        prescriptions = agent._build_prescription_items(details, [infos.get(item.medication_name) for item in details])
+        
+        interactions = self._check_pairs(medications, previous)
+        evidence_document = DocumentContext(self._evidence_text(blocks))
+        red_flags = kb.identify_red_flags(evidence_document, medications)
+        interactions_data = _sort_interactions(
+            [item for i, first in enumerate(medications) for second in medications[i + 1:]
+             for item in interactions[(first, second)]]
+        )
+        
+        result = to_analysis_result(AnalysisRecord(
+            prescription_summary=summarize_prescriptions(prescriptions),
+            medication_timing=agent._generate_timing_schedule(prescriptions),
+            suggestions=agent._generate_suggestions(evidence_document, medications),
+            additional_insights=agent._build_insights(evidence_document, medications, red_flags, interactions_data),
+            knowledge_base_version=kb.data_version
+        ))
+        return IncrementalState(text, kb.data_version, tuple(blocks), key, infos, interactions, result)
+    
+    @staticmethod
+    def _mentions_any(window: TextWindow, names) -> bool:
+        """
+        True if the block may mention one of ``names``, so its bindings can change.
+        
+        The look-ahead counts too: a mention there can stop a mention in the
+        block from binding forward into the next line.
+        """
+        if not names:
+            return False
+        folded = MedicationScanner._fold(window.text)
+        return any(name in folded for name in names)
+    
+    def _check_pairs(
+        self,
+        medications: List[str],
+        previous: Optional[IncrementalState]
+    ) -> Dict[Tuple[str, str], List[Dict]]:
+        """
+        Interactions per ordered medication pair, checking only pairs not seen before.
+        
+        A fresh analysis checks the whole list in one call; updates check
+        each new pair on its own.
+        """
+        kb = self.agent.kb_client
+        pairs = [(first, second) for i, first in enumerate(medications) for second in medications[i + 1:]]
+        if previous is None:
+            interactions: Dict[Tuple[str, str], List[Dict]] = {pair: [] for pair in pairs}
+            position = {name: index for index, name in enumerate(medications)}
+            found = kb.check_interactions(list(medications))
+            for item in sorted(found, key=lambda item: tuple(position[name] for name in item["medications"])):
+                interactions[tuple(item["medications"])].append(item)
+            return interactions
+            
+        known = previous.interactions
+        interactions = {}
+        for pair in pairs:
+            cached = known.get(pair)
+            interactions[pair] = cached if cached is not None else kb.check_interactions(list(pair))
+        return interactions
+    
+    @staticmethod
+    def _evidence_text(blocks: List[_Block]) -> str:
+        """The first block and the first block firing each distinct text rule."""
+        evidence = []
+        covered = set()
+        for index, block in enumerate(blocks):
+            if index == 0 or not block.scan.triggers <= covered:
+                covered |= block.scan.triggers
+                evidence.append(block.window.core)
+        return "".join(evidence)
@@ -0,0 +1,427 @@
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+import math
+import os
+import threading
+import time
+
+
+KIND_INTERNAL = "internal"
+KIND_CLIENT = "client"
+
+# Flag set on the code object of ``async def`` functions (inspect.CO_COROUTINE).
+CO_COROUTINE = 0x80
+
+KB_METHODS = (
+    "get_medication_lexicon",
+    "get_medication_info",
+    "get_medication_info_many",
+    "check_interactions",
+    "get_specialty_recommendations",
+    "identify_red_flags",
+)
+
+
+class SpanRecord(NamedTuple):
+    """Timing and attributes of one finished stage or knowledge base call."""
+    
+    name: str
+    kind: str
+    trace_id: str
+    span_id: str
+    parent_span_id: Optional[str]
+    start_time_ns: int
+    end_time_ns: int
+    wall_ns: int
+    cpu_ns: int
+    attributes: Dict[str, Any]
+    error: Optional[str]
+
+
+class _NoOpSpan:
+    """Span returned by disabled instrumentation; every operation does nothing."""
+    
+    __slots__ = ()
+    
+    def __enter__(self) -> "_NoOpSpan":
+        return self
+    
+    def __exit__(self, *exc_info) -> bool:
+        return False
+    
+    def set(self, **attributes):
+        pass
+
+
+_NOOP_SPAN = _NoOpSpan()
+
+_current_span: ContextVar[Optional["_Span"]] = ContextVar("current_span", default=None)
+
+
+class Instrumentation:
+    """
+    Instrumentation interface; this base class records nothing.
+    
+    The agent calls ``span(name, **attributes)`` around every stage and, via
+    InstrumentedKnowledgeBase, every knowledge base call. The default
+    instance is disabled, so stage wrappers skip span creation entirely.
+    """
+    
+    enabled = False
+    
+    def span(self, name: str, kind: str = KIND_INTERNAL, **attributes):
+        """
+        Context manager timing a block of work.
+        
+        Args:
+            name: Span name, e.g. ``extract_medications`` or ``kb.check_interactions``
+            kind: KIND_INTERNAL for stages, KIND_CLIENT for knowledge base calls
+            **attributes: Initial span attributes such as ``input_size``
+            
+        Returns:
+            Context manager whose value supports ``set(**attributes)``
+        """
+        return _NOOP_SPAN
+
+
+NO_INSTRUMENTATION = Instrumentation()
+
+
+class _Span:
+    """Active span: measures wall and thread CPU time and links to its parent."""
+    
+    __slots__ = (
+        "_tracer", "name", "kind", "attributes", "trace_id", "span_id", "parent_span_id",
+        "_token", "_start_time_ns", "_start_wall", "_start_cpu",
+    )
+    
+    def __init__(self, tracer: "Tracer", name: str, kind: str, attributes: Dict[str, Any]):
+        self._tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+    
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+    
+    def __enter__(self) -> "_Span":
+        parent = _current_span.get()
+        self.trace_id = parent.trace_id if parent is not None else os.urandom(16).hex()
+        self.parent_span_id = parent.span_id if parent is not None else None
+        self.span_id = os.urandom(8).hex()
+        self._token = _current_span.set(self)
+        self._start_time_ns = time.time_ns()
+        self._start_cpu = time.thread_time_ns()
+        self._start_wall = time.perf_counter_ns()
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback) -> bool:
+        wall_ns = time.perf_counter_ns() - self._start_wall
+        cpu_ns = time.thread_time_ns() - self._start_cpu
+        _current_span.reset(self._token)
+        self._tracer.emit(SpanRecord(
+            name=self.name,
+            kind=self.kind,
+            trace_id=self.trace_id,
+            span_id=self.span_id,
+            parent_span_id=self.parent_span_id,
+            start_time_ns=self._start_time_ns,
+            end_time_ns=self._start_time_ns + wall_ns,
+            wall_ns=wall_ns,
+            cpu_ns=cpu_ns,
+            attributes=self.attributes,
+            error=f"{exc_type.__name__}: {exc}" if exc_type is not None else None
+        ))
+        return False
+
+
+class Tracer(Instrumentation):
+    """
+    Instrumentation that hands every finished span to callbacks.
+    
+    Spans nest through a context variable, so stage spans become children of
+    the ``analyze_document`` span and knowledge base calls children of the
+    stage that made them, also across asyncio tasks. CPU time is the calling
+    thread's; for async stages it includes other coroutines run meanwhile.
+    """
+    
+    enabled = True
+    
+    def __init__(self, *callbacks: Callable[[SpanRecord], None]):
+        """
+        Args:
+            *callbacks: Called with each SpanRecord, e.g. a HistogramAggregator
+                or an OTLPJsonFileExporter
+        """
+        self.callbacks = list(callbacks)
+    
+    def span(self, name: str, kind: str = KIND_INTERNAL, **attributes) -> _Span:
+        return _Span(self, name, kind, attributes)
+    
+    def emit(self, record: SpanRecord):
+        for callback in self.callbacks:
+            callback(record)
+
+
+def _is_coroutine_function(func) -> bool:
+    code = getattr(getattr(func, "__func__", func), "__code__", None)
+    return code is not None and bool(code.co_flags & CO_COROUTINE)
+
+
+def traced_stage(
+    name: str,
+    size: Callable[[Any], int] = len,
+    count: Callable[[Any], int] = len
+):
+    """
+    Decorate an agent stage method to run inside a span.
+    
+    Args:
+        name: Span name
+        size: Computes the ``input_size`` attribute from the first argument
+        count: Computes the ``output_count`` attribute from the result
+    
+    Returns:
+        Decorator for sync or async methods of an object with an
+        ``instrumentation`` attribute
+    """
+    def decorate(method):
+        if _is_coroutine_function(method):
+            @wraps(method)
+            async def async_wrapper(self, *args, **kwargs):
+                if not self.instrumentation.enabled:
+                    return await method(self, *args, **kwargs)
+                with self.instrumentation.span(name, input_size=size(args[0])) as span:
+                    result = await method(self, *args, **kwargs)
+                    span.set(output_count=count(result))
+                return result
+            return async_wrapper
+            
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not self.instrumentation.enabled:
+                return method(self, *args, **kwargs)
+            with self.instrumentation.span(name, input_size=size(args[0])) as span:
+                result = method(self, *args, **kwargs)
+                span.set(output_count=count(result))
+            return result
+        return wrapper
+    
+    return decorate
+
+
+def _size(value) -> Optional[int]:
+    return len(value) if hasattr(value, "__len__") else None
+
+
+class InstrumentedKnowledgeBase:
+    """
+    Proxy that records a client span around each knowledge base call.
+    
+    Works for both MedicalKnowledgeBaseClient and its async counterpart;
+    attributes other than the KB_METHODS pass through unchanged.
+    """
+    
+    def __init__(self, client, instrumentation: Instrumentation):
+        self.wrapped = client
+        self._instrumentation = instrumentation
+    
+    def __getattr__(self, attribute: str):
+        value = getattr(self.wrapped, attribute)
+        if attribute not in KB_METHODS:
+            return value
+        instrumentation = self._instrumentation
+        name = f"kb.{attribute}"
+        
+        if _is_coroutine_function(value):
+            async def traced_async(*args):
+                with instrumentation.span(name, KIND_CLIENT, input_size=_size(args[0]) if args else None) as span:
+                    result = await value(*args)
+                    span.set(output_count=_size(result))
+                return result
+            return traced_async
+            
+        def traced(*args):
+            with instrumentation.span(name, KIND_CLIENT, input_size=_size(args[0]) if args else None) as span:
+                result = value(*args)
+                span.set(output_count=_size(result))
+            return result
+        return traced
+
+
+def _latency_bounds_us() -> List[int]:
+    bounds = []
+    scale = 1
+    while scale <= 10_000_000:
+        bounds.extend((scale, 2 * scale, 5 * scale))
+        scale *= 10
+    return bounds
+
+
+class HistogramAggregator:
+    """
+    Span callback keeping a wall-time histogram per span name.
+    
+    Buckets follow a 1-2-5 series from 1 µs to 50 s, so percentiles are
+    reported as the upper bound of the bucket they fall in (capped at the
+    largest value seen). Safe to share between threads.
+    """
+    
+    BOUNDS_US = _latency_bounds_us()
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Any]] = {}
+    
+    def __call__(self, record: SpanRecord):
+        wall_us = record.wall_ns / 1000
+        bucket = bisect_left(self.BOUNDS_US, wall_us)
+        with self._lock:
+            stats = self._stats.get(record.name)
+            if stats is None:
+                stats = self._stats[record.name] = {
+                    "count": 0, "errors": 0, "wall_ns": 0, "cpu_ns": 0, "max_ns": 0,
+                    "buckets": [0] * (len(self.BOUNDS_US) + 1),
+                }
+            stats["count"] += 1
+            stats["errors"] += record.error is not None
+            stats["wall_ns"] += record.wall_ns
+            stats["cpu_ns"] += record.cpu_ns
+            stats["max_ns"] = max(stats["max_ns"], record.wall_ns)
+            stats["buckets"][bucket] += 1
+    
+    def names(self) -> List[str]:
+        with self._lock:
+            return list(self._stats)
+    
+    def percentile(self, name: str, fraction: float) -> float:
+        """
+        Approximate wall-time percentile of a span name, in microseconds.
+        
+        Args:
+            name: Span name
+            fraction: Percentile as a fraction, e.g. 0.99
+            
+        Returns:
+            Upper bound of the bucket holding the percentile
+        """
+        with self._lock:
+            stats = self._stats[name]
+            rank = max(1, math.ceil(fraction * stats["count"]))
+            seen = 0
+            for index, bucket_count in enumerate(stats["buckets"]):
+                seen += bucket_count
+                if seen >= rank:
+                    break
+            max_us = stats["max_ns"] / 1000
+        return min(self.BOUNDS_US[index], max_us) if index < len(self.BOUNDS_US) else max_us
+    
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per-name count, errors, mean wall/CPU time and p50/p90/p99 in microseconds."""
+        report = {}
+        for name in self.names():
+            with self._lock:
+                stats = dict(self._stats[name])
+            report[name] = {
+                "count": stats["count"],
+                "errors": stats["errors"],
+                "mean_us": stats["wall_ns"] / stats["count"] / 1000,
+                "cpu_mean_us": stats["cpu_ns"] / stats["count"] / 1000,
+                "p50_us": self.percentile(name, 0.50),
+                "p90_us": self.percentile(name, 0.90),
+                "p99_us": self.percentile(name, 0.99),
+                "max_us": stats["max_ns"] / 1000,
+            }
+        return report
+    
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+def _otlp_value(value) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OTLPJsonFileExporter:
+    """
+    Span callback writing OpenTelemetry (OTLP/JSON) spans to a local file.
+    
+    Spans are buffered and written as one ``{"resourceSpans": [...]}``
+    request per line, the layout of the OpenTelemetry Collector file
+    exporter, so the file can be replayed into any OTLP backend.
+    """
+    
+    SPAN_KINDS = {KIND_INTERNAL: 1, KIND_CLIENT: 3}
+    
+    def __init__(self, path: str, service_name: str = "medical-analysis-agent", batch_size: int = 512):
+        """
+        Args:
+            path: Output file; lines are appended
+            service_name: ``service.name`` resource attribute
+            batch_size: Spans buffered before a line is written
+        """
+        self.path = path
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._buffer: List[Dict[str, Any]] = []
+    
+    def __call__(self, record: SpanRecord):
+        span = {
+            "traceId": record.trace_id,
+            "spanId": record.span_id,
+            "name": record.name,
+            "kind": self.SPAN_KINDS.get(record.kind, 1),
+            "startTimeUnixNano": str(record.start_time_ns),
+            "endTimeUnixNano": str(record.end_time_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in record.attributes.items()
+                if value is not None
+            ] + [{"key": "cpu_time_ns", "value": _otlp_value(record.cpu_ns)}],
+            "status": {"code": 2, "message": record.error} if record.error else {"code": 1},
+        }
+        if record.parent_span_id is not None:
+            span["parentSpanId"] = record.parent_span_id
+        with self._lock:
+            self._buffer.append(span)
+            if len(self._buffer) < self.batch_size:
+                return
+            spans, self._buffer = self._buffer, []
+        self._write(spans)
+    
+    def flush(self):
+        """Write any buffered spans."""
+        with self._lock:
+            spans, self._buffer = self._buffer, []
+        if spans:
+            self._write(spans)
+    
+    close = flush
+    
+    def __enter__(self) -> "OTLPJsonFileExporter":
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.flush()
+    
+    def _write(self, spans: List[Dict[str, Any]]):
+        import json
+        
+        request = {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+        }]}
+        line = json.dumps(request, separators=(",", ":")) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as handle:
+                handle.write(line)
@@ -0,0 +1,137 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import hashlib
+import json
+
+
+CLASS_PREFIX = "class:"
+
+SEVERITY_WEIGHTS = {
+    "critical": 4,
+    "high": 3,
+    "moderate": 2,
+    "medium": 2,
+    "low": 1,
+}
+
+
+def _edge_key(a: str, b: str) -> Tuple[str, str]:
+    return (a, b) if a <= b else (b, a)
+
+
+class InteractionGraph:
+    """
+    Drug interaction graph keyed by normalized medication ids.
+    
+    Nodes are medication ids (e.g. ``"warfarin"``) or drug classes
+    (``"class:nsaids"``); a medication also stands for every class it belongs
+    to. Edges carry severity, description and recommended action, and are
+    stored in a hash map keyed by the unordered node pair, so checking k
+    medications costs O(k^2) lookups no matter how many pairs are loaded.
+    """
+    
+    def __init__(
+        self,
+        interactions: Iterable[Dict] = (),
+        classes: Optional[Dict[str, List[str]]] = None,
+        version: Optional[str] = None
+    ):
+        """
+        Build the graph.
+        
+        Args:
+            interactions: Edge records with ``medications`` (two node ids),
+                ``severity``, ``description`` and ``action``
+            classes: Mapping of class name to member medication ids
+            version: Version of the source data
+        """
+        self.version = version
+        self._edges: Dict[Tuple[str, str], Dict] = {}
+        self._classes_of: Dict[str, List[str]] = {}
+        
+        for class_name, members in (classes or {}).items():
+            for member in members:
+                self._classes_of.setdefault(member.lower(), []).append(CLASS_PREFIX + class_name)
+                
+        for interaction in interactions:
+            first, second = interaction["medications"]
+            self.add_interaction(
+                first,
+                second,
+                severity=interaction["severity"],
+                description=interaction["description"],
+                action=interaction["action"]
+            )
+    
+    @classmethod
+    def from_file(cls, path: str) -> "InteractionGraph":
+        """
+        Load a graph from a JSON data file.
+        
+        Args:
+            path: File with ``classes``, ``interactions`` and ``version`` keys
+            
+        Returns:
+            InteractionGraph
+        """
+        with open(path, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+        return cls(
+            interactions=data.get("interactions", []),
+            classes=data.get("classes", {}),
+            version=str(data["version"]) if "version" in data else None
+        )
+    
+    def __len__(self) -> int:
+        return len(self._edges)
+    
+    def fingerprint(self) -> str:
+        """Digest of all edges and class memberships, for cache keys."""
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(json.dumps(sorted(self._edges.items()), sort_keys=True).encode("utf-8"))
+        hasher.update(json.dumps(self._classes_of, sort_keys=True).encode("utf-8"))
+        return hasher.hexdigest()
+    
+    def add_interaction(self, first: str, second: str, severity: str, description: str, action: str):
+        """Add or replace the edge between two nodes."""
+        self._edges[_edge_key(first.lower(), second.lower())] = {
+            "severity": severity,
+            "description": description,
+            "action": action,
+        }
+    
+    def nodes_for(self, medication_id: str) -> List[str]:
+        """Return the medication id followed by the class nodes it belongs to."""
+        return [medication_id] + self._classes_of.get(medication_id, [])
+    
+    def check(self, medications: Sequence[Tuple[str, str]]) -> List[Dict]:
+        """
+        Find interactions among a medication list.
+        
+        Args:
+            medications: ``(display_name, medication_id)`` pairs
+            
+        Returns:
+            Interaction warnings ordered by severity (most severe first), then
+            by position of the pair in the input list
+        """
+        nodes = [self.nodes_for(medication_id) for _, medication_id in medications]
+        interactions = []
+        
+        for i in range(len(medications)):
+            for j in range(i + 1, len(medications)):
+                seen = set()
+                for first in nodes[i]:
+                    for second in nodes[j]:
+                        edge = self._edges.get(_edge_key(first, second))
+                        if edge is None or id(edge) in seen:
+                            continue
+                        seen.add(id(edge))
+                        interactions.append({
+                            "medications": [medications[i][0], medications[j][0]],
+                            "severity": edge["severity"],
+                            "description": edge["description"],
+                            "action": edge["action"],
+                        })
+        
+        interactions.sort(key=lambda item: -SEVERITY_WEIGHTS.get(item["severity"], 0))
+        return interactions
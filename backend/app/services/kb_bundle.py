@@ -0,0 +1,287 @@
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
+from pathlib import Path
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+from backend.app.services.interaction_graph import InteractionGraph
+from backend.app.services.kb_snapshot import KnowledgeBaseSnapshot
+from backend.app.services.medication_index import MedicationIndex
+from backend.app.services.medication_scanner import MedicationScanner
+from backend.app.services.rule_engine import RuleEngine
+
+
+BUNDLE_MEDICATIONS = "medications.json"
+BUNDLE_SNAPSHOT = "kb.snapshot"
+BUNDLE_INTERACTIONS = "interactions.json"
+BUNDLE_RULES = "rules.json"
+
+BUNDLE_FILES = (BUNDLE_MEDICATIONS, BUNDLE_SNAPSHOT, BUNDLE_INTERACTIONS, BUNDLE_RULES)
+
+
+class KnowledgeBaseBundle:
+    """
+    Compiled, immutable knowledge base data answered from as one unit.
+    
+    A client holds one bundle at a time and replaces it wholesale, so an
+    analysis that pins a bundle sees a consistent medication index,
+    interaction graph, rule table and medication scanner throughout.
+    ``version`` is a digest of all of them.
+    
+    The lexicon and its scanner are built on first use: for a large
+    snapshot they cost far more than opening it, and lookups alone never
+    need them. ``warm`` builds them ahead of time.
+    """
+    
+    def __init__(
+        self,
+        version: str,
+        data: Dict,
+        medication_index: Union[MedicationIndex, KnowledgeBaseSnapshot],
+        interaction_graph: InteractionGraph,
+        rule_engine: RuleEngine,
+        snapshot: Optional[KnowledgeBaseSnapshot] = None
+    ):
+        self.version = version
+        self.data = data
+        self.medication_index = medication_index
+        self.interaction_graph = interaction_graph
+        self.rule_engine = rule_engine
+        self.snapshot = snapshot
+        self._lexicon: Optional[Tuple[str, ...]] = None
+        self._scanner: Optional[MedicationScanner] = None
+        self._lock = threading.Lock()
+    
+    def __repr__(self) -> str:
+        return f"KnowledgeBaseBundle(version={self.version!r})"
+    
+    @property
+    def lexicon(self) -> Tuple[str, ...]:
+        """Every indexed medication name followed by the extra lexicon entries."""
+        if self._lexicon is None:
+            with self._lock:
+                if self._lexicon is None:
+                    names = [*self.medication_index.names(), *self.data["lexicon"]]
+                    self._lexicon = tuple(dict.fromkeys(names))
+        return self._lexicon
+    
+    @property
+    def medication_scanner(self) -> MedicationScanner:
+        """Scanner over the lexicon."""
+        if self._scanner is None:
+            lexicon = self.lexicon
+            with self._lock:
+                if self._scanner is None:
+                    self._scanner = MedicationScanner(lexicon)
+        return self._scanner
+    
+    def warm(self) -> "KnowledgeBaseBundle":
+        """Build the lexicon and scanner now, e.g. before swapping the bundle in; returns the bundle."""
+        self.medication_scanner
+        return self
+
+
+def compile_bundle(
+    data: Dict,
+    interaction_graph: InteractionGraph,
+    rule_engine: RuleEngine,
+    snapshot: Optional[KnowledgeBaseSnapshot] = None
+) -> KnowledgeBaseBundle:
+    """
+    Build the lookup index and version the result; the medication scanner
+    is built on first use.
+    
+    Args:
+        data: ``{"medications": {key: entry}, "lexicon": [...]}``; ignored
+            for lookups when ``snapshot`` is given
+        interaction_graph: Drug interaction graph
+        rule_engine: Compiled specialty, facility and red-flag rules
+        snapshot: Read-only snapshot to answer medication lookups from
+    
+    Returns:
+        KnowledgeBaseBundle
+    """
+    medication_index = snapshot if snapshot is not None else MedicationIndex(data["medications"])
+    
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(json.dumps(data, sort_keys=True).encode("utf-8"))
+    if snapshot is not None:
+        hasher.update(snapshot.data_version.encode("utf-8"))
+    hasher.update(interaction_graph.fingerprint().encode("utf-8"))
+    hasher.update(rule_engine.fingerprint().encode("utf-8"))
+    
+    return KnowledgeBaseBundle(
+        version=hasher.hexdigest(),
+        data=data,
+        medication_index=medication_index,
+        interaction_graph=interaction_graph,
+        rule_engine=rule_engine,
+        snapshot=snapshot
+    )
+
+
+def load_bundle(directory: str) -> KnowledgeBaseBundle:
+    """
+    Load and compile a bundle directory.
+    
+    The directory holds ``interactions.json``, ``rules.json`` and either a
+    ``medications.json`` formulary or a ``kb.snapshot`` file (see
+    write_bundle).
+    
+    Args:
+        directory: Bundle directory
+    
+    Returns:
+        KnowledgeBaseBundle
+    
+    Raises:
+        FileNotFoundError: If a bundle file is missing
+    """
+    root = Path(directory)
+    snapshot = None
+    if (root / BUNDLE_SNAPSHOT).exists():
+        snapshot = KnowledgeBaseSnapshot(str(root / BUNDLE_SNAPSHOT))
+        data = {"medications": {}, "lexicon": list(snapshot.lexicon)}
+    else:
+        with open(root / BUNDLE_MEDICATIONS, "r", encoding="utf-8") as handle:
+            formulary = json.load(handle)
+        data = {"medications": formulary.get("medications", {}), "lexicon": formulary.get("lexicon", [])}
+    return compile_bundle(
+        data,
+        InteractionGraph.from_file(str(root / BUNDLE_INTERACTIONS)),
+        RuleEngine.from_file(str(root / BUNDLE_RULES)),
+        snapshot
+    )
+
+
+def bundle_signature(directory: str) -> Tuple[Tuple[str, int, int], ...]:
+    """Modification time and size of each bundle file present, to detect changes cheaply."""
+    signature = []
+    for name in BUNDLE_FILES:
+        try:
+            stat = os.stat(os.path.join(directory, name))
+        except FileNotFoundError:
+            continue
+        signature.append((name, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def write_bundle(directory: str, data: Dict, interactions_path: str, rules_path: str):
+    """
+    Write a bundle directory from knowledge base data and data files.
+    
+    Args:
+        directory: Destination; created if missing
+        data: ``{"medications": {...}, "lexicon": [...]}``
+        interactions_path: Interaction graph JSON file to copy
+        rules_path: Rule table JSON file to copy
+    """
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, BUNDLE_MEDICATIONS), "w", encoding="utf-8") as handle:
+        json.dump(data, handle, indent=2, sort_keys=True)
+    shutil.copyfile(interactions_path, os.path.join(directory, BUNDLE_INTERACTIONS))
+    shutil.copyfile(rules_path, os.path.join(directory, BUNDLE_RULES))
+
+
+class BundleWatcher:
+    """
+    Background thread that reloads a bundle directory when its files change.
+    
+    Each poll compares file modification times and sizes; on a change the
+    new bundle is compiled in the watcher thread, off the request path, and
+    swapped into every client. A bundle that fails to load leaves the
+    current one in place and is reported through ``on_error`` and
+    ``last_error``.
+    """
+    
+    def __init__(
+        self,
+        directory: str,
+        clients: Iterable,
+        interval: float = 2.0,
+        on_error: Optional[Callable[[Exception], None]] = None
+    ):
+        """
+        Args:
+            directory: Bundle directory to watch
+            clients: Knowledge base clients to swap the bundle into
+            interval: Seconds between polls
+            on_error: Called with the exception when a reload fails
+        """
+        self.directory = directory
+        self.clients = list(clients)
+        self.interval = interval
+        self.on_error = on_error
+        self.last_error: Optional[Exception] = None
+        self._signature = bundle_signature(directory)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def __enter__(self) -> "BundleWatcher":
+        self.start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.stop()
+    
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="kb-bundle-watcher", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll()
+    
+    def poll(self) -> bool:
+        """
+        Reload the bundle if its files changed since the last poll.
+        
+        Returns:
+            True if a new bundle was swapped in
+        """
+        signature = bundle_signature(self.directory)
+        if signature == self._signature:
+            return False
+        self._signature = signature
+        try:
+            bundle = load_bundle(self.directory).warm()
+        except Exception as error:
+            self.last_error = error
+            if self.on_error is not None:
+                self.on_error(error)
+            return False
+        for client in self.clients:
+            client.swap_bundle(bundle)
+        self.last_error = None
+        return True
+
+
+def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Write the built-in knowledge base data as a bundle directory.")
+    parser.add_argument("output", help="Bundle directory to write")
+    args = parser.parse_args()
+    
+    from backend.app.services.knowledge_base_client import (
+        DEFAULT_INTERACTIONS_PATH,
+        DEFAULT_RULES_PATH,
+        MedicalKnowledgeBaseClient,
+    )
+    
+    write_bundle(args.output, MedicalKnowledgeBaseClient()._initialize_mock_data(), DEFAULT_INTERACTIONS_PATH,
+                 DEFAULT_RULES_PATH)
+    print(f"Wrote {args.output} (version {load_bundle(args.output).version})")
+
+
+if __name__ == "__main__":
+    main()
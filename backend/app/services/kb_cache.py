@@ -0,0 +1,257 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+import hashlib
+import threading
+import time
+
+from backend.app.services.document_context import DocumentLike, document_text
+from backend.app.services.knowledge_base_client import MedicalKnowledgeBaseClient, UNKNOWN_MEDICATION_CLASS
+
+
+DEFAULT_MAX_SIZES = {
+    "get_medication_info": 4096,
+    "check_interactions": 1024,
+    "get_specialty_recommendations": 256,
+    "identify_red_flags": 256,
+}
+
+DEFAULT_TTLS = {
+    "get_medication_info": 3600.0,
+    "check_interactions": 3600.0,
+    "get_specialty_recommendations": 600.0,
+    "identify_red_flags": 600.0,
+}
+
+
+@dataclass
+class CacheStats:
+    """Counters for one cached knowledge base method."""
+    
+    hits: int = 0
+    misses: int = 0
+    negative_hits: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    loads: int = 0
+    load_time: float = 0.0
+    size: int = 0
+    
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+    
+    @property
+    def average_load_time(self) -> float:
+        return self.load_time / self.loads if self.loads else 0.0
+
+
+class _LRUCache:
+    """Thread-safe LRU map with per-entry expiry."""
+    
+    def __init__(self, max_size: int, clock: Callable[[], float]):
+        self.max_size = max_size
+        self.stats = CacheStats()
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Optional[float], bool]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, negative = entry
+                if expires_at is None or expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self.stats.hits += 1
+                    if negative:
+                        self.stats.negative_hits += 1
+                    return True, value
+                del self._entries[key]
+                self.stats.expirations += 1
+            self.stats.misses += 1
+            self.stats.size = len(self._entries)
+            return False, None
+    
+    def put(self, key: Hashable, value: Any, ttl: Optional[float], negative: bool, load_time: float):
+        with self._lock:
+            self.stats.loads += 1
+            self.stats.load_time += load_time
+            if self.max_size <= 0:
+                return
+            expires_at = self._clock() + ttl if ttl is not None else None
+            self._entries[key] = (value, expires_at, negative)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+            self.stats.size = len(self._entries)
+    
+    def invalidate(self, key: Optional[Hashable] = None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+            self.stats.size = len(self._entries)
+    
+    def snapshot(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(**vars(self.stats))
+
+
+def _digest(*parts: str) -> str:
+    """Compact cache key for arguments that may contain a whole document."""
+    hasher = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        hasher.update(part.encode("utf-8"))
+        hasher.update(b"\x1f")
+    return hasher.hexdigest()
+
+
+class CachingKnowledgeBaseClient:
+    """
+    Bounded LRU/TTL cache in front of a MedicalKnowledgeBaseClient.
+    
+    Drop-in replacement for the ``knowledge_base_client`` argument of
+    MedicalAnalysisAgent: the four lookup methods are cached per method with
+    their own size limit and TTL, and any other attribute is delegated to the
+    wrapped client. Unknown-medication fallbacks are cached too (with
+    ``negative_ttl``) so repeated misses do not reach the backend. Keys
+    include the wrapped client's ``data_version``, so entries cached from
+    one knowledge base bundle are never served after a swap to another.
+    """
+    
+    def __init__(
+        self,
+        client: Optional[MedicalKnowledgeBaseClient] = None,
+        max_sizes: Optional[Dict[str, int]] = None,
+        ttls: Optional[Dict[str, Optional[float]]] = None,
+        negative_ttl: Optional[float] = 300.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Wrap a knowledge base client.
+        
+        Args:
+            client: Client to cache; defaults to a new MedicalKnowledgeBaseClient
+            max_sizes: Per-method LRU capacity overrides
+            ttls: Per-method time-to-live overrides in seconds (None = no expiry)
+            negative_ttl: Time-to-live for unknown-medication fallbacks
+            clock: Monotonic clock used for expiry, injectable for tests
+        """
+        self.client = client or MedicalKnowledgeBaseClient()
+        self.negative_ttl = negative_ttl
+        self._clock = clock
+        self._ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        sizes = {**DEFAULT_MAX_SIZES, **(max_sizes or {})}
+        self._caches = {method: _LRUCache(size, clock) for method, size in sizes.items()}
+    
+    def __getattr__(self, name: str) -> Any:
+        if name == "client":
+            raise AttributeError(name)
+        return getattr(self.client, name)
+    
+    def _key(self, part: Hashable) -> Tuple[str, Hashable]:
+        return self.client.data_version, part
+    
+    def _cached(self, method: str, key: Hashable, load: Callable[[], Any], negative: Callable[[Any], bool] = None):
+        cache = self._caches[method]
+        key = self._key(key)
+        found, value = cache.get(key)
+        if found:
+            return value
+            
+        started = time.perf_counter()
+        value = load()
+        is_negative = bool(negative and negative(value))
+        ttl = self.negative_ttl if is_negative else self._ttls.get(method)
+        cache.put(key, value, ttl, is_negative, time.perf_counter() - started)
+        return value
+    
+    def get_medication_info(self, medication_name: str) -> Optional[Dict]:
+        return self._cached(
+            "get_medication_info",
+            medication_name,
+            lambda: self.client.get_medication_info(medication_name),
+            negative=lambda info: not info or info.get("class") == UNKNOWN_MEDICATION_CLASS
+        )
+    
+    def get_medication_info_many(self, medication_names: List[str]) -> Dict[str, Dict]:
+        """Serve cached entries and fetch only the misses with one bulk call."""
+        cache = self._caches["get_medication_info"]
+        version = self.client.data_version
+        infos = {}
+        missing = []
+        for name in dict.fromkeys(medication_names):
+            found, value = cache.get((version, name))
+            if found:
+                infos[name] = value
+            else:
+                missing.append(name)
+        if not missing:
+            return infos
+            
+        started = time.perf_counter()
+        loaded = self.client.get_medication_info_many(missing)
+        load_time = (time.perf_counter() - started) / len(missing)
+        for name in missing:
+            info = loaded.get(name)
+            is_negative = not info or info.get("class") == UNKNOWN_MEDICATION_CLASS
+            ttl = self.negative_ttl if is_negative else self._ttls.get("get_medication_info")
+            cache.put((version, name), info, ttl, is_negative, load_time)
+            infos[name] = info
+        return {name: infos[name] for name in dict.fromkeys(medication_names)}
+    
+    def check_interactions(self, medications: List[str]) -> List[Dict]:
+        return self._cached(
+            "check_interactions",
+            tuple(medications),
+            lambda: self.client.check_interactions(medications)
+        )
+    
+    def get_specialty_recommendations(self, conditions: List[DocumentLike]) -> List[Dict]:
+        return self._cached(
+            "get_specialty_recommendations",
+            _digest(*map(document_text, conditions)),
+            lambda: self.client.get_specialty_recommendations(conditions)
+        )
+    
+    def identify_red_flags(self, document: DocumentLike, medications: List[str]) -> List[Dict]:
+        return self._cached(
+            "identify_red_flags",
+            _digest(document_text(document), *medications),
+            lambda: self.client.identify_red_flags(document, medications)
+        )
+    
+    def invalidate(self, method: Optional[str] = None, *args: Any):
+        """
+        Drop cached entries.
+        
+        Args:
+            method: Method whose cache to clear; None clears every cache
+            *args: Arguments of a single call to drop from the current
+                knowledge base version, e.g.
+                ``invalidate("get_medication_info", "Metformin")``
+        """
+        if method is None:
+            for cache in self._caches.values():
+                cache.invalidate()
+            return
+            
+        cache = self._caches[method]
+        if not args:
+            cache.invalidate()
+        elif method == "get_medication_info":
+            cache.invalidate(self._key(args[0]))
+        elif method == "check_interactions":
+            cache.invalidate(self._key(tuple(args[0])))
+        elif method == "get_specialty_recommendations":
+            cache.invalidate(self._key(_digest(*map(document_text, args[0]))))
+        else:
+            cache.invalidate(self._key(_digest(document_text(args[0]), *args[1])))
+    
+    def stats(self) -> Dict[str, CacheStats]:
+        """Return a snapshot of hit, miss, eviction and load-latency counters per method."""
+        return {method: cache.snapshot() for method, cache in self._caches.items()}
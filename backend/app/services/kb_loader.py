@@ -0,0 +1,146 @@
+from typing import Callable, Dict, Hashable, List, NamedTuple, Optional, Set, Tuple
+import asyncio
+import contextvars
+
+
+class _PendingBatch(NamedTuple):
+    """Lookups queued under one batch key, with the context of the first caller."""
+    
+    context: contextvars.Context
+    futures: Dict[str, asyncio.Future]
+
+
+class MedicationInfoLoader:
+    """
+    Coalesces medication lookups into bulk knowledge base requests.
+    
+    ``load`` calls are queued until an event loop tick passes without new
+    names (or, with ``batch_window``, until that many seconds after the first
+    queued call), then de-duplicated and sent as one
+    ``get_medication_info_many`` request. Names already in flight
+    share the pending response, so concurrent analyses of many documents cost
+    about one round trip per batch instead of one per medication.
+    
+    Lookups are only coalesced with others of the same ``batch_key``, and
+    each batch is sent from the context of the caller that opened it, so
+    analyses pinned to different knowledge base bundles get answers from
+    their own bundle.
+    """
+    
+    def __init__(
+        self,
+        client,
+        batch_window: float = 0.0,
+        max_batch_size: int = 256,
+        batch_key: Optional[Callable[[], Hashable]] = None
+    ):
+        """
+        Create a loader.
+        
+        Args:
+            client: Client with an async ``get_medication_info_many`` method,
+                e.g. AsyncMedicalKnowledgeBaseClient
+            batch_window: Seconds to wait for more lookups before sending;
+                0 sends once a tick passes without new lookups
+            max_batch_size: Send immediately once this many names are queued
+            batch_key: Called in each caller's context; lookups with different
+                keys, e.g. pinned bundle versions, never share a batch
+        """
+        self.client = client
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.batch_key = batch_key
+        self.batch_count = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queued: Dict[Hashable, _PendingBatch] = {}
+        self._in_flight: Dict[Tuple[Hashable, str], asyncio.Future] = {}
+        self._handle: Optional[asyncio.Handle] = None
+        self._settled_size = 0
+        self._tasks: Set[asyncio.Task] = set()
+    
+    async def load(self, medication_name: str) -> Optional[Dict]:
+        """
+        Queue one lookup and wait for the batch that carries it.
+        
+        Args:
+            medication_name: Name of the medication
+            
+        Returns:
+            Medication information, as returned by get_medication_info
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._queued, self._in_flight, self._handle = {}, {}, None
+            
+        key = self.batch_key() if self.batch_key is not None else None
+        pending = self._queued.get(key)
+        future = pending.futures.get(medication_name) if pending is not None else None
+        future = future or self._in_flight.get((key, medication_name))
+        if future is None:
+            if pending is None:
+                pending = self._queued[key] = _PendingBatch(contextvars.copy_context(), {})
+            future = loop.create_future()
+            pending.futures[medication_name] = future
+            if len(pending.futures) >= self.max_batch_size:
+                self._dispatch(key)
+            elif self._handle is None:
+                if self.batch_window > 0:
+                    self._handle = loop.call_later(self.batch_window, self._dispatch)
+                else:
+                    self._settled_size = 0
+                    self._handle = loop.call_soon(self._settle)
+                    
+        return await asyncio.shield(future)
+    
+    async def load_many(self, medication_names: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Queue several lookups at once.
+        
+        Args:
+            medication_names: Medication names
+            
+        Returns:
+            Mapping of each name to its medication information
+        """
+        names = list(dict.fromkeys(medication_names))
+        infos = await asyncio.gather(*(self.load(name) for name in names))
+        return dict(zip(names, infos))
+    
+    def _settle(self):
+        queued = sum(len(pending.futures) for pending in self._queued.values())
+        if queued > self._settled_size:
+            self._settled_size = queued
+            self._handle = self._loop.call_soon(self._settle)
+        else:
+            self._handle = None
+            self._dispatch()
+    
+    def _dispatch(self, *keys: Hashable):
+        """Send the batches queued under ``keys``, or every queued batch."""
+        for key in keys or list(self._queued):
+            pending = self._queued.pop(key)
+            self._in_flight.update(((key, name), future) for name, future in pending.futures.items())
+            self.batch_count += 1
+            task = pending.context.run(self._loop.create_task, self._fetch(key, pending.futures))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        if not self._queued and self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+    
+    async def _fetch(self, key: Hashable, batch: Dict[str, asyncio.Future]):
+        try:
+            infos = await self.client.get_medication_info_many(list(batch))
+        except Exception as exc:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(exc)
+        else:
+            for name, future in batch.items():
+                if not future.done():
+                    future.set_result(infos.get(name))
+        finally:
+            for name, future in batch.items():
+                if self._in_flight.get((key, name)) is future:
+                    del self._in_flight[key, name]
@@ -0,0 +1,263 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+from backend.app.services.medication_index import (
+    MedicationLookup,
+    MATCH_ALIAS,
+    MATCH_BRAND,
+    MATCH_EXACT,
+    MATCH_NONE,
+    MATCH_PREFIX,
+    MATCH_TOKEN,
+)
+from backend.app.services.medication_scanner import normalize_medication_name
+
+
+MAGIC = b"MKBS"
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct("<4sHHIIQQQQQQ")
+ENTRY = struct.Struct("<IIII")
+OFFSET = struct.Struct("<Q")
+
+KINDS = (MATCH_EXACT, MATCH_BRAND, MATCH_ALIAS)
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file is missing, truncated or of another format."""
+
+
+def build_snapshot(data: Dict, path: str) -> str:
+    """
+    Compile knowledge base data into a snapshot file.
+    
+    Layout: a fixed header (magic, format version, counts and section
+    offsets), a string table of normalized names, an entry index of
+    fixed-size (name offset, name length, record id, kind) rows sorted by
+    name, ``records + 1`` uint64 record offsets, one JSON object per
+    medication, and a JSON metadata block with the lexicon and data version.
+    
+    Args:
+        data: ``{"medications": {key: entry}, "lexicon": [...]}``
+        path: Destination file; written atomically
+    
+    Returns:
+        The data version stored in the snapshot
+    """
+    medications = data.get("medications", {})
+    keys = list(medications)
+    names: Dict[bytes, Tuple[int, int]] = {}
+    
+    for record_id, key in enumerate(keys):
+        entry = medications[key]
+        candidates = [(key, 0)]
+        candidates += [(name, 1) for name in entry.get("brand_names", ())]
+        candidates += [(name, 2) for name in entry.get("aliases", ())]
+        for name, kind in candidates:
+            encoded = normalize_medication_name(name).encode("utf-8")
+            if encoded not in names or kind < names[encoded][1]:
+                names[encoded] = (record_id, kind)
+    
+    strings = bytearray()
+    entries = bytearray()
+    for name in sorted(names):
+        record_id, kind = names[name]
+        entries += ENTRY.pack(len(strings), len(name), record_id, kind)
+        strings += name
+    
+    records = bytearray()
+    offsets = bytearray()
+    for key in keys:
+        offsets += OFFSET.pack(len(records))
+        records += json.dumps({"key": key, "data": medications[key]}, sort_keys=True).encode("utf-8")
+    offsets += OFFSET.pack(len(records))
+    
+    data_version = hashlib.blake2b(
+        json.dumps(data, sort_keys=True).encode("utf-8"), digest_size=16
+    ).hexdigest()
+    metadata = json.dumps({"lexicon": data.get("lexicon", []), "data_version": data_version}).encode("utf-8")
+    
+    strings_offset = HEADER.size
+    entries_offset = strings_offset + len(strings)
+    offsets_offset = entries_offset + len(entries)
+    records_offset = offsets_offset + len(offsets)
+    metadata_offset = records_offset + len(records)
+    
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, 0, len(names), len(keys),
+        strings_offset, entries_offset, offsets_offset, records_offset,
+        metadata_offset, len(metadata)
+    )
+    
+    temporary = f"{path}.tmp{os.getpid()}"
+    with open(temporary, "wb") as handle:
+        for section in (header, strings, entries, offsets, records, metadata):
+            handle.write(section)
+    os.replace(temporary, path)
+    return data_version
+
+
+class KnowledgeBaseSnapshot:
+    """
+    Memory-mapped, read-only view of a knowledge base snapshot.
+    
+    Offers the same ``lookup``/``names`` interface as MedicationIndex, so
+    MedicalKnowledgeBaseClient can use either. Exact, brand and alias lookups
+    are binary searches over the sorted entry index; prefix lookups scan only
+    the entries sharing the prefix. Opening a snapshot reads only its
+    header and metadata; pages are faulted in on demand and shared between
+    worker processes through the OS page cache.
+    """
+    
+    def __init__(self, path: str, min_prefix: int = 4):
+        """
+        Map a snapshot file.
+        
+        Args:
+            path: Snapshot file produced by build_snapshot
+            min_prefix: Shortest partial name accepted for prefix matches
+        """
+        self.path = path
+        self.min_prefix = min_prefix
+        try:
+            with open(path, "rb") as handle:
+                self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as exc:
+            raise SnapshotError(f"Cannot map snapshot {path}: {exc}") from exc
+            
+        if len(self._map) < HEADER.size:
+            raise SnapshotError(f"{path} is too small to be a knowledge base snapshot")
+        (
+            magic, version, _, self._entry_count, self._record_count,
+            self._strings_offset, self._entries_offset, self._offsets_offset,
+            self._records_offset, metadata_offset, metadata_length
+        ) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise SnapshotError(f"{path} is not a version {FORMAT_VERSION} knowledge base snapshot")
+        if metadata_offset + metadata_length > len(self._map):
+            raise SnapshotError(f"{path} is truncated")
+            
+        metadata = json.loads(self._map[metadata_offset:metadata_offset + metadata_length])
+        self.lexicon: List[str] = metadata["lexicon"]
+        self.data_version: str = metadata["data_version"]
+    
+    def __len__(self) -> int:
+        return self._record_count
+    
+    def close(self):
+        self._map.close()
+    
+    def _entry(self, position: int) -> Tuple[bytes, int, int]:
+        offset, length, record_id, kind = ENTRY.unpack_from(
+            self._map, self._entries_offset + position * ENTRY.size
+        )
+        start = self._strings_offset + offset
+        return self._map[start:start + length], record_id, kind
+    
+    def _lower_bound(self, name: bytes) -> int:
+        low, high = 0, self._entry_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._entry(middle)[0] < name:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+    
+    def _find(self, name: bytes) -> Optional[Tuple[int, int]]:
+        position = self._lower_bound(name)
+        if position < self._entry_count:
+            found, record_id, kind = self._entry(position)
+            if found == name:
+                return record_id, kind
+        return None
+    
+    def _find_prefix(self, prefix: bytes) -> Optional[int]:
+        """Return the record id all names with this prefix share, if unique."""
+        position = self._lower_bound(prefix)
+        record = None
+        while position < self._entry_count:
+            name, record_id, _ = self._entry(position)
+            if not name.startswith(prefix):
+                break
+            if record is not None and record_id != record:
+                return None
+            record = record_id
+            position += 1
+        return record
+    
+    def record(self, record_id: int) -> Tuple[str, Dict]:
+        """Decode one medication record; returns ``(key, entry)``."""
+        start, end = struct.unpack_from("<QQ", self._map, self._offsets_offset + record_id * OFFSET.size)
+        base = self._records_offset
+        payload = json.loads(self._map[base + start:base + end])
+        return payload["key"], payload["data"]
+    
+    def names(self) -> Iterable[str]:
+        """All indexed names in sorted order."""
+        entries = self._map[self._entries_offset:self._entries_offset + self._entry_count * ENTRY.size]
+        strings = self._map[self._strings_offset:self._entries_offset]
+        return [
+            strings[offset:offset + length].decode("utf-8")
+            for offset, length, _, _ in ENTRY.iter_unpack(entries)
+        ]
+    
+    def lookup(self, medication_name: str) -> MedicationLookup:
+        """
+        Resolve a medication name with the same precedence as MedicationIndex.
+        
+        Args:
+            medication_name: Name as written in the document
+            
+        Returns:
+            MedicationLookup with the matched key, its entry and match quality
+        """
+        name = normalize_medication_name(medication_name)
+        found = self._find(name.encode("utf-8"))
+        match = KINDS[found[1]] if found else MATCH_NONE
+        
+        tokens = name.split()
+        if found is None and len(tokens) > 1:
+            for token in tokens:
+                found = self._find(token.encode("utf-8"))
+                if found is not None:
+                    match = MATCH_TOKEN
+                    break
+                    
+        if found is None and len(name) >= self.min_prefix:
+            record_id = self._find_prefix(name.encode("utf-8"))
+            if record_id is not None:
+                found, match = (record_id, 0), MATCH_PREFIX
+                
+        if found is None:
+            return MedicationLookup(None, None, MATCH_NONE)
+        key, entry = self.record(found[0])
+        return MedicationLookup(key, entry, match)
+
+
+def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Compile a formulary JSON file into a knowledge base snapshot.")
+    parser.add_argument("formulary", nargs="?", help="Formulary JSON; omit with --builtin")
+    parser.add_argument("output", help="Snapshot file to write")
+    parser.add_argument("--builtin", action="store_true", help="Compile the built-in mock knowledge base")
+    args = parser.parse_args()
+    
+    if args.builtin:
+        from backend.app.services.knowledge_base_client import MedicalKnowledgeBaseClient
+        data = MedicalKnowledgeBaseClient()._initialize_mock_data()
+    else:
+        with open(args.formulary, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+    
+    version = build_snapshot(data, args.output)
+    print(f"Wrote {args.output} ({len(data.get('medications', {}))} medications, version {version})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional, Union
+from urllib.parse import unquote
+import json
+import threading
+import time
+
+from backend.app.services.knowledge_base_client import MedicalKnowledgeBaseClient
+
+
+Latency = Union[float, Callable[[str], float]]
+Fault = Callable[[str], Optional[int]]
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class KnowledgeBaseStubServer:
+    """
+    Local stand-in for the medical knowledge base HTTP API.
+    
+    Serves the mock data of a MedicalKnowledgeBaseClient over real HTTP on
+    localhost, with injectable per-request latency, so network clients can be
+    tested offline.
+    
+    Endpoints:
+        GET  /medications/{name}
+        GET  /lexicon
+        GET  /version
+        POST /medications/batch         {"names": [...]}
+        POST /interactions              {"medications": [...]}
+        POST /specialty-recommendations {"conditions": [...]}
+        POST /red-flags                 {"text": "...", "medications": [...]}
+    """
+    
+    def __init__(
+        self,
+        client: Optional[MedicalKnowledgeBaseClient] = None,
+        latency: Latency = 0.0,
+        fault: Optional[Fault] = None,
+        host: str = "127.0.0.1",
+        port: int = 0
+    ):
+        """
+        Create the stub server (not yet listening).
+        
+        Args:
+            client: Client whose mock data backs the responses
+            latency: Seconds to sleep per request, or a callable taking the
+                request path and returning seconds
+            fault: Callable taking the request path and returning an HTTP
+                status to fail the request with, or None to serve it
+            host: Interface to bind
+            port: Port to bind; 0 picks a free port
+        """
+        self.client = client or MedicalKnowledgeBaseClient()
+        self.latency = latency
+        self.fault = fault
+        self.request_count = 0
+        self.connection_count = 0
+        self._lock = threading.Lock()
+        self._httpd = _StubHTTPServer((host, port), self._make_handler())
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def start(self) -> "KnowledgeBaseStubServer":
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever,
+            kwargs={"poll_interval": 0.05},
+            daemon=True
+        )
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+    
+    def __enter__(self) -> "KnowledgeBaseStubServer":
+        return self.start()
+    
+    def __exit__(self, *exc_info):
+        self.stop()
+    
+    def _delay(self, path: str):
+        latency = self.latency(path) if callable(self.latency) else self.latency
+        if latency > 0:
+            time.sleep(latency)
+    
+    def _dispatch(self, method: str, path: str, payload: Optional[dict]):
+        """Map a request onto the backing client; returns (status, body)."""
+        client = self.client
+        if method == "GET" and path.startswith("/medications/"):
+            return 200, client.get_medication_info(unquote(path[len("/medications/"):]))
+        if method == "POST" and path == "/medications/batch":
+            return 200, client.get_medication_info_many(payload["names"])
+        if method == "GET" and path == "/lexicon":
+            return 200, client.get_medication_lexicon()
+        if method == "GET" and path == "/version":
+            return 200, {"version": client.data_version}
+        if method == "POST" and path == "/interactions":
+            return 200, client.check_interactions(payload["medications"])
+        if method == "POST" and path == "/specialty-recommendations":
+            return 200, client.get_specialty_recommendations(payload["conditions"])
+        if method == "POST" and path == "/red-flags":
+            return 200, client.identify_red_flags(payload["text"], payload["medications"])
+        return 404, {"error": f"No route for {method} {path}"}
+    
+    def _make_handler(self):
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+            
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connection_count += 1
+                    
+            def _handle(self, method: str):
+                with server._lock:
+                    server.request_count += 1
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length)) if length else None
+                server._delay(self.path)
+                status = server.fault(self.path) if server.fault else None
+                if status is not None:
+                    body = {"error": f"Injected fault for {self.path}"}
+                else:
+                    try:
+                        status, body = server._dispatch(method, self.path, payload)
+                    except (KeyError, TypeError) as exc:
+                        status, body = 400, {"error": f"Bad request: {exc}"}
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                
+            def do_GET(self):
+                self._handle("GET")
+                
+            def do_POST(self):
+                self._handle("POST")
+                
+            def log_message(self, format, *args):
+                pass
+                
+        return Handler
@@ -0,0 +1,156 @@
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+import http.client
+import json
+import queue
+import random
+import threading
+import time
+
+from backend.app.services.knowledge_base_client import KnowledgeBaseError
+
+
+RETRYABLE_STATUSES = frozenset({502, 503, 504})
+
+
+class HTTPTransport:
+    """
+    Thread-safe pooled HTTP/1.1 transport for the knowledge base API.
+    
+    Connections are kept alive and reused from a LIFO pool of at most
+    ``pool_size`` connections, so concurrent analyses share a few warm
+    sockets instead of opening one per call. Connection errors and 502/503/504
+    responses are retried with exponential backoff and full jitter; every
+    knowledge base call is a read, so retrying POSTs is safe. Response bodies
+    are decoded after the connection is back in the pool.
+    """
+    
+    def __init__(
+        self,
+        base_url: str,
+        pool_size: int = 10,
+        timeout: float = 10.0,
+        pool_timeout: float = 30.0,
+        max_retries: int = 2,
+        backoff: float = 0.05,
+        max_backoff: float = 1.0,
+        keep_alive: bool = True
+    ):
+        """
+        Create the transport; connections are opened lazily.
+        
+        Args:
+            base_url: Root URL of the knowledge base API
+            pool_size: Maximum number of simultaneously open connections
+            timeout: Socket connect and read timeout in seconds
+            pool_timeout: Seconds to wait for a free connection
+            max_retries: Retries after the first attempt for retryable failures
+            backoff: Base delay in seconds, doubled per retry
+            max_backoff: Upper bound on a single retry delay
+            keep_alive: Reuse connections; False closes each after one request
+        """
+        url = urlsplit(base_url.rstrip("/"))
+        self._connection_class = (
+            http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+        )
+        self.host = url.hostname
+        self.port = url.port
+        self.base_path = url.path
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.pool_timeout = pool_timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.keep_alive = keep_alive
+        self.connections_opened = 0
+        self.requests_sent = 0
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._lock = threading.Lock()
+    
+    def _acquire(self) -> http.client.HTTPConnection:
+        if not self._slots.acquire(timeout=self.pool_timeout):
+            raise KnowledgeBaseError(f"No knowledge base connection free after {self.pool_timeout}s")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                self.connections_opened += 1
+            return self._connection_class(self.host, self.port, timeout=self.timeout)
+    
+    def _release(self, connection: http.client.HTTPConnection, reusable: bool):
+        if reusable and self.keep_alive:
+            self._idle.put(connection)
+        else:
+            connection.close()
+        self._slots.release()
+    
+    def _send(self, method: str, path: str, body: Optional[bytes]) -> Tuple[int, bytes]:
+        """One attempt: borrow a connection, exchange one request, return it."""
+        headers = {"Accept": "application/json"}
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+        if not self.keep_alive:
+            headers["Connection"] = "close"
+            
+        connection = self._acquire()
+        reusable = False
+        try:
+            connection.request(method, self.base_path + path, body=body, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+            reusable = not response.will_close
+            return response.status, data
+        finally:
+            with self._lock:
+                self.requests_sent += 1
+            self._release(connection, reusable)
+    
+    def request(self, method: str, path: str, payload: Optional[Dict] = None) -> Any:
+        """
+        Send a request and decode its JSON response.
+        
+        Args:
+            method: HTTP method
+            path: Path below the base URL, e.g. ``/medications/metformin``
+            payload: JSON body for POST requests
+            
+        Returns:
+            Decoded JSON response
+            
+        Raises:
+            KnowledgeBaseError: On a non-2xx response or when retries run out
+        """
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        attempt = 0
+        while True:
+            try:
+                status, data = self._send(method, path, body)
+            except (OSError, http.client.HTTPException) as exc:
+                failure = f"{method} {path} failed: {exc!r}"
+            else:
+                if 200 <= status < 300:
+                    return json.loads(data)
+                failure = f"{method} {path} returned HTTP {status}"
+                if status not in RETRYABLE_STATUSES:
+                    raise KnowledgeBaseError(failure)
+                    
+            if attempt >= self.max_retries:
+                raise KnowledgeBaseError(failure)
+            time.sleep(random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt)))
+            attempt += 1
+    
+    def close(self):
+        """Close every idle connection."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+    
+    def __enter__(self) -> "HTTPTransport":
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
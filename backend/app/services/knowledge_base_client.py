@@ -1,13 +1,86 @@
-from typing import Dict, List, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+from pathlib import Path
+from urllib.parse import quote
 import json
+import time
+
+from backend.app.services.document_context import DocumentLike, document_text
+from backend.app.services.interaction_graph import InteractionGraph
+from backend.app.services.kb_bundle import KnowledgeBaseBundle, compile_bundle, load_bundle
+from backend.app.services.kb_snapshot import KnowledgeBaseSnapshot
+from backend.app.services.medication_index import MedicationLookup, MATCH_NONE
+from backend.app.services.medication_scanner import normalize_medication_name
+from backend.app.services.rule_engine import RULE_RED_FLAGS, RULE_SPECIALTIES, RuleEngine
+
+
+UNKNOWN_MEDICATION_CLASS = "Unknown"
+
+DEFAULT_INTERACTIONS_PATH = str(Path(__file__).resolve().parent.parent / "data" / "interactions.json")
+DEFAULT_RULES_PATH = str(Path(__file__).resolve().parent.parent / "data" / "rules.json")
+
+
+class KnowledgeBaseError(Exception):
+    """Raised when the medical knowledge base backend fails a request."""
 
 
 class MedicalKnowledgeBaseClient:
-    """Stubbed HTTP client for medical knowledge base API."""
+    """
+    Client for the medical knowledge base API.
     
-    def __init__(self, base_url: str = "https://api.medical-kb.example.com"):
+    Answers from built-in mock data (or a snapshot or bundle directory)
+    unless a ``transport`` such as kb_transport.HTTPTransport is given, in
+    which case the lookup methods are sent to the remote knowledge base.
+    
+    Local data is held in one immutable KnowledgeBaseBundle. swap_bundle
+    replaces it with a single reference assignment, so reads take no lock;
+    analyses run inside ``pinned()`` keep answering from the bundle they
+    started with.
+    """
+    
+    def __init__(
+        self,
+        base_url: str = "https://api.medical-kb.example.com",
+        formulary_path: Optional[str] = None,
+        interactions_path: str = DEFAULT_INTERACTIONS_PATH,
+        snapshot_path: Optional[str] = None,
+        transport=None,
+        rules_path: str = DEFAULT_RULES_PATH,
+        bundle_path: Optional[str] = None,
+        version_ttl: float = 30.0
+    ):
+        """
+        Args:
+            base_url: Base URL of the knowledge base API
+            formulary_path: JSON formulary merged over the built-in data
+            interactions_path: Interaction graph JSON file
+            snapshot_path: Snapshot file to answer medication lookups from
+            transport: Sends lookups to a remote knowledge base when given
+            rules_path: Rule table JSON file
+            bundle_path: Bundle directory (see kb_bundle.load_bundle); replaces
+                the built-in data, snapshot, interaction and rule files
+            version_ttl: Seconds a remote knowledge base's version is reused
+                before it is fetched again
+        """
         self.base_url = base_url
-        self._mock_data = self._initialize_mock_data()
+        self.transport = transport
+        self._pinned: ContextVar[Optional[KnowledgeBaseBundle]] = ContextVar("pinned_bundle", default=None)
+        self.version_ttl = version_ttl
+        self._remote_version: Optional[Tuple[str, float]] = None
+        if bundle_path:
+            self._bundle = load_bundle(bundle_path)
+        else:
+            snapshot = KnowledgeBaseSnapshot(snapshot_path) if snapshot_path else None
+            if snapshot is not None:
+                data = {"medications": {}, "lexicon": list(snapshot.lexicon)}
+            else:
+                data = self._initialize_mock_data()
+            self._bundle = compile_bundle(
+                data, InteractionGraph.from_file(interactions_path), RuleEngine.from_file(rules_path), snapshot
+            )
+        if formulary_path:
+            self.load_formulary(formulary_path)
     
     def _initialize_mock_data(self) -> Dict:
         """Initialize mock data for offline testing."""
@@ -15,6 +88,8 @@ class MedicalKnowledgeBaseClient:
             "medications": {
                 "amoxicillin": {
                     "generic_name": "Amoxicillin",
+                    "brand_names": ["Amoxil", "Moxatag"],
+                    "aliases": ["Amoxycillin"],
                     "class": "Antibiotic",
                     "common_side_effects": ["Nausea", "Diarrhea", "Rash"],
                     "interactions": ["Warfarin", "Methotrexate"],
@@ -22,6 +97,8 @@ class MedicalKnowledgeBaseClient:
                 },
                 "metformin": {
                     "generic_name": "Metformin",
+                    "brand_names": ["Glucophage", "Fortamet"],
+                    "aliases": ["Metformin Hydrochloride", "Metformin HCl"],
                     "class": "Antidiabetic",
                     "common_side_effects": ["Nausea", "Diarrhea", "Abdominal pain"],
                     "interactions": ["Alcohol", "Contrast dyes"],
@@ -29,6 +106,8 @@ class MedicalKnowledgeBaseClient:
                 },
                 "lisinopril": {
                     "generic_name": "Lisinopril",
+                    "brand_names": ["Zestril", "Prinivil"],
+                    "aliases": [],
                     "class": "ACE Inhibitor",
                     "common_side_effects": ["Dizziness", "Cough", "Headache"],
                     "interactions": ["NSAIDs", "Potassium supplements"],
@@ -36,19 +115,153 @@ class MedicalKnowledgeBaseClient:
                 },
                 "atorvastatin": {
                     "generic_name": "Atorvastatin",
+                    "brand_names": ["Lipitor"],
+                    "aliases": ["Atorvastatin Calcium"],
                     "class": "Statin",
                     "common_side_effects": ["Muscle pain", "Liver enzyme elevation"],
                     "interactions": ["Grapefruit juice", "Fibrates"],
                     "precautions": ["Monitor liver function", "Report muscle pain"]
                 }
             },
-            "interactions": {
-                "warfarin_amoxicillin": {
-                    "severity": "moderate",
-                    "description": "May increase anticoagulant effect"
-                }
-            }
+            "lexicon": [
+                "amoxicillin", "metformin", "lisinopril", "atorvastatin",
+                "aspirin", "ibuprofen", "acetaminophen", "omeprazole",
+                "levothyroxine", "amlodipine", "losartan", "gabapentin"
+            ]
+        }
+    
+    def load_formulary(self, path: str):
+        """
+        Load medication entries from a local JSON formulary file.
+        
+        The file holds ``{"medications": {key: entry, ...}, "lexicon": [...]}``;
+        entries are merged over the current data and a new bundle is
+        compiled and swapped in.
+        
+        Args:
+            path: Path to the formulary JSON file
+        
+        Raises:
+            KnowledgeBaseError: If the client answers from a read-only snapshot
+        """
+        bundle = self._bundle
+        if bundle.snapshot is not None:
+            raise KnowledgeBaseError("Cannot merge a formulary into a read-only knowledge base snapshot")
+        
+        with open(path, "r", encoding="utf-8") as handle:
+            formulary = json.load(handle)
+        
+        data = {
+            "medications": {**bundle.data["medications"], **formulary.get("medications", {})},
+            "lexicon": bundle.data["lexicon"] + formulary.get("lexicon", []),
         }
+        self.swap_bundle(compile_bundle(data, bundle.interaction_graph, bundle.rule_engine))
+    
+    @property
+    def bundle(self) -> KnowledgeBaseBundle:
+        """The bundle pinned for the current analysis, else the current bundle."""
+        return self._pinned.get() or self._bundle
+    
+    @property
+    def snapshot(self) -> Optional[KnowledgeBaseSnapshot]:
+        return self.bundle.snapshot
+    
+    @property
+    def interaction_graph(self) -> InteractionGraph:
+        return self.bundle.interaction_graph
+    
+    @property
+    def rule_engine(self) -> RuleEngine:
+        return self.bundle.rule_engine
+    
+    def swap_bundle(self, bundle: KnowledgeBaseBundle) -> KnowledgeBaseBundle:
+        """
+        Replace the knowledge base data atomically.
+        
+        Compile the bundle first (kb_bundle.load_bundle or compile_bundle);
+        the swap itself is a single reference assignment. Analyses already
+        running inside ``pinned()`` finish on the previous bundle.
+        
+        Args:
+            bundle: New bundle
+            
+        Returns:
+            The previous bundle
+        """
+        previous, self._bundle = self._bundle, bundle
+        return previous
+    
+    def reload_bundle(self, directory: str) -> KnowledgeBaseBundle:
+        """Load and compile a bundle directory, then swap it in; returns the new bundle."""
+        bundle = load_bundle(directory).warm()
+        self.swap_bundle(bundle)
+        return bundle
+    
+    @contextmanager
+    def pinned(self, bundle: Optional[KnowledgeBaseBundle] = None) -> Iterator[KnowledgeBaseBundle]:
+        """
+        Answer from one bundle for the duration of the block.
+        
+        The pin is held in a context variable, so it follows the analysis
+        into stage executor threads and asyncio tasks without affecting
+        other analyses. A nested pin without a bundle keeps the outer one.
+        
+        Args:
+            bundle: Bundle to pin; defaults to the current bundle
+            
+        Yields:
+            The pinned bundle
+        """
+        current = self._pinned.get()
+        if current is not None and bundle is None:
+            yield current
+            return
+        token = self._pinned.set(bundle or self._bundle)
+        try:
+            yield self._pinned.get()
+        finally:
+            self._pinned.reset(token)
+    
+    @property
+    def data_version(self) -> str:
+        """
+        Version of the knowledge base data this client answers from.
+        
+        The version of the bundle in use: a digest of the medication data,
+        interaction graph and rule table. With a transport the remote
+        knowledge base reports its own version, fetched again once it is
+        older than ``version_ttl`` so remote updates reach cache keys.
+        """
+        if self.transport is not None:
+            now = time.monotonic()
+            if self._remote_version is None or now - self._remote_version[1] >= self.version_ttl:
+                self._remote_version = (self.transport.request("GET", "/version")["version"], now)
+            return self._remote_version[0]
+        return self.bundle.version
+    
+    def get_medication_lexicon(self) -> List[str]:
+        """
+        Get the medication names recognized by the knowledge base.
+        
+        Returns:
+            List of lowercase medication names (generic, brand and alias),
+            without duplicates
+        """
+        if self.transport is not None:
+            return self.transport.request("GET", "/lexicon")
+        return list(self.bundle.lexicon)
+    
+    def lookup_medication(self, medication_name: str) -> MedicationLookup:
+        """
+        Resolve a medication name through the lookup index.
+        
+        Args:
+            medication_name: Name of the medication
+            
+        Returns:
+            MedicationLookup with the entry and a match-quality flag
+        """
+        return self.bundle.medication_index.lookup(medication_name)
     
     def get_medication_info(self, medication_name: str) -> Optional[Dict]:
         """
@@ -60,137 +273,105 @@ class MedicalKnowledgeBaseClient:
         Returns:
             Dictionary containing medication information or None if not found
         """
-        normalized_name = medication_name.lower().strip()
-        
-        for key, data in self._mock_data["medications"].items():
-            if key in normalized_name or normalized_name in key:
-                return data
+        if self.transport is not None:
+            return self.transport.request("GET", f"/medications/{quote(medication_name, safe='')}")
+        lookup = self.bundle.medication_index.lookup(medication_name)
+        if lookup.match != MATCH_NONE:
+            return lookup.info
         
         return {
             "generic_name": medication_name,
-            "class": "Unknown",
+            "class": UNKNOWN_MEDICATION_CLASS,
             "common_side_effects": [],
             "interactions": [],
             "precautions": ["Consult your doctor"]
         }
     
+    def get_medication_info_many(self, medication_names: List[str]) -> Dict[str, Dict]:
+        """
+        Get information about several medications in one request.
+        
+        Args:
+            medication_names: Medication names; duplicates are looked up once
+            
+        Returns:
+            Mapping of each requested name to its medication information
+        """
+        if self.transport is not None:
+            return self.transport.request(
+                "POST", "/medications/batch", {"names": list(dict.fromkeys(medication_names))}
+            )
+        with self.pinned():
+            return {name: self.get_medication_info(name) for name in dict.fromkeys(medication_names)}
+    
     def check_interactions(self, medications: List[str]) -> List[Dict]:
         """
         Check for drug interactions among a list of medications.
         
+        Medications are resolved to normalized ids and checked pairwise
+        against the interaction graph, including class-level edges.
+        
         Args:
             medications: List of medication names
             
         Returns:
             List of interaction warnings
         """
-        interactions = []
-        
-        normalized_meds = [m.lower().strip() for m in medications]
-        
-        if "warfarin" in str(normalized_meds) and "amoxicillin" in str(normalized_meds):
-            interactions.append({
-                "medications": ["Warfarin", "Amoxicillin"],
-                "severity": "moderate",
-                "description": "May increase anticoagulant effect. Monitor INR closely.",
-                "action": "Consult with prescribing physician"
-            })
-        
-        if "metformin" in str(normalized_meds):
-            for med in normalized_meds:
-                if "contrast" in med or "dye" in med:
-                    interactions.append({
-                        "medications": ["Metformin", "Contrast dye"],
-                        "severity": "high",
-                        "description": "Risk of lactic acidosis. Discontinue metformin before procedure.",
-                        "action": "Stop metformin 48 hours before contrast procedure"
-                    })
+        if self.transport is not None:
+            return self.transport.request("POST", "/interactions", {"medications": medications})
+        with self.pinned():
+            return self.interaction_graph.check(
+                [(medication, self.medication_id(medication)) for medication in medications]
+            )
+    
+    def medication_id(self, medication_name: str) -> str:
+        """
+        Map a medication name to the normalized id used by the interaction graph.
         
-        return interactions
+        Args:
+            medication_name: Name as written in the document
+            
+        Returns:
+            Knowledge base key when the name resolves, else the normalized name
+        """
+        lookup = self.bundle.medication_index.lookup(medication_name)
+        return lookup.key if lookup.match != MATCH_NONE else normalize_medication_name(medication_name)
     
-    def get_specialty_recommendations(self, conditions: List[str]) -> List[Dict]:
+    def get_specialty_recommendations(self, conditions: List[DocumentLike]) -> List[Dict]:
         """
         Get specialist recommendations based on conditions or medications.
         
+        Evaluates the ``specialties`` rules of the rule table against each
+        condition.
+        
         Args:
-            conditions: List of medical conditions or concerns
+            conditions: List of medical conditions or concerns; the document
+                itself may be passed as a DocumentContext
             
         Returns:
             List of specialist recommendations
         """
-        recommendations = []
-        conditions_str = " ".join(conditions).lower()
-        
-        if any(word in conditions_str for word in ["diabetes", "metformin", "blood sugar"]):
-            recommendations.append({
-                "specialty": "Endocrinologist",
-                "reason": "Diabetes management and monitoring",
-                "priority": "medium"
-            })
-        
-        if any(word in conditions_str for word in ["heart", "blood pressure", "lisinopril", "atorvastatin"]):
-            recommendations.append({
-                "specialty": "Cardiologist",
-                "reason": "Cardiovascular health monitoring",
-                "priority": "medium"
-            })
-        
-        if any(word in conditions_str for word in ["antibiotic", "infection", "amoxicillin"]):
-            recommendations.append({
-                "specialty": "General Practitioner",
-                "reason": "Follow-up for infection treatment",
-                "priority": "low"
-            })
-        
-        return recommendations
+        if self.transport is not None:
+            return self.transport.request(
+                "POST", "/specialty-recommendations", {"conditions": [document_text(item) for item in conditions]}
+            )
+        return self.rule_engine.evaluate(RULE_SPECIALTIES, conditions)
     
-    def identify_red_flags(self, text: str, medications: List[str]) -> List[Dict]:
+    def identify_red_flags(self, document: DocumentLike, medications: List[str]) -> List[Dict]:
         """
         Identify potential red flags in the medical document.
         
+        Evaluates the ``red_flags`` rules of the rule table.
+        
         Args:
-            text: Full text of the document
+            document: Full text of the document, or its DocumentContext
             medications: List of medications
             
         Returns:
             List of red flag concerns
         """
-        red_flags = []
-        text_lower = text.lower()
-        
-        critical_keywords = ["severe", "emergency", "immediate", "urgent", "critical"]
-        if any(keyword in text_lower for keyword in critical_keywords):
-            red_flags.append({
-                "category": "Urgency",
-                "description": "Document contains urgent or critical terminology",
-                "severity": "high",
-                "recommendation": "Ensure immediate follow-up with healthcare provider"
-            })
-        
-        allergy_keywords = ["allergy", "allergies", "allergic", "adverse reaction"]
-        if any(keyword in text_lower for keyword in allergy_keywords):
-            red_flags.append({
-                "category": "Allergies",
-                "description": "Allergies or adverse reactions mentioned",
-                "severity": "high",
-                "recommendation": "Verify current medications against known allergies"
-            })
-        
-        if len(medications) > 5:
-            red_flags.append({
-                "category": "Polypharmacy",
-                "description": f"Patient on {len(medications)} medications - potential for interactions",
-                "severity": "medium",
-                "recommendation": "Review medication list with pharmacist or physician"
-            })
-        
-        contraindication_keywords = ["contraindicated", "should not", "avoid", "discontinue"]
-        if any(keyword in text_lower for keyword in contraindication_keywords):
-            red_flags.append({
-                "category": "Contraindication",
-                "description": "Potential contraindications mentioned in document",
-                "severity": "high",
-                "recommendation": "Review contraindications with prescribing physician immediately"
-            })
-        
-        return red_flags
+        if self.transport is not None:
+            return self.transport.request(
+                "POST", "/red-flags", {"text": document_text(document), "medications": medications}
+            )
+        return self.rule_engine.evaluate(RULE_RED_FLAGS, document, medication_count=len(medications))
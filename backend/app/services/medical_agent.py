@@ -1,45 +1,68 @@
-from typing import Dict, List
+from __future__ import annotations
+
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import re
-from langchain_core.prompts import PromptTemplate
-
-from backend.app.schemas import (
-    ParsedDocument,
-    AnalysisResult,
-    PrescriptionSummary,
-    PrescriptionItem,
-    MedicationTimingSchedule,
-    MedicationTimingSlot,
-    HospitalDoctorSuggestions,
-    DoctorSuggestion,
-    HospitalSuggestion,
-    AdditionalInsights,
-    RedFlagInsight,
+import threading
+
+from backend.app.services.analysis_stream import (
+    AnalysisEvent,
+    SECTION_INSIGHTS,
+    SECTION_PRESCRIPTIONS,
+    SECTION_SUGGESTIONS,
+    SECTION_TIMING,
+    SECTIONS,
+    assemble_result,
+    events_from_result,
+    select_sections,
+)
+from backend.app.services.analysis_records import (
+    AnalysisRecord,
+    DoctorRecord,
+    HospitalRecord,
+    InsightsRecord,
+    PrescriptionRecord,
+    RedFlagRecord,
+    SuggestionsRecord,
+    TimingScheduleRecord,
+    TimingSlotRecord,
+    section_model,
+    summarize_prescriptions,
+    to_analysis_result,
+    to_partial_result,
+)
+from backend.app.services.document_context import DocumentContext, DocumentLike
+from backend.app.services.instrumentation import (
+    NO_INSTRUMENTATION,
+    Instrumentation,
+    InstrumentedKnowledgeBase,
+    traced_stage,
 )
 from backend.app.services.knowledge_base_client import MedicalKnowledgeBaseClient
+from backend.app.services.medication_scanner import MedicationScanner
+from backend.app.services.pipeline import (
+    SEQUENTIAL_EXECUTOR,
+    AnalysisPipeline,
+    AsyncStageExecutor,
+    SequentialExecutor,
+    Stage,
+)
+from backend.app.services.prescription_parser import PrescriptionDetails, parse_prescription_details
+from backend.app.services.result_cache import normalize_document_text, result_cache_key
+from backend.app.services.rule_engine import RULE_FACILITIES
 
+if TYPE_CHECKING:
+    from backend.app.services.async_knowledge_base_client import AsyncMedicalKnowledgeBaseClient
+    from backend.app.services.kb_loader import MedicationInfoLoader
+    from backend.app.schemas import ParsedDocument, AnalysisResult, PartialAnalysisResult
 
-class MedicalAnalysisAgent:
-    """
-    Medical document analysis agent using LangChain for workflow orchestration.
-    Analyzes parsed medical documents and generates structured insights.
-    """
-    
-    def __init__(self, knowledge_base_client: MedicalKnowledgeBaseClient = None):
-        """
-        Initialize the medical analysis agent.
-        
-        Args:
-            knowledge_base_client: Optional medical knowledge base client for cross-references
-        """
-        self.kb_client = knowledge_base_client or MedicalKnowledgeBaseClient()
-        self._setup_prompts()
-    
-    def _setup_prompts(self):
-        """Setup prompt templates for different analysis tasks."""
-        
-        self.prescription_extraction_prompt = PromptTemplate(
-            input_variables=["document_text"],
-            template="""Analyze the following medical document and extract all prescription information.
+
+MEDICATION_PATTERNS = [
+    re.compile(r'\b([A-Z][a-z]+(?:ol|in|ide|one|ate|mine|pril|sartan|statin))\b'),
+    re.compile(r'(?:^|\n|\. )([A-Z][a-z]{4,})\s+\d+\s*mg'),
+]
+
+PRESCRIPTION_EXTRACTION_TEMPLATE = """Analyze the following medical document and extract all prescription information.
 For each medication, identify:
 - Medication name
 - Dosage
@@ -52,11 +75,8 @@ Document:
 
 Return the prescriptions in a structured format.
 """
-        )
-        
-        self.timing_schedule_prompt = PromptTemplate(
-            input_variables=["prescriptions", "document_text"],
-            template="""Based on the following prescriptions, create a daily medication timing schedule.
+
+TIMING_SCHEDULE_TEMPLATE = """Based on the following prescriptions, create a daily medication timing schedule.
 Group medications by time of day (morning, afternoon, evening, night) and provide specific times.
 
 Prescriptions:
@@ -67,11 +87,8 @@ Document context:
 
 Create a detailed timing schedule.
 """
-        )
-        
-        self.suggestions_prompt = PromptTemplate(
-            input_variables=["document_text", "medications"],
-            template="""Based on the medical document and medications, suggest:
+
+SUGGESTIONS_TEMPLATE = """Based on the medical document and medications, suggest:
 1. Which medical specialists the patient should consult
 2. Any hospital visits or tests needed
 3. Priority level for each suggestion
@@ -84,11 +101,8 @@ Medications:
 
 Provide doctor and hospital suggestions.
 """
-        )
-        
-        self.insights_prompt = PromptTemplate(
-            input_variables=["document_text", "medications", "interactions"],
-            template="""Analyze the medical document for red flags and important insights:
+
+INSIGHTS_TEMPLATE = """Analyze the medical document for red flags and important insights:
 - Drug interactions
 - Contraindications
 - Urgency indicators
@@ -106,101 +120,292 @@ Known interactions:
 
 Identify all red flags and provide recommendations.
 """
-        )
+
+
+def _summarize_stage(agent: MedicalAnalysisAgent, prescriptions: List[PrescriptionRecord]):
+    return summarize_prescriptions(prescriptions)
+
+
+DEFAULT_STAGES = (
+    Stage("medications", "_extract_medications_from_text", ("document",)),
+    Stage(
+        "prescriptions", "_parse_prescription_details", ("document", "medications"),
+        async_func="_parse_prescription_details_async"
+    ),
+    Stage(SECTION_PRESCRIPTIONS, _summarize_stage, ("prescriptions",)),
+    Stage(SECTION_TIMING, "_generate_timing_schedule", ("prescriptions",)),
+    Stage(
+        SECTION_SUGGESTIONS, "_generate_suggestions", ("document", "medications"),
+        async_func="_generate_suggestions_async"
+    ),
+    Stage(
+        SECTION_INSIGHTS, "_generate_insights", ("document", "medications"),
+        async_func="_generate_insights_async"
+    ),
+)
+
+_ASYNC_EXECUTOR = AsyncStageExecutor()
+
+
+def _document_size(parsed: ParsedDocument) -> int:
+    return len(parsed.text)
+
+
+def _medication_count(result: Union[AnalysisResult, PartialAnalysisResult]) -> int:
+    summary = result.prescription_summary
+    return summary.total_medications if summary is not None else 0
+
+
+def _slot_count(timing: TimingScheduleRecord) -> int:
+    return len(timing.schedule)
+
+
+def _suggestion_count(suggestions: SuggestionsRecord) -> int:
+    return len(suggestions.doctors) + len(suggestions.hospitals)
+
+
+def _red_flag_count(insights: InsightsRecord) -> int:
+    return len(insights.red_flags)
+
+
+class MedicalAnalysisAgent:
+    """
+    Medical document analysis agent using LangChain for workflow orchestration.
+    Analyzes parsed medical documents and generates structured insights.
+    """
     
-    def _extract_medications_from_text(self, text: str) -> List[str]:
+    def __init__(
+        self,
+        knowledge_base_client: MedicalKnowledgeBaseClient = None,
+        async_knowledge_base_client: AsyncMedicalKnowledgeBaseClient = None,
+        result_cache=None,
+        instrumentation: Optional[Instrumentation] = None,
+        pipeline: Optional[AnalysisPipeline] = None,
+        executor: Optional[SequentialExecutor] = None
+    ):
         """
-        Extract medication names from document text using pattern matching.
+        Initialize the medical analysis agent.
         
         Args:
-            text: Document text
-            
-        Returns:
-            List of medication names
+            knowledge_base_client: Optional medical knowledge base client for cross-references
+            async_knowledge_base_client: Optional async client used by analyze_document_async;
+                defaults to serving lookups from ``knowledge_base_client``
+            result_cache: Optional result cache (InMemoryResultCache or
+                SQLiteResultCache) consulted before running the pipeline
+            instrumentation: Optional Instrumentation (e.g. a Tracer) timing
+                each stage and knowledge base call; disabled by default
+            pipeline: Optional stage graph; defaults to a private copy of DEFAULT_STAGES
+            executor: Optional stage executor for analyze_document, e.g. a
+                ThreadPoolStageExecutor; defaults to running stages sequentially
         """
-        medications = []
-        text_lower = text.lower()
+        self.instrumentation = instrumentation or NO_INSTRUMENTATION
+        self.kb_client = knowledge_base_client or MedicalKnowledgeBaseClient()
+        self._async_kb_client = async_knowledge_base_client
+        if self.instrumentation.enabled:
+            self.kb_client = InstrumentedKnowledgeBase(self.kb_client, self.instrumentation)
+        self._remote_scanner: Optional[Tuple[str, MedicationScanner]] = None
+        self._remote_scanner_lock = threading.Lock()
+        self.result_cache = result_cache
+        self.pipeline = pipeline or AnalysisPipeline(DEFAULT_STAGES)
+        self.executor = executor or SEQUENTIAL_EXECUTOR
+    
+    def register_stage(self, stage: Stage, replace: bool = False):
+        """
+        Add a stage to this agent's pipeline.
         
-        common_medications = [
-            "amoxicillin", "metformin", "lisinopril", "atorvastatin",
-            "aspirin", "ibuprofen", "acetaminophen", "omeprazole",
-            "levothyroxine", "amlodipine", "losartan", "gabapentin"
-        ]
+        Its output is available from run_pipeline. Replacing one of the
+        section stages (``prescription_summary``, ``medication_timing``,
+        ``suggestions``, ``additional_insights``) changes the AnalysisResult.
         
-        for med in common_medications:
-            if med in text_lower:
-                medications.append(med.capitalize())
+        Args:
+            stage: Stage to add
+            replace: Allow replacing a stage of the same name
+        """
+        self.pipeline.register_stage(stage, replace=replace)
+    
+    @property
+    def medication_scanner(self) -> MedicationScanner:
+        """
+        Scanner for the knowledge base lexicon.
         
-        medication_patterns = [
-            r'\b([A-Z][a-z]+(?:ol|in|ide|one|ate|mine|pril|sartan|statin))\b',
-            r'(?:^|\n|\. )([A-Z][a-z]{4,})\s+\d+\s*mg',
-        ]
+        Comes from the knowledge base bundle in use, so it follows bundle
+        swaps. A remote knowledge base's lexicon is fetched on first use and
+        again whenever its ``data_version`` changes.
+        """
+        kb = self.kb_client
+        if kb.transport is None:
+            return kb.bundle.medication_scanner
+        version = kb.data_version
+        remote = self._remote_scanner
+        if remote is None or remote[0] != version:
+            with self._remote_scanner_lock:
+                remote = self._remote_scanner
+                if remote is None or remote[0] != version:
+                    remote = self._remote_scanner = (version, MedicationScanner(kb.get_medication_lexicon()))
+        return remote[1]
+    
+    @cached_property
+    def async_kb_client(self) -> AsyncMedicalKnowledgeBaseClient:
+        """Async client for analyze_document_async, created (with asyncio) on first use."""
+        client = self._async_kb_client
+        if client is None:
+            from backend.app.services.async_knowledge_base_client import AsyncMedicalKnowledgeBaseClient
+            
+            client = AsyncMedicalKnowledgeBaseClient(fallback_client=getattr(self.kb_client, "wrapped", self.kb_client))
+        if self.instrumentation.enabled:
+            client = InstrumentedKnowledgeBase(client, self.instrumentation)
+        return client
+    
+    @cached_property
+    def medication_loader(self) -> MedicationInfoLoader:
+        """Loader coalescing async medication lookups into bulk requests, per pinned bundle."""
+        from backend.app.services.kb_loader import MedicationInfoLoader
+        
+        return MedicationInfoLoader(self.async_kb_client, batch_key=lambda: self.kb_client.bundle.version)
+    
+    def _build_prompt(self, template: str, input_variables: List[str]):
+        """Create a PromptTemplate; langchain_core is imported on first use."""
+        from langchain_core.prompts import PromptTemplate
+        
+        return PromptTemplate(input_variables=input_variables, template=template)
+    
+    @cached_property
+    def prescription_extraction_prompt(self):
+        """Prompt for extracting prescriptions with an LLM."""
+        return self._build_prompt(PRESCRIPTION_EXTRACTION_TEMPLATE, ["document_text"])
+    
+    @cached_property
+    def timing_schedule_prompt(self):
+        """Prompt for building a timing schedule with an LLM."""
+        return self._build_prompt(TIMING_SCHEDULE_TEMPLATE, ["prescriptions", "document_text"])
+    
+    @cached_property
+    def suggestions_prompt(self):
+        """Prompt for doctor and hospital suggestions with an LLM."""
+        return self._build_prompt(SUGGESTIONS_TEMPLATE, ["document_text", "medications"])
+    
+    @cached_property
+    def insights_prompt(self):
+        """Prompt for red flags and insights with an LLM."""
+        return self._build_prompt(INSIGHTS_TEMPLATE, ["document_text", "medications", "interactions"])
+    
+    @traced_stage("extract_medications")
+    def _extract_medications_from_text(self, document: DocumentLike) -> List[str]:
+        """
+        Extract medication names from document text.
+        
+        Knowledge base lexicon names are found in a single pass by the
+        medication scanner, then suffix patterns pick up names outside it.
         
-        for pattern in medication_patterns:
-            matches = re.findall(pattern, text)
-            for match in matches:
-                if match not in medications:
+        Args:
+            document: DocumentContext or document text
+            
+        Returns:
+            List of medication names
+        """
+        document = DocumentContext.of(document)
+        medications = []
+        seen = set()
+        
+        for match in self.medication_scanner.find_all(document):
+            name = match.name.capitalize()
+            if name not in seen:
+                seen.add(name)
+                medications.append(name)
+        
+        for pattern in MEDICATION_PATTERNS:
+            for match in pattern.findall(document.text):
+                if match not in seen:
+                    seen.add(match)
                     medications.append(match)
         
         return medications if medications else ["Unknown Medication"]
     
-    def _parse_prescription_details(self, text: str, medications: List[str]) -> List[PrescriptionItem]:
+    @traced_stage("parse_prescription_details")
+    def _parse_prescription_details(self, document: DocumentLike, medications: List[str]) -> List[PrescriptionRecord]:
         """
         Parse detailed prescription information from text.
         
+        Dosage, frequency and duration come from a single span-indexed pass
+        and are bound to the nearest tokens in the same line or sentence.
+        Knowledge base entries are fetched with one bulk request.
+        
         Args:
-            text: Document text
+            document: DocumentContext or document text
             medications: List of medication names
             
         Returns:
-            List of PrescriptionItem objects
+            List of PrescriptionRecord objects
         """
-        prescriptions = []
+        details = parse_prescription_details(document, medications)
+        infos = self.kb_client.get_medication_info_many([item.medication_name for item in details])
+        med_infos = [infos.get(item.medication_name) for item in details]
         
-        for med in medications:
-            dosage_match = re.search(
-                rf'{med}[:\s]+(\d+\s*(?:mg|g|ml|mcg))',
-                text,
-                re.IGNORECASE
-            )
-            dosage = dosage_match.group(1) if dosage_match else "As prescribed"
-            
-            frequency_patterns = [
-                r'(\d+\s*(?:times?|x)\s*(?:daily|per day|a day))',
-                r'(once|twice|three times)\s*(?:daily|per day|a day)',
-                r'(every\s+\d+\s+hours)',
-            ]
-            frequency = "As directed"
-            for pattern in frequency_patterns:
-                freq_match = re.search(pattern, text, re.IGNORECASE)
-                if freq_match:
-                    frequency = freq_match.group(1)
-                    break
+        return self._build_prescription_items(details, med_infos)
+    
+    @traced_stage("parse_prescription_details")
+    async def _parse_prescription_details_async(
+        self,
+        document: DocumentLike,
+        medications: List[str]
+    ) -> List[PrescriptionRecord]:
+        """
+        Async variant of _parse_prescription_details.
+        
+        Lookups go through the agent's MedicationInfoLoader, so they are
+        coalesced with those of concurrent analyses into bulk requests.
+        
+        Args:
+            document: DocumentContext or document text
+            medications: List of medication names
             
-            duration_match = re.search(
-                r'for\s+(\d+\s+(?:days?|weeks?|months?))',
-                text,
-                re.IGNORECASE
-            )
-            duration = duration_match.group(1) if duration_match else None
+        Returns:
+            List of PrescriptionRecord objects
+        """
+        import asyncio
+        
+        details = parse_prescription_details(document, medications)
+        med_infos = await asyncio.gather(*(
+            self.medication_loader.load(item.medication_name) for item in details
+        ))
+        
+        return self._build_prescription_items(details, med_infos)
+    
+    def _build_prescription_items(
+        self,
+        details: List[PrescriptionDetails],
+        med_infos: List[Optional[Dict]]
+    ) -> List[PrescriptionRecord]:
+        """
+        Combine parsed prescription details with knowledge base precautions.
+        
+        Args:
+            details: Parsed details, one per medication
+            med_infos: Knowledge base entries aligned with ``details``
             
-            med_info = self.kb_client.get_medication_info(med)
+        Returns:
+            List of PrescriptionRecord objects
+        """
+        prescriptions = []
+        
+        for item, med_info in zip(details, med_infos):
             notes = ", ".join(med_info.get("precautions", [])) if med_info else None
             
-            prescriptions.append(PrescriptionItem(
-                medication_name=med,
-                dosage=dosage,
-                frequency=frequency,
-                duration=duration,
+            prescriptions.append(PrescriptionRecord(
+                medication_name=item.medication_name,
+                dosage=item.dosage,
+                frequency=item.frequency,
+                duration=item.duration,
                 notes=notes
             ))
         
         return prescriptions
     
+    @traced_stage("generate_timing_schedule", count=_slot_count)
     def _generate_timing_schedule(
         self,
-        prescriptions: List[PrescriptionItem]
-    ) -> MedicationTimingSchedule:
+        prescriptions: List[PrescriptionRecord]
+    ) -> TimingScheduleRecord:
         """
         Generate a medication timing schedule from prescriptions.
         
@@ -208,7 +413,7 @@ Identify all red flags and provide recommendations.
             prescriptions: List of prescription items
             
         Returns:
-            MedicationTimingSchedule object
+            TimingScheduleRecord
         """
         schedule_slots = {}
         
@@ -247,7 +452,7 @@ Identify all red flags and provide recommendations.
                 schedule_slots[time].append(med_label)
         
         schedule = [
-            MedicationTimingSlot(
+            TimingSlotRecord(
                 time=time,
                 medications=meds,
                 instructions="Take with water" if "AM" in time else "Take before bedtime" if "PM" in time else None
@@ -255,32 +460,77 @@ Identify all red flags and provide recommendations.
             for time, meds in sorted(schedule_slots.items())
         ]
         
-        return MedicationTimingSchedule(
+        return TimingScheduleRecord(
             schedule=schedule,
             general_instructions="Follow prescribed schedule consistently. Take with food unless otherwise directed."
         )
     
+    @traced_stage("generate_suggestions", count=_suggestion_count)
     def _generate_suggestions(
         self,
-        text: str,
+        document: DocumentLike,
         medications: List[str]
-    ) -> HospitalDoctorSuggestions:
+    ) -> SuggestionsRecord:
         """
         Generate hospital and doctor suggestions.
         
         Args:
-            text: Document text
+            document: DocumentContext or document text
             medications: List of medications
             
         Returns:
-            HospitalDoctorSuggestions object
+            SuggestionsRecord
         """
+        document = DocumentContext.of(document)
         specialty_recommendations = self.kb_client.get_specialty_recommendations(
-            medications + [text]
+            medications + [document]
         )
         
+        return self._build_suggestions(document, specialty_recommendations)
+    
+    @traced_stage("generate_suggestions", count=_suggestion_count)
+    async def _generate_suggestions_async(
+        self,
+        document: DocumentLike,
+        medications: List[str]
+    ) -> SuggestionsRecord:
+        """
+        Async variant of _generate_suggestions.
+        
+        Args:
+            document: DocumentContext or document text
+            medications: List of medications
+            
+        Returns:
+            SuggestionsRecord
+        """
+        document = DocumentContext.of(document)
+        specialty_recommendations = await self.async_kb_client.get_specialty_recommendations(
+            medications + [document]
+        )
+        
+        return self._build_suggestions(document, specialty_recommendations)
+    
+    def _build_suggestions(
+        self,
+        document: DocumentLike,
+        specialty_recommendations: List[Dict]
+    ) -> SuggestionsRecord:
+        """
+        Build doctor and facility suggestions from specialty recommendations.
+        
+        Facilities come from the ``facilities`` rules of the knowledge base
+        client's rule table.
+        
+        Args:
+            document: DocumentContext or document text
+            specialty_recommendations: Knowledge base specialty recommendations
+            
+        Returns:
+            SuggestionsRecord
+        """
         doctors = [
-            DoctorSuggestion(
+            DoctorRecord(
                 specialty=rec["specialty"],
                 reason=rec["reason"],
                 priority=rec["priority"]
@@ -288,52 +538,86 @@ Identify all red flags and provide recommendations.
             for rec in specialty_recommendations
         ]
         
-        hospitals = []
-        text_lower = text.lower()
-        
-        if any(word in text_lower for word in ["test", "lab", "blood work", "screening"]):
-            hospitals.append(HospitalSuggestion(
-                facility_type="Laboratory",
-                purpose="Diagnostic tests and blood work",
-                urgency="routine"
-            ))
-        
-        if any(word in text_lower for word in ["x-ray", "mri", "ct scan", "imaging"]):
-            hospitals.append(HospitalSuggestion(
-                facility_type="Imaging Center",
-                purpose="Medical imaging and diagnostics",
-                urgency="soon"
-            ))
-        
-        if any(word in text_lower for word in ["emergency", "urgent", "immediate"]):
-            hospitals.append(HospitalSuggestion(
-                facility_type="Emergency Department",
-                purpose="Urgent medical attention",
-                urgency="urgent"
-            ))
+        hospitals = [
+            HospitalRecord(
+                facility_type=rule["facility_type"],
+                purpose=rule["purpose"],
+                urgency=rule["urgency"]
+            )
+            for rule in self.kb_client.rule_engine.evaluate(RULE_FACILITIES, document)
+        ]
         
-        return HospitalDoctorSuggestions(doctors=doctors, hospitals=hospitals)
+        return SuggestionsRecord(doctors=doctors, hospitals=hospitals)
     
+    @traced_stage("generate_insights", count=_red_flag_count)
     def _generate_insights(
         self,
-        text: str,
+        document: DocumentLike,
         medications: List[str]
-    ) -> AdditionalInsights:
+    ) -> InsightsRecord:
         """
         Generate additional insights and red flags.
         
         Args:
-            text: Document text
+            document: DocumentContext or document text
             medications: List of medications
             
         Returns:
-            AdditionalInsights object
+            InsightsRecord
         """
-        red_flags_data = self.kb_client.identify_red_flags(text, medications)
+        document = DocumentContext.of(document)
+        red_flags_data = self.kb_client.identify_red_flags(document, medications)
         interactions_data = self.kb_client.check_interactions(medications)
         
+        return self._build_insights(document, medications, red_flags_data, interactions_data)
+    
+    @traced_stage("generate_insights", count=_red_flag_count)
+    async def _generate_insights_async(
+        self,
+        document: DocumentLike,
+        medications: List[str]
+    ) -> InsightsRecord:
+        """
+        Async variant of _generate_insights; both KB calls run concurrently.
+        
+        Args:
+            document: DocumentContext or document text
+            medications: List of medications
+            
+        Returns:
+            InsightsRecord
+        """
+        import asyncio
+        
+        document = DocumentContext.of(document)
+        red_flags_data, interactions_data = await asyncio.gather(
+            self.async_kb_client.identify_red_flags(document, medications),
+            self.async_kb_client.check_interactions(medications)
+        )
+        
+        return self._build_insights(document, medications, red_flags_data, interactions_data)
+    
+    def _build_insights(
+        self,
+        document: DocumentLike,
+        medications: List[str],
+        red_flags_data: List[Dict],
+        interactions_data: List[Dict]
+    ) -> InsightsRecord:
+        """
+        Build red-flag insights from knowledge base findings.
+        
+        Args:
+            document: DocumentContext or document text
+            medications: List of medications
+            red_flags_data: Knowledge base red flags
+            interactions_data: Knowledge base drug interactions
+            
+        Returns:
+            InsightsRecord
+        """
         red_flags = [
-            RedFlagInsight(
+            RedFlagRecord(
                 category=flag["category"],
                 description=flag["description"],
                 severity=flag["severity"],
@@ -343,7 +627,7 @@ Identify all red flags and provide recommendations.
         ]
         
         for interaction in interactions_data:
-            red_flags.append(RedFlagInsight(
+            red_flags.append(RedFlagRecord(
                 category="Drug Interaction",
                 description=f"Interaction between {', '.join(interaction['medications'])}: {interaction['description']}",
                 severity=interaction["severity"],
@@ -353,59 +637,346 @@ Identify all red flags and provide recommendations.
         general_advice_parts = []
         if medications:
             general_advice_parts.append("Store all medications in a cool, dry place away from children.")
-        if any("antibiotic" in text.lower() for _ in [1]):
+        if "antibiotic" in DocumentContext.of(document).lowered:
             general_advice_parts.append("Complete the full course of antibiotics even if symptoms improve.")
         general_advice_parts.append("Keep a list of all medications and share with all healthcare providers.")
         
-        return AdditionalInsights(
+        return InsightsRecord(
             red_flags=red_flags,
             general_advice=" ".join(general_advice_parts) if general_advice_parts else None
         )
     
-    def analyze_document(self, parsed: ParsedDocument) -> AnalysisResult:
+    def result_cache_key(self, text: str) -> str:
+        """
+        Cache key for a normalized document text.
+        
+        Combines the text with the knowledge base data version and the
+        extraction/rules code version, so the key changes whenever either does.
+        
+        Args:
+            text: Normalized document text
+            
+        Returns:
+            Hex digest cache key
+        """
+        return result_cache_key(text, self.kb_client.data_version)
+    
+    def _lookup_cached_result(self, text: str):
+        """
+        Return ``(key, cached AnalysisResult or None)``; key is None without a cache.
+        
+        A payload that no longer decodes into an AnalysisResult (corrupt, or
+        written by an incompatible schema) is evicted and treated as a miss.
+        """
+        from backend.app.schemas import AnalysisResult
+        
+        if self.result_cache is None:
+            return None, None
+        key = self.result_cache_key(text)
+        payload = self.result_cache.get(key)
+        if payload is None:
+            return key, None
+        try:
+            return key, AnalysisResult.model_validate_json(payload)
+        except ValueError:
+            self.result_cache.delete(key)
+            return key, None
+    
+    def _store_cached_result(self, key: str, result: AnalysisResult):
+        if key is not None:
+            from backend.app.services.serialization import dumps
+            
+            self.result_cache.put(key, dumps(result).decode("utf-8"))
+    
+    def _section_pipeline(self, sections: Optional[Tuple[str, ...]]) -> AnalysisPipeline:
+        """The pipeline pruned to the stages ``sections`` need; the full pipeline for None."""
+        return self.pipeline if sections is None else self.pipeline.subgraph(sections)
+    
+    @staticmethod
+    def _inputs(text: str) -> Dict[str, Any]:
+        """Pipeline inputs: the normalized text and the DocumentContext every stage shares."""
+        return {"text": text, "document": DocumentContext(text)}
+    
+    @staticmethod
+    def _select(result: AnalysisResult, sections: Optional[Tuple[str, ...]]):
+        if sections is None:
+            return result
+        return to_partial_result(
+            {section: getattr(result, section) for section in sections}, result.knowledge_base_version
+        )
+    
+    def _finish_result(self, values: Dict[str, Any], sections: Optional[Tuple[str, ...]], cache_key: Optional[str]):
+        """Build the result from stage outputs, caching complete results."""
+        version = self.kb_client.data_version
+        if sections is not None:
+            return to_partial_result({section: values[section] for section in sections}, version)
+        result = to_analysis_result(
+            AnalysisRecord(**{section: values[section] for section in SECTIONS}, knowledge_base_version=version)
+        )
+        self._store_cached_result(cache_key, result)
+        return result
+    
+    @traced_stage("analyze_document", size=_document_size, count=_medication_count)
+    def analyze_document(
+        self,
+        parsed: ParsedDocument,
+        include: Optional[Iterable[str]] = None,
+        exclude: Optional[Iterable[str]] = None
+    ) -> Union[AnalysisResult, PartialAnalysisResult]:
         """
         Main analysis workflow that processes a parsed medical document.
         
+        Line endings are normalized first. When a result cache is configured,
+        a previous result for the same text, knowledge base version and rules
+        version is returned without re-running the stages. The stages of
+        ``self.pipeline`` run on ``self.executor``, share one DocumentContext
+        (so the text is lowercased, split and rule-scanned once) and exchange
+        lightweight records; the pydantic result is built once at the end.
+        
+        Passing ``include`` or ``exclude`` selects sections by AnalysisResult
+        field name. Only the stages the selected sections require run, e.g.
+        ``include=["additional_insights"]`` skips prescription parsing and
+        the timing schedule. Selective results are projected from a cached
+        full result when there is one but are never cached themselves.
+        
+        The whole analysis runs against the knowledge base bundle in use when
+        it starts, even if a new bundle is swapped in meanwhile, and the
+        result records that bundle's ``knowledge_base_version``.
+        
         Args:
             parsed: ParsedDocument containing the text and metadata
+            include: Sections to compute; None means every section
+            exclude: Sections to skip
             
         Returns:
-            AnalysisResult with all structured insights
+            AnalysisResult with all structured insights, or a
+            PartialAnalysisResult with unselected sections set to None when
+            ``include`` or ``exclude`` is given
+            
+        Raises:
+            ValueError: If a section name is unknown or no section is selected
         """
-        text = parsed.text
+        sections = select_sections(include, exclude)
+        text = normalize_document_text(parsed.text)
         
-        medications = self._extract_medications_from_text(text)
+        with self.kb_client.pinned():
+            cache_key, cached = self._lookup_cached_result(text)
+            if cached is not None:
+                return self._select(cached, sections)
+            
+            values = self.executor.run(self._section_pipeline(sections), self, self._inputs(text))
+            return self._finish_result(values, sections, cache_key)
+    
+    def run_pipeline(self, parsed: ParsedDocument) -> Dict[str, Any]:
+        """
+        Run every pipeline stage, including registered extra stages.
         
-        prescriptions = self._parse_prescription_details(text, medications)
+        The result cache is not consulted.
         
-        prescription_summary = PrescriptionSummary(
-            items=prescriptions,
-            total_medications=len(prescriptions)
-        )
+        Args:
+            parsed: ParsedDocument containing the text and metadata
+            
+        Returns:
+            Stage outputs by stage name, plus the normalized ``text`` and
+            its ``document`` context
+        """
+        with self.kb_client.pinned():
+            return self.executor.run(self.pipeline, self, self._inputs(normalize_document_text(parsed.text)))
+    
+    def analyze_document_stream(
+        self,
+        parsed: ParsedDocument,
+        include: Optional[Iterable[str]] = None,
+        exclude: Optional[Iterable[str]] = None
+    ) -> Iterator[AnalysisEvent]:
+        """
+        Analyze a document, yielding each section as soon as it is ready.
         
-        medication_timing = self._generate_timing_schedule(prescriptions)
+        Sections arrive in order: prescription summary, timing schedule,
+        suggestions, additional insights. A client can render prescriptions
+        once extraction and parsing finish instead of waiting for every stage.
+        Serialize events with analysis_stream.format_ndjson or format_sse.
+        Every section is computed against the knowledge base bundle in use
+        when the stream starts.
         
-        suggestions = self._generate_suggestions(text, medications)
+        Args:
+            parsed: ParsedDocument containing the text and metadata
+            include: Sections to compute; None means every section
+            exclude: Sections to skip
+            
+        Yields:
+            AnalysisEvent per selected section
+            
+        Raises:
+            ValueError: If a section name is unknown or no section is selected
+        """
+        sections = select_sections(include, exclude)
+        text = normalize_document_text(parsed.text)
+        
+        # The bundle is pinned around each step rather than across yields, so
+        # the pin never leaks into the consumer's code between events.
+        bundle = self.kb_client.bundle
+        with self.kb_client.pinned(bundle):
+            version = self.kb_client.data_version
+            cache_key, cached = self._lookup_cached_result(text)
+        if cached is not None:
+            yield from (event for event in events_from_result(cached) if event.section in (sections or SECTIONS))
+            return
+        
+        events = []
+        steps = SEQUENTIAL_EXECUTOR.iter_run(self._section_pipeline(sections), self, self._inputs(text))
+        while True:
+            with self.kb_client.pinned(bundle):
+                step = next(steps, None)
+            if step is None:
+                break
+            name, output = step
+            if name in (sections or SECTIONS):
+                events.append(self._event(name, output))
+                yield events[-1]
+                
+        if sections is None:
+            self._store_cached_result(cache_key, assemble_result(events, version))
+    
+    @staticmethod
+    def _event(section: str, record) -> AnalysisEvent:
+        return AnalysisEvent(section, section_model(section, record))
+    
+    @traced_stage("analyze_document", size=_document_size, count=_medication_count)
+    async def analyze_document_async(
+        self,
+        parsed: ParsedDocument,
+        include: Optional[Iterable[str]] = None,
+        exclude: Optional[Iterable[str]] = None
+    ) -> Union[AnalysisResult, PartialAnalysisResult]:
+        """
+        Asyncio analysis workflow using the async knowledge base client.
         
-        additional_insights = self._generate_insights(text, medications)
+        Each pipeline stage starts as soon as the stages it requires finish,
+        so per-medication lookups, suggestions and insights overlap and
+        latency is bounded by the slowest knowledge base call rather than
+        their sum. ``include`` and ``exclude`` select sections as in
+        analyze_document.
         
-        return AnalysisResult(
-            prescription_summary=prescription_summary,
-            medication_timing=medication_timing,
-            suggestions=suggestions,
-            additional_insights=additional_insights
-        )
+        Args:
+            parsed: ParsedDocument containing the text and metadata
+            include: Sections to compute; None means every section
+            exclude: Sections to skip
+            
+        Returns:
+            AnalysisResult, or PartialAnalysisResult when sections are selected
+            
+        Raises:
+            ValueError: If a section name is unknown or no section is selected
+        """
+        import asyncio
+        
+        sections = select_sections(include, exclude)
+        text = normalize_document_text(parsed.text)
+        
+        with self.kb_client.pinned():
+            cache_key, cached = self._lookup_cached_result(text)
+            if cached is not None:
+                return self._select(cached, sections)
+            
+            if self.kb_client.transport is not None:
+                # Fetch a stale remote lexicon off the event loop; the stages read the refreshed scanner.
+                await asyncio.get_running_loop().run_in_executor(None, lambda: self.medication_scanner)
+            values = await _ASYNC_EXECUTOR.run(self._section_pipeline(sections), self, self._inputs(text))
+            return self._finish_result(values, sections, cache_key)
+
+
+_shared_agent: Optional[MedicalAnalysisAgent] = None
+_shared_agent_lock = threading.Lock()
+_shared_kb_client: Optional[MedicalKnowledgeBaseClient] = None
+_shared_instrumentation: Optional[Instrumentation] = None
+
+
+def get_agent() -> MedicalAnalysisAgent:
+    """
+    Get the shared agent used by the module-level analyze_document.
+    
+    The agent is created lazily on first use and reused afterwards, so the
+    prompt templates, medication scanner and knowledge base client are built
+    once per process. Creation is guarded by a lock; analysis itself does not
+    mutate the agent and is safe to run from several threads.
+    
+    Returns:
+        The shared MedicalAnalysisAgent
+    """
+    global _shared_agent
+    agent = _shared_agent
+    if agent is None:
+        with _shared_agent_lock:
+            if _shared_agent is None:
+                _shared_agent = MedicalAnalysisAgent(
+                    knowledge_base_client=_shared_kb_client,
+                    instrumentation=_shared_instrumentation
+                )
+            agent = _shared_agent
+    return agent
 
 
-def analyze_document(parsed: ParsedDocument) -> AnalysisResult:
+def configure_agent(
+    knowledge_base_client: Optional[MedicalKnowledgeBaseClient] = None,
+    instrumentation: Optional[Instrumentation] = None
+):
+    """
+    Configure the shared agent; takes effect on the next get_agent() call.
+    
+    Args:
+        knowledge_base_client: Knowledge base client for the shared agent;
+            None restores the default mock-backed client
+        instrumentation: Instrumentation for the shared agent; None disables it
+    """
+    global _shared_agent, _shared_kb_client, _shared_instrumentation
+    with _shared_agent_lock:
+        _shared_kb_client = knowledge_base_client
+        _shared_instrumentation = instrumentation
+        _shared_agent = None
+
+
+def reset_agent():
+    """Discard the shared agent and any configuration applied to it."""
+    configure_agent(None, None)
+
+
+def analyze_document(
+    parsed: ParsedDocument,
+    include: Optional[Iterable[str]] = None,
+    exclude: Optional[Iterable[str]] = None
+) -> Union[AnalysisResult, PartialAnalysisResult]:
     """
     Convenience function to analyze a parsed medical document.
     
+    Uses the shared agent from get_agent().
+    
+    Args:
+        parsed: ParsedDocument containing the text and metadata
+        include: Sections to compute; None means every section
+        exclude: Sections to skip
+        
+    Returns:
+        AnalysisResult with all structured insights, or PartialAnalysisResult
+        when sections are selected
+    """
+    return get_agent().analyze_document(parsed, include=include, exclude=exclude)
+
+
+def analyze_document_stream(
+    parsed: ParsedDocument,
+    include: Optional[Iterable[str]] = None,
+    exclude: Optional[Iterable[str]] = None
+) -> Iterator[AnalysisEvent]:
+    """
+    Streaming variant of analyze_document using the shared agent.
+    
     Args:
         parsed: ParsedDocument containing the text and metadata
+        include: Sections to compute; None means every section
+        exclude: Sections to skip
         
     Returns:
-        AnalysisResult with all structured insights
+        Iterator of AnalysisEvent, one per selected section of the AnalysisResult
     """
-    agent = MedicalAnalysisAgent()
-    return agent.analyze_document(parsed)
+    return get_agent().analyze_document_stream(parsed, include=include, exclude=exclude)
@@ -0,0 +1,114 @@
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from backend.app.services.medication_scanner import normalize_medication_name
+
+
+MATCH_EXACT = "exact"
+MATCH_BRAND = "brand"
+MATCH_ALIAS = "alias"
+MATCH_TOKEN = "token"
+MATCH_PREFIX = "prefix"
+MATCH_NONE = "none"
+
+_AMBIGUOUS = object()
+
+
+class MedicationLookup(NamedTuple):
+    """Result of resolving a medication name against the knowledge base."""
+    
+    key: Optional[str]
+    info: Optional[Dict]
+    match: str
+
+
+class MedicationIndex:
+    """
+    Hash-based lookup index over knowledge base medication entries.
+    
+    Names resolve through exact generic names, then brand names, then
+    aliases, then any single word of a multi-word query, and finally an
+    unambiguous prefix of a known name. Every step is a dictionary probe, so
+    lookups cost O(len(name)) regardless of formulary size.
+    """
+    
+    def __init__(self, medications: Dict[str, Dict], min_prefix: int = 4):
+        """
+        Build the index.
+        
+        Args:
+            medications: Mapping of medication key to knowledge base entry
+                (optionally carrying ``brand_names`` and ``aliases`` lists)
+            min_prefix: Shortest partial name accepted for prefix matches
+        """
+        self.min_prefix = min_prefix
+        self._medications = medications
+        self._exact: Dict[str, str] = {}
+        self._brand: Dict[str, str] = {}
+        self._alias: Dict[str, str] = {}
+        self._prefix: Dict[str, object] = {}
+        
+        for key, data in medications.items():
+            self._exact[normalize_medication_name(key)] = key
+            self._add_prefixes(normalize_medication_name(key), key)
+            for table, names in (
+                (self._brand, data.get("brand_names", ())),
+                (self._alias, data.get("aliases", ())),
+            ):
+                for name in names:
+                    normalized = normalize_medication_name(name)
+                    table.setdefault(normalized, key)
+                    self._add_prefixes(normalized, key)
+    
+    def __len__(self) -> int:
+        return len(self._medications)
+    
+    def _add_prefixes(self, name: str, key: str):
+        for length in range(self.min_prefix, len(name) + 1):
+            prefix = name[:length]
+            existing = self._prefix.get(prefix)
+            if existing is None:
+                self._prefix[prefix] = key
+            elif existing != key:
+                self._prefix[prefix] = _AMBIGUOUS
+    
+    def names(self) -> Iterable[str]:
+        """All indexed names: generic keys, brand names and aliases."""
+        return list(self._exact) + list(self._brand) + list(self._alias)
+    
+    def _resolve(self, name: str) -> Tuple[Optional[str], str]:
+        for table, match in (
+            (self._exact, MATCH_EXACT),
+            (self._brand, MATCH_BRAND),
+            (self._alias, MATCH_ALIAS),
+        ):
+            key = table.get(name)
+            if key is not None:
+                return key, match
+                
+        tokens = name.split()
+        if len(tokens) > 1:
+            for token in tokens:
+                key = self._exact.get(token) or self._brand.get(token) or self._alias.get(token)
+                if key is not None:
+                    return key, MATCH_TOKEN
+                    
+        key = self._prefix.get(name) if len(name) >= self.min_prefix else None
+        if key is not None and key is not _AMBIGUOUS:
+            return key, MATCH_PREFIX
+            
+        return None, MATCH_NONE
+    
+    def lookup(self, medication_name: str) -> MedicationLookup:
+        """
+        Resolve a medication name.
+        
+        Args:
+            medication_name: Name as written in the document
+            
+        Returns:
+            MedicationLookup with the matched key, its entry and the match
+            quality (``exact``, ``brand``, ``alias``, ``token``, ``prefix``
+            or ``none``)
+        """
+        key, match = self._resolve(normalize_medication_name(medication_name))
+        return MedicationLookup(key, self._medications.get(key) if key else None, match)
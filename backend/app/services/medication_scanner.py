@@ -0,0 +1,158 @@
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+from backend.app.services.document_context import DocumentContext, DocumentLike, fold_text
+
+
+def normalize_medication_name(name: str) -> str:
+    """Normalize a medication name for matching (lowercase, single spaces)."""
+    return " ".join(name.lower().split())
+
+
+class MedicationMatch(NamedTuple):
+    """A single medication mention found in a document."""
+    
+    start: int
+    end: int
+    name: str
+
+
+class MedicationScanner:
+    """
+    Multi-pattern medication scanner built on an Aho-Corasick automaton.
+    
+    The automaton is compiled once from a medication lexicon and then finds
+    every mention in a single linear pass over the document, independent of
+    how many names the lexicon contains.
+    """
+    
+    def __init__(self, names: Iterable[str], word_boundaries: bool = True):
+        """
+        Build the scanner automaton.
+        
+        Args:
+            names: Medication names (any case); duplicates are ignored
+            word_boundaries: Only report matches not embedded in a longer word
+        """
+        self.word_boundaries = word_boundaries
+        self._names: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._outputs: List[Tuple[Tuple[int, int], ...]] = [()]
+        self._alphabet = set()
+        
+        seen = set()
+        for name in names:
+            normalized = normalize_medication_name(name)
+            if not normalized or normalized in seen:
+                continue
+            seen.add(normalized)
+            self._add(normalized, len(self._names))
+            self._names.append(normalized)
+            
+        self._build_failure_links()
+    
+    def __len__(self) -> int:
+        return len(self._names)
+    
+    @property
+    def names(self) -> List[str]:
+        """Normalized lexicon names in insertion order."""
+        return list(self._names)
+    
+    def _add(self, pattern: str, pattern_id: int):
+        """Insert a normalized pattern into the trie."""
+        state = 0
+        for char in pattern:
+            self._alphabet.add(char)
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._outputs.append(())
+            state = next_state
+        self._outputs[state] = ((len(pattern), pattern_id),)
+    
+    def _build_failure_links(self):
+        """Compute failure links and merge dictionary outputs breadth-first."""
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._outputs[next_state] += self._outputs[self._fail[next_state]]
+    
+    _fold = staticmethod(fold_text)
+    
+    def _is_boundary(self, text: str, index: int, inside: int) -> bool:
+        """
+        Whether ``text[index]``, next to the matched ``text[inside]``, ends the word.
+        
+        A change between letters and digits counts as a boundary, so dosages
+        glued to a name ("Metformin500mg") do not hide it.
+        """
+        if index < 0 or index >= len(text):
+            return True
+        char = text[index]
+        return not char.isalnum() or char.isdigit() != text[inside].isdigit()
+    
+    def find_all(self, document: DocumentLike) -> List[MedicationMatch]:
+        """
+        Find all medication mentions in a document.
+        
+        Overlapping candidates are resolved leftmost-longest, so "metformin er"
+        wins over "metformin" when both are in the lexicon.
+        
+        Args:
+            document: Document text or DocumentContext, whose lowercase view is reused
+            
+        Returns:
+            Non-overlapping matches ordered by position
+        """
+        if not self._names:
+            return []
+            
+        folded = document.folded if isinstance(document, DocumentContext) else fold_text(document)
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        alphabet = self._alphabet
+        candidates = []
+        state = 0
+        
+        for index, char in enumerate(folded):
+            if char not in alphabet:
+                state = 0
+                continue
+            while True:
+                next_state = goto[state].get(char)
+                if next_state is not None:
+                    state = next_state
+                    break
+                if state == 0:
+                    break
+                state = fail[state]
+            for length, pattern_id in outputs[state]:
+                start = index - length + 1
+                if self.word_boundaries and not (
+                    self._is_boundary(folded, start - 1, start) and self._is_boundary(folded, index + 1, index)
+                ):
+                    continue
+                candidates.append((start, -length, pattern_id))
+                
+        matches = []
+        last_end = 0
+        for start, negative_length, pattern_id in sorted(candidates):
+            if start < last_end:
+                continue
+            last_end = start - negative_length
+            matches.append(MedicationMatch(start, last_end, self._names[pattern_id]))
+            
+        return matches
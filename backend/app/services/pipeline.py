@@ -0,0 +1,264 @@
+from functools import partial
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+
+StageFunction = Union[str, Callable[..., Any]]
+
+
+class Stage(NamedTuple):
+    """
+    One step of the analysis pipeline.
+    
+    ``func`` is either the name of an agent method, called with the values
+    of ``requires`` in order, or a callable taking the agent followed by
+    those values. The stage's output is stored under ``name`` for the
+    stages that require it. ``async_func`` is an optional coroutine variant
+    used by the asyncio executor.
+    """
+    
+    name: str
+    func: StageFunction
+    requires: Tuple[str, ...] = ()
+    async_func: Optional[StageFunction] = None
+
+
+def _bind(func: StageFunction, agent) -> Callable[..., Any]:
+    return getattr(agent, func) if isinstance(func, str) else partial(func, agent)
+
+
+class AnalysisPipeline:
+    """
+    Declared dependency graph of analysis stages.
+    
+    Stages run in a topological order that follows registration order where
+    the dependencies allow, so a sequential run is deterministic. Executors
+    may run stages whose requirements are satisfied concurrently.
+    """
+    
+    def __init__(self, stages: Iterable[Stage] = (), inputs: Tuple[str, ...] = ("text", "document")):
+        """
+        Args:
+            stages: Initial stages, in registration order
+            inputs: Names of the values supplied by the caller of ``run``
+        """
+        self.inputs = tuple(inputs)
+        self._stages: Dict[str, Stage] = {}
+        self._order: Optional[List[Stage]] = None
+        self._subgraphs: Dict[FrozenSet[str], AnalysisPipeline] = {}
+        for stage in stages:
+            self.register_stage(stage)
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self._stages
+    
+    def __getitem__(self, name: str) -> Stage:
+        return self._stages[name]
+    
+    @property
+    def stages(self) -> List[Stage]:
+        """Stages in registration order."""
+        return list(self._stages.values())
+    
+    def copy(self) -> "AnalysisPipeline":
+        return AnalysisPipeline(self._stages.values(), self.inputs)
+    
+    def register_stage(self, stage: Stage, replace: bool = False):
+        """
+        Add a stage to the graph.
+        
+        Args:
+            stage: Stage to add
+            replace: Allow replacing an existing stage of the same name
+            
+        Raises:
+            ValueError: If the name is taken (and ``replace`` is false) or is a pipeline input
+        """
+        if stage.name in self.inputs:
+            raise ValueError(f"Stage name {stage.name!r} is a pipeline input")
+        if stage.name in self._stages and not replace:
+            raise ValueError(f"Stage {stage.name!r} is already registered")
+        self._stages[stage.name] = stage
+        self._order = None
+        self._subgraphs = {}
+    
+    def subgraph(self, targets: Iterable[str]) -> "AnalysisPipeline":
+        """
+        The smallest pipeline that produces ``targets``.
+        
+        Keeps the target stages and every stage they require, directly or
+        transitively, in registration order. Subgraphs are cached per target
+        set until the next register_stage call.
+        
+        Args:
+            targets: Names of the stages whose outputs are needed
+            
+        Returns:
+            AnalysisPipeline with the same inputs
+            
+        Raises:
+            ValueError: If a target or requirement is unknown
+        """
+        key = frozenset(targets)
+        pipeline = self._subgraphs.get(key)
+        if pipeline is not None:
+            return pipeline
+        needed = set()
+        pending = list(key)
+        while pending:
+            name = pending.pop()
+            if name in needed or name in self.inputs:
+                continue
+            if name not in self._stages:
+                raise ValueError(f"Unknown stage {name!r}")
+            needed.add(name)
+            pending.extend(self._stages[name].requires)
+        pipeline = AnalysisPipeline([stage for stage in self._stages.values() if stage.name in needed], self.inputs)
+        self._subgraphs[key] = pipeline
+        return pipeline
+    
+    def order(self) -> List[Stage]:
+        """
+        Stages in dependency order.
+        
+        Returns:
+            Every stage after the stages it requires
+            
+        Raises:
+            ValueError: If a requirement is unknown or the stages form a cycle
+        """
+        if self._order is not None:
+            return self._order
+        available = set(self.inputs)
+        for stage in self._stages.values():
+            missing = [name for name in stage.requires if name not in self._stages and name not in available]
+            if missing:
+                raise ValueError(f"Stage {stage.name!r} requires unknown values: {', '.join(missing)}")
+                
+        order: List[Stage] = []
+        remaining = list(self._stages.values())
+        while remaining:
+            ready = next((stage for stage in remaining if available.issuperset(stage.requires)), None)
+            if ready is None:
+                raise ValueError(f"Stages form a cycle: {', '.join(stage.name for stage in remaining)}")
+            remaining.remove(ready)
+            available.add(ready.name)
+            order.append(ready)
+        self._order = order
+        return order
+
+
+class SequentialExecutor:
+    """Run stages one after another in the calling thread."""
+    
+    def iter_run(self, pipeline: AnalysisPipeline, agent, inputs: Dict[str, Any]) -> Iterator[Tuple[str, Any]]:
+        """
+        Run the pipeline lazily, yielding ``(stage name, output)`` as each stage finishes.
+        
+        A stage only runs once the consumer asks for the next output.
+        """
+        values = dict(inputs)
+        for stage in pipeline.order():
+            values[stage.name] = _bind(stage.func, agent)(*[values[name] for name in stage.requires])
+            yield stage.name, values[stage.name]
+    
+    def run(self, pipeline: AnalysisPipeline, agent, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run every stage.
+        
+        Args:
+            pipeline: Stage graph
+            agent: Agent passed to (or owning) the stage functions
+            inputs: Values for ``pipeline.inputs``
+            
+        Returns:
+            Inputs and stage outputs by name
+        """
+        values = dict(inputs)
+        values.update(self.iter_run(pipeline, agent, inputs))
+        return values
+
+
+class ThreadPoolStageExecutor(SequentialExecutor):
+    """
+    Run independent stages concurrently on a thread pool.
+    
+    Useful when stages wait on knowledge base I/O. A stage that is the only
+    one ready runs in the calling thread, so a linear chain costs no thread
+    hand-offs. Stages run in a copy of the caller's context, so spans
+    recorded in worker threads keep their parent.
+    """
+    
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        Args:
+            max_workers: Pool size; defaults to the ThreadPoolExecutor default
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis-stage")
+    
+    def run(self, pipeline: AnalysisPipeline, agent, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        from concurrent.futures import FIRST_COMPLETED, wait
+        from contextvars import copy_context
+        
+        values = dict(inputs)
+        pending = list(pipeline.order())
+        running = {}
+        while pending or running:
+            ready = [stage for stage in pending if all(name in values for name in stage.requires)]
+            for stage in ready:
+                pending.remove(stage)
+            if len(ready) == 1 and not running:
+                stage = ready[0]
+                values[stage.name] = _bind(stage.func, agent)(*[values[name] for name in stage.requires])
+                continue
+            for stage in ready:
+                args = [values[name] for name in stage.requires]
+                running[self.pool.submit(copy_context().run, _bind(stage.func, agent), *args)] = stage.name
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                values[running.pop(future)] = future.result()
+        return values
+    
+    def shutdown(self):
+        self.pool.shutdown()
+
+
+class AsyncStageExecutor:
+    """
+    Run stages as tasks on the running event loop.
+    
+    Each stage starts as soon as the stages it requires finish. Stages with
+    an ``async_func`` await it; other stages run inline on the loop.
+    """
+    
+    async def run(self, pipeline: AnalysisPipeline, agent, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        import asyncio
+        
+        async def run_stage(stage: Stage, requirements: List[asyncio.Future]):
+            args = [await requirement for requirement in requirements]
+            if stage.async_func is not None:
+                return await _bind(stage.async_func, agent)(*args)
+            return _bind(stage.func, agent)(*args)
+            
+        loop = asyncio.get_running_loop()
+        futures: Dict[str, asyncio.Future] = {}
+        for name, value in inputs.items():
+            futures[name] = loop.create_future()
+            futures[name].set_result(value)
+        for stage in pipeline.order():
+            futures[stage.name] = asyncio.ensure_future(
+                run_stage(stage, [futures[name] for name in stage.requires])
+            )
+        
+        tasks = [futures[stage.name] for stage in pipeline.order()]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        return {name: future.result() for name, future in futures.items()}
+
+
+SEQUENTIAL_EXECUTOR = SequentialExecutor()
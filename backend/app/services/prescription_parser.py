@@ -0,0 +1,211 @@
+from typing import Dict, List, NamedTuple, Optional, Set
+import re
+
+from backend.app.services.document_context import DocumentContext, DocumentLike
+from backend.app.services.medication_scanner import MedicationScanner, normalize_medication_name
+
+
+DEFAULT_DOSAGE = "As prescribed"
+DEFAULT_FREQUENCY = "As directed"
+
+ATTRIBUTE_PATTERN = re.compile(
+    r'(?P<dosage>\d+[ \t]*(?:mg|g|ml|mcg)(?![a-z]))'
+    r'|(?P<frequency>\d+[ \t]*(?:times?|x)[ \t]*(?:daily|per[ \t]day|a[ \t]day))'
+    r'|(?P<frequency_word>once|twice|three[ \t]times)[ \t]*(?:daily|per[ \t]day|a[ \t]day)'
+    r'|(?P<frequency_interval>every[ \t]+\d+[ \t]+hours)'
+    r'|for[ \t]+(?P<duration>\d+[ \t]+(?:days?|weeks?|months?))',
+    re.IGNORECASE
+)
+
+ATTRIBUTE_KINDS = {
+    "dosage": "dosage",
+    "frequency": "frequency",
+    "frequency_word": "frequency",
+    "frequency_interval": "frequency",
+    "duration": "duration",
+}
+
+
+class AttributeSpan(NamedTuple):
+    """A dosage, frequency or duration token found in the document."""
+    
+    start: int
+    end: int
+    kind: str
+    value: str
+
+
+class PrescriptionDetails(NamedTuple):
+    """Prescription attributes bound to a single medication."""
+    
+    medication_name: str
+    dosage: str
+    frequency: str
+    duration: Optional[str]
+
+
+class AttributeIndex:
+    """
+    Span index of prescription attributes, built in one pass over a document.
+    
+    Attributes are grouped by segment (a line or a sentence) so a medication
+    mention binds to dosage, frequency and duration tokens written alongside
+    it, or, for kinds its own segment lacks, to those of the following
+    segment ("Amoxicillin 500 mg. Take twice daily.").
+    """
+    
+    def __init__(self, document: DocumentLike):
+        """
+        Tokenize the document and index its attribute spans.
+        
+        Args:
+            document: Document text or DocumentContext, whose segment
+                boundaries are reused
+        """
+        self._context = DocumentContext.of(document)
+        self._segments: Dict[int, List[AttributeSpan]] = {}
+        
+        for match in ATTRIBUTE_PATTERN.finditer(self._context.text):
+            group = match.lastgroup
+            span = AttributeSpan(match.start(), match.end(), ATTRIBUTE_KINDS[group], match.group(group))
+            self._segments.setdefault(self.segment_of(span.start), []).append(span)
+    
+    def segment_of(self, position: int) -> int:
+        """Return the id of the segment containing a character offset."""
+        return self._context.segment_of(position)
+    
+    def next_segment(self, segment: int) -> Optional[int]:
+        """Return the id of the first segment after ``segment`` that is not blank."""
+        starts = self._context.segment_starts
+        text = self._context.text
+        for following in range(segment + 1, len(starts)):
+            end = starts[following + 1] if following + 1 < len(starts) else len(text)
+            if text[starts[following]:end].strip():
+                return following
+        return None
+    
+    def nearest(self, start: int, end: int, following: Optional[int] = None) -> Dict[str, AttributeSpan]:
+        """
+        Find the closest attribute of each kind in the segment of a mention.
+        
+        Args:
+            start: Mention start offset
+            end: Mention end offset
+            following: Segment whose attributes fill in kinds missing from
+                the mention's own segment
+            
+        Returns:
+            Mapping of attribute kind to the nearest span; ties prefer the
+            span following the mention
+        """
+        nearest = self._nearest_in(self.segment_of(start), start, end)
+        if following is not None:
+            for kind, span in self._nearest_in(following, start, end).items():
+                nearest.setdefault(kind, span)
+        return nearest
+    
+    def _nearest_in(self, segment: int, start: int, end: int) -> Dict[str, AttributeSpan]:
+        best: Dict[str, tuple] = {}
+        
+        for span in self._segments.get(segment, ()):
+            if span.start >= end:
+                rank = (span.start - end, 0)
+            elif span.end <= start:
+                rank = (start - span.end, 1)
+            else:
+                rank = (0, 0)
+            if span.kind not in best or rank < best[span.kind][0]:
+                best[span.kind] = (rank, span)
+                
+        return {kind: span for kind, (_, span) in best.items()}
+
+
+def bind_mentions(
+    document: DocumentLike,
+    scanner: MedicationScanner,
+    limit: Optional[int] = None
+) -> Dict[str, Dict[str, AttributeSpan]]:
+    """
+    Find the attributes of each medication's first mention that has any.
+    
+    A mention also binds forward into the next non-blank segment when that
+    segment mentions no other medication, so attributes continued on the
+    next sentence or line are kept.
+    
+    Args:
+        document: Document text or DocumentContext
+        scanner: Scanner over the medication names to bind
+        limit: Ignore mentions starting at or after this offset
+    
+    Returns:
+        Mapping of normalized medication name to its nearest attribute spans;
+        medications without an attributed mention are absent
+    """
+    document = DocumentContext.of(document)
+    index = AttributeIndex(document)
+    mentions = scanner.find_all(document)
+    mentioned: Dict[int, Set[str]] = {}
+    for mention in mentions:
+        mentioned.setdefault(index.segment_of(mention.start), set()).add(mention.name)
+    bound: Dict[str, Dict[str, AttributeSpan]] = {}
+    
+    for mention in mentions:
+        if limit is not None and mention.start >= limit:
+            break
+        if mention.name not in bound:
+            following = index.next_segment(index.segment_of(mention.start))
+            if following is not None and mentioned.get(following, set()) - {mention.name}:
+                following = None
+            attributes = index.nearest(mention.start, mention.end, following)
+            if attributes:
+                bound[mention.name] = attributes
+                
+    return bound
+
+
+def details_from_bindings(
+    medications: List[str],
+    bound: Dict[str, Dict[str, AttributeSpan]]
+) -> List[PrescriptionDetails]:
+    """
+    Turn bound attribute spans into PrescriptionDetails with defaults.
+    
+    Args:
+        medications: Medication names, in output order
+        bound: Result of bind_mentions
+    
+    Returns:
+        List of PrescriptionDetails in the order of ``medications``
+    """
+    details = []
+    for med in medications:
+        attributes = bound.get(normalize_medication_name(med), {})
+        dosage = attributes.get("dosage")
+        frequency = attributes.get("frequency")
+        duration = attributes.get("duration")
+        details.append(PrescriptionDetails(
+            medication_name=med,
+            dosage=dosage.value if dosage else DEFAULT_DOSAGE,
+            frequency=frequency.value if frequency else DEFAULT_FREQUENCY,
+            duration=duration.value if duration else None
+        ))
+    
+    return details
+
+
+def parse_prescription_details(document: DocumentLike, medications: List[str]) -> List[PrescriptionDetails]:
+    """
+    Bind dosage, frequency and duration to each medication in one pass.
+    
+    The document is tokenized once into an AttributeIndex and every
+    medication mention is located with a single scanner pass. A medication
+    takes its attributes from its first mention that has any nearby.
+    
+    Args:
+        document: Document text or DocumentContext
+        medications: Medication names to bind
+    
+    Returns:
+        List of PrescriptionDetails in the order of ``medications``
+    """
+    return details_from_bindings(medications, bind_mentions(document, MedicationScanner(medications)))
@@ -0,0 +1,247 @@
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+import hashlib
+import threading
+import time
+
+
+ANALYSIS_MODULES = (
+    "schemas.py",
+    "services/medical_agent.py",
+    "services/medication_scanner.py",
+    "services/prescription_parser.py",
+    "services/knowledge_base_client.py",
+    "services/kb_bundle.py",
+    "services/medication_index.py",
+    "services/interaction_graph.py",
+    "services/kb_snapshot.py",
+    "services/analysis_records.py",
+    "services/analysis_stream.py",
+    "services/serialization.py",
+    "services/rule_engine.py",
+    "services/document_context.py",
+    "services/pipeline.py",
+)
+
+
+def normalize_document_text(text: str) -> str:
+    """
+    Normalize document text before analysis and cache keying.
+    
+    Only line endings are unified, so documents that differ solely by
+    platform line endings share a cache entry and analyze identically.
+    """
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+@lru_cache(maxsize=1)
+def rules_version() -> str:
+    """
+    Fingerprint of the extraction and rule code.
+    
+    Hashes the source of every module that shapes an AnalysisResult, so any
+    change to extraction logic, hardcoded rules, the result schema or its
+    serialization produces new cache keys. ``ANALYSIS_MODULES`` are paths
+    relative to the app package.
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    app_dir = Path(__file__).resolve().parent.parent
+    for module in ANALYSIS_MODULES:
+        hasher.update(module.encode("utf-8"))
+        hasher.update((app_dir / module).read_bytes())
+    return hasher.hexdigest()
+
+
+def result_cache_key(text: str, kb_version: str, code_version: Optional[str] = None) -> str:
+    """
+    Content-addressed key for an analysis result.
+    
+    Args:
+        text: Normalized document text
+        kb_version: Knowledge base data version
+        code_version: Rules/extraction version; defaults to rules_version()
+    
+    Returns:
+        Hex SHA-256 digest
+    """
+    hasher = hashlib.sha256()
+    for part in (code_version or rules_version(), kb_version, text):
+        hasher.update(part.encode("utf-8"))
+        hasher.update(b"\x00")
+    return hasher.hexdigest()
+
+
+class InMemoryResultCache:
+    """Thread-safe in-memory result cache with LRU eviction by total payload size."""
+    
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Create an empty cache.
+        
+        Args:
+            max_bytes: Upper bound on the summed size of cached payloads
+        """
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+            return payload
+    
+    def put(self, key: str, payload: str):
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size_bytes -= len(previous)
+            self._entries[key] = payload
+            self.size_bytes += size
+            while self.size_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size_bytes -= len(evicted)
+    
+    def delete(self, key: str):
+        with self._lock:
+            payload = self._entries.pop(key, None)
+            if payload is not None:
+                self.size_bytes -= len(payload)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+
+class SQLiteResultCache:
+    """
+    On-disk result cache in a SQLite file.
+    
+    Entries are evicted least-recently-used first whenever the summed payload
+    size exceeds ``max_bytes``. The sum is kept in a ``metadata`` row updated
+    in the same transaction as every write, so inserts never scan the table.
+    Safe to share between threads, and between processes through SQLite's
+    own locking.
+    """
+    
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Open (or create) the cache database.
+        
+        Args:
+            path: SQLite database file; created if missing
+            max_bytes: Upper bound on the summed size of cached payloads
+        """
+        import sqlite3
+        
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, payload TEXT NOT NULL, "
+            "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._connection.execute(
+            "INSERT OR IGNORE INTO metadata (name, value) SELECT 'size_bytes', COALESCE(SUM(size), 0) FROM results"
+        )
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+    
+    @property
+    def size_bytes(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT value FROM metadata WHERE name = 'size_bytes'").fetchone()[0]
+    
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._connection.execute("SELECT payload FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._connection.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+    
+    def put(self, key: str, payload: str):
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            connection = self._connection
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                previous = connection.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+                connection.execute(
+                    "INSERT OR REPLACE INTO results (key, payload, size, last_access) VALUES (?, ?, ?, ?)",
+                    (key, payload, size, time.time())
+                )
+                total = self._add_size(size - (previous[0] if previous is not None else 0))
+                if total > self.max_bytes:
+                    excess = total - self.max_bytes
+                    freed = 0
+                    victims = []
+                    candidates = connection.execute(
+                        "SELECT key, size FROM results WHERE key != ? ORDER BY last_access", (key,)
+                    ).fetchall()
+                    for victim, victim_size in candidates:
+                        victims.append((victim,))
+                        freed += victim_size
+                        if freed >= excess:
+                            break
+                    connection.executemany("DELETE FROM results WHERE key = ?", victims)
+                    self._add_size(-freed)
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+    
+    def delete(self, key: str):
+        with self._lock:
+            connection = self._connection
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = connection.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    connection.execute("DELETE FROM results WHERE key = ?", (key,))
+                    self._add_size(-row[0])
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+    
+    def clear(self):
+        with self._lock:
+            connection = self._connection
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute("DELETE FROM results")
+                connection.execute("UPDATE metadata SET value = 0 WHERE name = 'size_bytes'")
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+    
+    def _add_size(self, delta: int) -> int:
+        """Adjust the stored payload total inside the caller's transaction; returns the new total."""
+        self._connection.execute("UPDATE metadata SET value = value + ? WHERE name = 'size_bytes'", (delta,))
+        return self._connection.execute("SELECT value FROM metadata WHERE name = 'size_bytes'").fetchone()[0]
+    
+    def close(self):
+        with self._lock:
+            self._connection.close()
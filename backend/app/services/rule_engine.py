@@ -0,0 +1,226 @@
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple, Union
+import hashlib
+import json
+import re
+
+from backend.app.services.document_context import DocumentContext, DocumentLike
+
+
+RULE_SPECIALTIES = "specialties"
+RULE_FACILITIES = "facilities"
+RULE_RED_FLAGS = "red_flags"
+
+# Words of a keyword phrase may be separated by spaces, tabs or hyphens, but
+# never by a line break, so no keyword matches across lines.
+_SEPARATOR = r"(?:[^\S\n]|-)+"
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def keyword_words(keyword: str) -> Tuple[str, ...]:
+    """Lowercase words of a keyword, e.g. ``("x", "ray")`` for ``"X-ray"``."""
+    return tuple(_WORD_PATTERN.findall(keyword.lower()))
+
+
+def _trie_pattern(phrases: Iterable[Tuple[str, ...]]) -> str:
+    """
+    Regular expression matching any phrase, factored into a character trie.
+    
+    Alternatives that share a prefix share a branch, so the regex engine
+    follows one path per position however many phrases there are. Longer
+    phrases are preferred over their prefixes.
+    """
+    trie: Dict[str, dict] = {}
+    for phrase in phrases:
+        node = trie
+        for char in " ".join(phrase):
+            node = node.setdefault(char, {})
+        node[""] = {}
+        
+    def emit(node: Dict[str, dict]) -> str:
+        branches = [
+            (_SEPARATOR if char == " " else re.escape(char)) + emit(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f"(?:{body})?" if "" in node else body
+        
+    return emit(trie)
+
+
+class Rule(NamedTuple):
+    """
+    One declarative rule.
+    
+    The rule fires when any of its keywords occurs in the text (or always,
+    if it has none) and at least ``min_medications`` medications are given.
+    """
+    
+    keywords: Tuple[Tuple[str, ...], ...]
+    result: Dict[str, Any]
+    min_medications: Optional[int] = None
+
+
+class RuleEngine:
+    """
+    Keyword rules compiled into one inverted index.
+    
+    Every keyword of every rule is compiled into a single trie-shaped regular
+    expression, and an inverted index maps each keyword to the rules it
+    triggers. Matching is one scan of the text, so evaluating hundreds of
+    rules costs about the same as evaluating ten. Keywords match whole
+    words: "lab" matches "lab results" but not "label". The keywords found
+    in a DocumentContext are stored on it, so the rule kinds evaluated on
+    the same document share a single scan.
+    """
+    
+    def __init__(self, rule_sets: Dict[str, Iterable[Dict]], version: Optional[str] = None):
+        """
+        Compile the rule table.
+        
+        Args:
+            rule_sets: Mapping of rule kind (e.g. ``red_flags``) to rule
+                records with ``result`` and optional ``keywords`` and
+                ``min_medications``; string values of ``result`` may use a
+                ``{medication_count}`` placeholder
+            version: Version of the source data
+            
+        Raises:
+            ValueError: If a keyword has no words
+        """
+        self.version = version
+        self._source = {kind: list(rules) for kind, rules in rule_sets.items()}
+        self._rules: Dict[str, List[Rule]] = {}
+        self._unconditional: Dict[str, List[int]] = {}
+        self._index: Dict[Tuple[str, ...], List[Tuple[str, int]]] = {}
+        
+        for kind, rules in self._source.items():
+            self._rules[kind] = []
+            self._unconditional[kind] = []
+            for position, rule in enumerate(rules):
+                keywords = tuple(self._phrase(keyword) for keyword in rule.get("keywords", ()))
+                self._rules[kind].append(Rule(keywords, dict(rule["result"]), rule.get("min_medications")))
+                if not keywords:
+                    self._unconditional[kind].append(position)
+                for phrase in keywords:
+                    self._index.setdefault(phrase, []).append((kind, position))
+                    
+        self._implied = {phrase: self._contained(phrase) for phrase in self._index}
+        pattern = _trie_pattern(self._index)
+        if self._overlapping():
+            pattern = rf"(?<!\w)(?=({pattern})(?!\w))"
+        else:
+            pattern = rf"(?<!\w)({pattern})(?!\w)"
+        self._pattern = re.compile(pattern) if self._index else None
+    
+    @staticmethod
+    def _phrase(keyword: str) -> Tuple[str, ...]:
+        words = keyword_words(keyword)
+        if not words:
+            raise ValueError(f"Invalid rule keyword {keyword!r}")
+        return words
+    
+    def _contained(self, phrase: Tuple[str, ...]) -> Tuple[Tuple[str, ...], ...]:
+        """Keywords occurring as whole words inside ``phrase``, including itself."""
+        spans = {phrase[start:end] for start in range(len(phrase)) for end in range(start + 1, len(phrase) + 1)}
+        return tuple(span for span in spans if span in self._index)
+    
+    def _overlapping(self) -> bool:
+        """
+        True if a keyword can start inside another and end after it.
+        
+        A left-to-right scan consumes each match, so only then can it miss a
+        keyword; otherwise the keywords inside each match are exactly those
+        in ``_implied``. With overlaps the scan looks ahead at every word.
+        """
+        prefixes = {phrase[:end] for phrase in self._index for end in range(1, len(phrase))}
+        return any(phrase[start:] in prefixes for phrase in self._index for start in range(1, len(phrase)))
+    
+    @classmethod
+    def from_file(cls, path: str) -> "RuleEngine":
+        """
+        Load a rule table from a JSON data file.
+        
+        Args:
+            path: File with a ``version`` key and one list of rules per kind
+            
+        Returns:
+            RuleEngine
+        """
+        with open(path, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+        version = data.pop("version", None)
+        return cls(data, version=str(version) if version is not None else None)
+    
+    def __len__(self) -> int:
+        return sum(len(rules) for rules in self._rules.values())
+    
+    def fingerprint(self) -> str:
+        """Digest of the rule table, for cache keys."""
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(json.dumps(self._source, sort_keys=True).encode("utf-8"))
+        return hasher.hexdigest()
+    
+    def matched_keywords(self, document: DocumentLike) -> FrozenSet[Tuple[str, ...]]:
+        """
+        Keywords that occur in a document, found in a single scan.
+        
+        Args:
+            document: Text to match, or a DocumentContext whose lowercase
+                view is scanned and which keeps the matches; plain text is
+                scanned on every call
+            
+        Returns:
+            Matched keywords as tuples of lowercase words
+        """
+        if isinstance(document, DocumentContext):
+            return document.derived(self, lambda: self._scan(document.lowered))
+        return self._scan(document.lower())
+    
+    def _scan(self, lowered: str) -> FrozenSet[Tuple[str, ...]]:
+        found = set()
+        if self._pattern is not None:
+            for match in set(self._pattern.findall(lowered)):
+                found.update(self._implied[keyword_words(match)])
+        return frozenset(found)
+    
+    def evaluate(
+        self,
+        kind: str,
+        texts: Union[DocumentLike, Iterable[DocumentLike]],
+        medication_count: int = 0
+    ) -> List[Dict]:
+        """
+        Results of the rules of one kind that fire for ``texts``.
+        
+        Args:
+            kind: Rule kind, e.g. ``specialties``
+            texts: Text or DocumentContext the keywords are matched
+                against, or several of them matched separately
+            medication_count: Number of medications, for ``min_medications``
+                and the ``{medication_count}`` placeholder
+                
+        Returns:
+            New result dicts of the fired rules, in table order
+            
+        Raises:
+            KeyError: If the table has no rules of this kind
+        """
+        rules = self._rules[kind]
+        fired = set(self._unconditional[kind])
+        for text in ([texts] if isinstance(texts, (str, DocumentContext)) else texts):
+            for phrase in self.matched_keywords(text):
+                fired.update(position for rule_kind, position in self._index[phrase] if rule_kind == kind)
+            
+        results = []
+        placeholders = {"medication_count": medication_count}
+        for position in sorted(fired):
+            rule = rules[position]
+            if rule.min_medications is not None and medication_count < rule.min_medications:
+                continue
+            results.append({
+                key: value.format_map(placeholders) if isinstance(value, str) else value
+                for key, value in rule.result.items()
+            })
+        return results
@@ -0,0 +1,182 @@
+from operator import attrgetter
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, Type, Union
+import io
+import json
+
+from pydantic import BaseModel
+
+from backend.app import schemas
+from backend.app.schemas import AnalysisResult
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+_instance_dict = attrgetter("__dict__")
+_serializers: Dict[type, Callable[[Any], Any]] = {}
+
+
+def _model_dump(instance: BaseModel) -> Dict[str, Any]:
+    return instance.model_dump(mode="json")
+
+
+def _is_plain_model(model: Type[BaseModel]) -> bool:
+    """
+    True if ``model.__dict__`` already is its JSON object.
+    
+    That holds when no field is renamed, no serializer or computed field
+    changes the output, and no extra attributes can be stored.
+    """
+    decorators = model.__pydantic_decorators__
+    return (
+        not any(field.alias or field.serialization_alias for field in model.model_fields.values())
+        and not model.model_computed_fields
+        and not decorators.field_serializers
+        and not decorators.model_serializers
+        and model.model_config.get("extra") != "allow"
+    )
+
+
+def _register(model: type) -> Callable[[Any], Any]:
+    if not (isinstance(model, type) and issubclass(model, BaseModel)):
+        raise TypeError(f"Object of type {model.__name__} is not JSON serializable")
+    if _is_plain_model(model):
+        serializer = _instance_dict
+    else:
+        serializer = _model_dump
+    _serializers[model] = serializer
+    return serializer
+
+
+def _precompute() -> None:
+    """Build the serializers for every schemas model up front."""
+    for value in vars(schemas).values():
+        if isinstance(value, type) and issubclass(value, BaseModel) and value is not BaseModel:
+            _register(value)
+
+
+_precompute()
+
+
+def _default(obj: Any) -> Any:
+    """JSON ``default`` hook: return the field mapping of a pydantic model."""
+    serializer = _serializers.get(type(obj))
+    if serializer is None:
+        serializer = _register(type(obj))
+    return serializer(obj)
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Serialize a schemas model, or JSON data containing models, to compact JSON.
+    
+    The output is byte-identical to ``model_dump_json()`` for the schemas
+    models. orjson is used when installed; otherwise models are encoded by
+    pydantic-core and other data by the standard library.
+    
+    Args:
+        obj: AnalysisResult (or any schemas model), or a dict/list of JSON
+            values and models
+    
+    Returns:
+        UTF-8 encoded JSON
+    
+    Raises:
+        TypeError: If ``obj`` contains a value that is neither JSON nor a model
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    serializer = getattr(obj, "__pydantic_serializer__", None)
+    if serializer is not None:
+        return serializer.to_json(obj)
+    return json.dumps(obj, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parse JSON with the fast backend when installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class NDJSONWriter:
+    """
+    Write results to a file handle as newline-delimited JSON, one per line.
+    
+    Each result is encoded and written as it arrives, so a batch of any size
+    is streamed without being collected first. The handle may be binary or
+    text; it is not closed by the writer.
+    """
+    
+    def __init__(self, handle: IO):
+        self.handle = handle
+        self.count = 0
+        self._text = isinstance(handle, io.TextIOBase)
+    
+    def write(self, obj: Any):
+        """Write one result (or any value accepted by dumps) as a line."""
+        line = dumps(obj) + b"\n"
+        self.handle.write(line.decode("utf-8") if self._text else line)
+        self.count += 1
+    
+    def write_many(self, objects: Iterable[Any]) -> int:
+        """
+        Write every item of an iterable, consuming it lazily.
+        
+        Returns:
+            Number of lines written by this call
+        """
+        start = self.count
+        for obj in objects:
+            self.write(obj)
+        return self.count - start
+    
+    def flush(self):
+        self.handle.flush()
+
+
+def write_ndjson(handle: IO, objects: Iterable[Any]) -> int:
+    """Stream ``objects`` to ``handle`` as NDJSON and return the line count."""
+    return NDJSONWriter(handle).write_many(objects)
+
+
+def iter_ndjson(handle: IO, model: Type[BaseModel] = AnalysisResult) -> Iterator[BaseModel]:
+    """
+    Read NDJSON written by NDJSONWriter back, one validated model per line.
+    
+    Lines are read and parsed one at a time, so memory does not grow with
+    the file. Blank lines are skipped.
+    
+    Args:
+        handle: Binary or text file handle
+        model: Model to validate each line into
+    
+    Yields:
+        One model instance per non-blank line
+    
+    Raises:
+        ValueError: If a line is not valid JSON for ``model``; the message
+            includes the line number
+    """
+    for number, line in enumerate(handle, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield model.model_validate_json(line)
+        except ValueError as exc:
+            raise ValueError(f"NDJSON line {number}: {exc}") from exc
+
+
+def iter_ndjson_data(handle: IO) -> Iterator[Any]:
+    """Like iter_ndjson, but yield the parsed JSON values without validation."""
+    for number, line in enumerate(handle, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield loads(line)
+        except ValueError as exc:
+            raise ValueError(f"NDJSON line {number}: {exc}") from exc
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Compare record-based stage outputs against building pydantic models per item.
+
+Run from the repository root:
+    PYTHONPATH=. python -m backend.benchmarks.bench_analysis_records
+"""
+
+import argparse
+import random
+import timeit
+import tracemalloc
+
+from backend.app.schemas import (
+    AdditionalInsights,
+    AnalysisResult,
+    DoctorSuggestion,
+    HospitalDoctorSuggestions,
+    HospitalSuggestion,
+    MedicationTimingSchedule,
+    MedicationTimingSlot,
+    ParsedDocument,
+    PrescriptionItem,
+    PrescriptionSummary,
+    RedFlagInsight,
+)
+from backend.app.services.analysis_records import (
+    AnalysisRecord,
+    DoctorRecord,
+    HospitalRecord,
+    InsightsRecord,
+    PrescriptionRecord,
+    PrescriptionSummaryRecord,
+    RedFlagRecord,
+    SuggestionsRecord,
+    TimingScheduleRecord,
+    TimingSlotRecord,
+    to_analysis_result,
+)
+from backend.app.services.medical_agent import MedicalAnalysisAgent
+from backend.benchmarks.corpus import generate_document
+
+
+def stage_outputs(agent: MedicalAnalysisAgent, text: str) -> AnalysisRecord:
+    """Run the stages once and keep their records as benchmark input."""
+    medications = agent._extract_medications_from_text(text)
+    prescriptions = agent._parse_prescription_details(text, medications)
+    return AnalysisRecord(
+        prescription_summary=PrescriptionSummaryRecord(prescriptions, len(prescriptions)),
+        medication_timing=agent._generate_timing_schedule(prescriptions),
+        suggestions=agent._generate_suggestions(text, medications),
+        additional_insights=agent._generate_insights(text, medications),
+        knowledge_base_version=agent.kb_client.data_version
+    )
+
+
+def build_with_records(source: AnalysisRecord) -> AnalysisResult:
+    """Allocate every intermediate as a record, then convert once at the boundary."""
+    prescriptions, timing, suggestions, insights, knowledge_base_version = source
+    return to_analysis_result(AnalysisRecord(
+        prescription_summary=PrescriptionSummaryRecord(
+            [PrescriptionRecord(p.medication_name, p.dosage, p.frequency, p.duration, p.notes) for p in prescriptions.items],
+            prescriptions.total_medications
+        ),
+        medication_timing=TimingScheduleRecord(
+            [TimingSlotRecord(s.time, s.medications, s.instructions) for s in timing.schedule],
+            timing.general_instructions
+        ),
+        suggestions=SuggestionsRecord(
+            [DoctorRecord(d.specialty, d.reason, d.priority) for d in suggestions.doctors],
+            [HospitalRecord(h.facility_type, h.purpose, h.urgency) for h in suggestions.hospitals]
+        ),
+        additional_insights=InsightsRecord(
+            [RedFlagRecord(f.category, f.description, f.severity, f.recommendation) for f in insights.red_flags],
+            insights.general_advice
+        ),
+        knowledge_base_version=knowledge_base_version
+    ))
+
+
+def build_with_models(source: AnalysisRecord) -> AnalysisResult:
+    """The previous approach: a validated pydantic model for every intermediate."""
+    prescriptions, timing, suggestions, insights, knowledge_base_version = source
+    return AnalysisResult(
+        prescription_summary=PrescriptionSummary(
+            items=[
+                PrescriptionItem(
+                    medication_name=p.medication_name, dosage=p.dosage, frequency=p.frequency,
+                    duration=p.duration, notes=p.notes
+                )
+                for p in prescriptions.items
+            ],
+            total_medications=prescriptions.total_medications
+        ),
+        medication_timing=MedicationTimingSchedule(
+            schedule=[
+                MedicationTimingSlot(time=s.time, medications=s.medications, instructions=s.instructions)
+                for s in timing.schedule
+            ],
+            general_instructions=timing.general_instructions
+        ),
+        suggestions=HospitalDoctorSuggestions(
+            doctors=[DoctorSuggestion(specialty=d.specialty, reason=d.reason, priority=d.priority) for d in suggestions.doctors],
+            hospitals=[
+                HospitalSuggestion(facility_type=h.facility_type, purpose=h.purpose, urgency=h.urgency)
+                for h in suggestions.hospitals
+            ]
+        ),
+        additional_insights=AdditionalInsights(
+            red_flags=[
+                RedFlagInsight(
+                    category=f.category, description=f.description, severity=f.severity,
+                    recommendation=f.recommendation
+                )
+                for f in insights.red_flags
+            ],
+            general_advice=insights.general_advice
+        ),
+        knowledge_base_version=knowledge_base_version
+    )
+
+
+def build_with_model_construct(source: AnalysisRecord) -> AnalysisResult:
+    """Trusted construction without validation; runs in Python, not pydantic-core."""
+    prescriptions, timing, suggestions, insights, knowledge_base_version = source
+    return AnalysisResult.model_construct(
+        prescription_summary=PrescriptionSummary.model_construct(
+            items=[PrescriptionItem.model_construct(**p._asdict()) for p in prescriptions.items],
+            total_medications=prescriptions.total_medications
+        ),
+        medication_timing=MedicationTimingSchedule.model_construct(
+            schedule=[MedicationTimingSlot.model_construct(**s._asdict()) for s in timing.schedule],
+            general_instructions=timing.general_instructions
+        ),
+        suggestions=HospitalDoctorSuggestions.model_construct(
+            doctors=[DoctorSuggestion.model_construct(**d._asdict()) for d in suggestions.doctors],
+            hospitals=[HospitalSuggestion.model_construct(**h._asdict()) for h in suggestions.hospitals]
+        ),
+        additional_insights=AdditionalInsights.model_construct(
+            red_flags=[RedFlagInsight.model_construct(**f._asdict()) for f in insights.red_flags],
+            general_advice=insights.general_advice
+        ),
+        knowledge_base_version=knowledge_base_version
+    )
+
+
+def traced_bytes(func, source) -> tuple:
+    """Return ``(retained, peak)`` bytes allocated by one call."""
+    tracemalloc.start()
+    result = func(source)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--medications", type=int, default=40)
+    parser.add_argument("--number", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    agent = MedicalAnalysisAgent()
+    text = generate_document(random.Random(0), kind="discharge_summary", medications=args.medications, filler_lines=30)
+    source = stage_outputs(agent, text)
+    assert build_with_records(source) == build_with_models(source) == build_with_model_construct(source)
+    
+    print(f"{len(source.prescription_summary.items)} medications, {len(source.medication_timing.schedule)} timing slots, "
+          f"{len(source.additional_insights.red_flags)} red flags")
+    print(f"{'output objects':>16} {'us/doc':>9} {'retained KiB':>13} {'peak KiB':>9}")
+    timings = {}
+    variants = (
+        ("pydantic models", build_with_models),
+        ("model_construct", build_with_model_construct),
+        ("records", build_with_records),
+    )
+    for name, func in variants:
+        best = min(timeit.repeat(lambda: func(source), number=args.number, repeat=args.repeat)) / args.number
+        retained, peak = traced_bytes(func, source)
+        timings[name] = best
+        print(f"{name:>16} {best * 1e6:>9.1f} {retained / 1024:>13.1f} {peak / 1024:>9.1f}")
+    print(f"records vs pydantic models: {timings['pydantic models'] / timings['records']:.2f}x")
+    
+    parsed = ParsedDocument(text=text)
+    per_document = min(timeit.repeat(lambda: agent.analyze_document(parsed), number=200, repeat=args.repeat)) / 200
+    print(f"analyze_document end to end: {per_document * 1e6:.1f} us/doc")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Compare analysis stages sharing one DocumentContext with stages each given the raw text.
+
+Run from the repository root:
+    PYTHONPATH=. python -m backend.benchmarks.bench_document_context
+"""
+
+import argparse
+import timeit
+
+from backend.app.services.document_context import DocumentContext
+from backend.app.services.medical_agent import MedicalAnalysisAgent
+from backend.app.services.result_cache import normalize_document_text
+from backend.benchmarks.corpus import generate_corpus
+
+
+def run_stages(agent: MedicalAnalysisAgent, document) -> None:
+    medications = agent._extract_medications_from_text(document)
+    agent._parse_prescription_details(document, medications)
+    agent._generate_suggestions(document, medications)
+    agent._generate_insights(document, medications)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    agent = MedicalAnalysisAgent()
+    print(f"{'narrative lines':>16} {'characters':>11} {'raw text us':>12} {'context us':>11} {'speedup':>8}")
+    
+    for filler_lines in ((4, 40), (200, 400), (2000, 3000)):
+        texts = [
+            normalize_document_text(document.text)
+            for document in generate_corpus(args.documents, seed=0, filler_lines=filler_lines)
+        ]
+        raw = min(timeit.repeat(lambda: [run_stages(agent, text) for text in texts], number=1,
+                                repeat=args.repeat)) / len(texts) * 1e6
+        shared = min(timeit.repeat(lambda: [run_stages(agent, DocumentContext(text)) for text in texts], number=1,
+                                   repeat=args.repeat)) / len(texts) * 1e6
+        label = f"{filler_lines[0]}-{filler_lines[1]}"
+        characters = sum(map(len, texts)) // len(texts)
+        print(f"{label:>16} {characters:>11} {raw:>12.1f} {shared:>11.1f} {raw / shared:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
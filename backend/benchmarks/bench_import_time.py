@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Measure cold import time of backend modules with python -X importtime.
+
+Run from the repository root:
+    PYTHONPATH=. python -m backend.benchmarks.bench_import_time
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, NamedTuple, Tuple
+
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+DEFAULT_MODULES = [
+    "backend.app.services.medical_agent",
+    "backend.app.services.batch",
+    "backend.app.schemas",
+]
+
+HEAVY_MODULES = ("langchain_core", "pydantic", "asyncio", "sqlite3")
+
+
+class ImportRecord(NamedTuple):
+    """One line of -X importtime output, in microseconds."""
+    
+    name: str
+    self_us: int
+    cumulative_us: int
+
+
+def measure_import(module: str) -> Tuple[List[ImportRecord], List[str]]:
+    """
+    Import a module in a fresh interpreter.
+    
+    Args:
+        module: Dotted module name
+    
+    Returns:
+        Import records in completion order, and the heavy modules that ended
+        up in sys.modules
+    """
+    env = dict(os.environ, PYTHONPATH=str(REPO_ROOT))
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, env=env, check=True
+    )
+    records = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        records.append(ImportRecord(name.strip(), int(self_us), int(cumulative_us)))
+    loaded = [name for name in completed.stdout.strip().split(",") if name]
+    return records, loaded
+
+
+def cumulative_ms(module: str, repeat: int = 3) -> float:
+    """Best-of-``repeat`` cumulative import time of ``module`` in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        records, _ = measure_import(module)
+        timings.append(next(record.cumulative_us for record in records if record.name == module))
+    return min(timings) / 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=8, help="Show the slowest imports by self time")
+    parser.add_argument("--budget-ms", type=float, help="Exit non-zero if a module exceeds this budget")
+    args = parser.parse_args()
+    
+    over_budget = False
+    for module in args.modules:
+        total = cumulative_ms(module, args.repeat)
+        records, loaded = measure_import(module)
+        print(f"{module}: {total:.1f} ms cumulative; heavy modules loaded: {', '.join(loaded) or 'none'}")
+        for record in sorted(records, key=lambda record: -record.self_us)[:args.top]:
+            print(f"    {record.self_us / 1000:>8.1f} ms  {record.name}")
+        if args.budget_ms is not None and total > args.budget_ms:
+            print(f"    over budget ({args.budget_ms:.0f} ms)")
+            over_budget = True
+    
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Compare incremental re-analysis of an edited document with a full re-analysis.
+
+Run from the repository root:
+    PYTHONPATH=. python -m backend.benchmarks.bench_incremental
+"""
+
+import argparse
+import random
+import timeit
+
+from backend.app.schemas import ParsedDocument
+from backend.app.services.incremental import IncrementalAnalyzer, TextEdit
+from backend.app.services.medical_agent import MedicalAnalysisAgent
+from backend.benchmarks.corpus import generate_document
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--medications", type=int, default=30)
+    parser.add_argument("--filler-lines", type=int, default=400)
+    parser.add_argument("--number", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    agent = MedicalAnalysisAgent()
+    analyzer = IncrementalAnalyzer(agent)
+    text = generate_document(
+        random.Random(0), kind="discharge_summary", medications=args.medications, filler_lines=args.filler_lines
+    )
+    state = analyzer.analyze(ParsedDocument(text=text))
+    middle = text.index("\n", len(text) // 2) + 1
+    edits = {
+        "append instruction": TextEdit(len(text), len(text), "\nFollow-up with the clinic in two weeks."),
+        "append medication": TextEdit(len(text), len(text), "\nRanitidine 150mg twice daily."),
+        "edit middle line": TextEdit(middle, middle, "Urgent: repeat blood work.\n"),
+    }
+    print(f"{len(text)} characters, {len(state.medications)} medications, {len(state.blocks)} blocks")
+    print(f"{'edit':>20} {'full ms':>8} {'incremental ms':>15} {'speedup':>8}")
+    
+    for name, edit in edits.items():
+        edited = ParsedDocument(text=text[:edit.start] + edit.replacement + text[edit.end:])
+        assert analyzer.update(state, edit).result == agent.analyze_document(edited)
+        full = min(timeit.repeat(lambda: agent.analyze_document(edited), number=args.number, repeat=args.repeat))
+        incremental = min(timeit.repeat(lambda: analyzer.update(state, edit), number=args.number, repeat=args.repeat))
+        print(f"{name:>20} {full / args.number * 1e3:>8.2f} {incremental / args.number * 1e3:>15.2f} "
+              f"{full / incremental:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Measure the cost of stage instrumentation on analyze_document.
+
+Run from the repository root:
+    PYTHONPATH=. python -m backend.benchmarks.bench_instrumentation
+"""
+
+import argparse
+import os
+import tempfile
+import timeit
+
+from backend.app.services.instrumentation import HistogramAggregator, OTLPJsonFileExporter, Tracer
+from backend.app.services.medical_agent import MedicalAnalysisAgent
+from backend.benchmarks.corpus import generate_corpus
+
+
+def time_agent(agent: MedicalAnalysisAgent, documents, repeat: int) -> float:
+    """Best per-document time in microseconds over ``repeat`` passes."""
+    best = min(timeit.repeat(lambda: [agent.analyze_document(doc) for doc in documents], number=1, repeat=repeat))
+    return best / len(documents) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=200, help="Corpus documents")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    documents = generate_corpus(args.size, seed=0)
+    histogram = HistogramAggregator()
+    with tempfile.TemporaryDirectory() as directory:
+        exporter = OTLPJsonFileExporter(os.path.join(directory, "spans.jsonl"))
+        agents = {
+            "disabled": MedicalAnalysisAgent(),
+            "histogram": MedicalAnalysisAgent(instrumentation=Tracer(histogram)),
+            "histogram+otlp": MedicalAnalysisAgent(instrumentation=Tracer(histogram, exporter)),
+        }
+        
+        baseline = None
+        print(f"{'instrumentation':>16} {'us/doc':>9} {'overhead':>9}")
+        for name, agent in agents.items():
+            per_document = time_agent(agent, documents, args.repeat)
+            baseline = baseline or per_document
+            print(f"{name:>16} {per_document:>9.1f} {per_document / baseline - 1:>8.1%}")
+        exporter.close()
+
+
+if __name__ == "__main__":
+    main()
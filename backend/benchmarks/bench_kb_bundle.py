@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Measure analysis latency while knowledge base bundles are hot-swapped in the background.
+
+Run from the repository root:
+    PYTHONPATH=. python -m backend.benchmarks.bench_kb_bundle
+"""
+
+import argparse
+import statistics
+import tempfile
+import threading
+import time
+import timeit
+
+from backend.app.services.kb_bundle import compile_bundle, load_bundle, write_bundle
+from backend.app.services.knowledge_base_client import (
+    DEFAULT_INTERACTIONS_PATH,
+    DEFAULT_RULES_PATH,
+    MedicalKnowledgeBaseClient,
+)
+from backend.app.services.medical_agent import MedicalAnalysisAgent
+from backend.benchmarks.corpus import generate_corpus
+
+
+def analyze_all(agent: MedicalAnalysisAgent, documents):
+    latencies = []
+    versions = set()
+    for document in documents:
+        started = time.perf_counter()
+        versions.add(agent.analyze_document(document).knowledge_base_version)
+        latencies.append((time.perf_counter() - started) * 1e6)
+    return latencies, versions
+
+
+def pin_once(client: MedicalKnowledgeBaseClient) -> None:
+    with client.pinned():
+        pass
+
+
+def summarize(label: str, latencies) -> None:
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"{label:<22} {statistics.median(ordered):>9.1f} {p99:>9.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--documents", type=int, default=300)
+    parser.add_argument("--swap-interval", type=float, default=0.005, help="Seconds between background swaps")
+    args = parser.parse_args()
+    
+    documents = generate_corpus(args.documents, seed=0)
+    client = MedicalKnowledgeBaseClient()
+    agent = MedicalAnalysisAgent(knowledge_base_client=client)
+    
+    with tempfile.TemporaryDirectory() as directory:
+        write_bundle(directory, client._initialize_mock_data(), DEFAULT_INTERACTIONS_PATH, DEFAULT_RULES_PATH)
+        compile_ms = min(timeit.repeat(lambda: load_bundle(directory), number=1, repeat=5)) * 1e3
+        current = load_bundle(directory)
+    data = current.data
+    variant = compile_bundle(
+        {**data, "lexicon": data["lexicon"] + ["zolpidem"]}, current.interaction_graph, current.rule_engine
+    )
+    bundles = [variant, current]
+    swap_ns = min(timeit.repeat(lambda: client.swap_bundle(bundles[0]), number=10_000, repeat=3)) / 10_000 * 1e9
+    client.swap_bundle(current)
+    pin_ns = min(timeit.repeat(lambda: pin_once(client), number=10_000, repeat=3)) / 10_000 * 1e9
+    print(f"load and compile bundle: {compile_ms:.2f} ms (off the request path)")
+    print(f"swap: {swap_ns:.0f} ns, pin: {pin_ns:.0f} ns")
+    
+    analyze_all(agent, documents[:20])
+    print(f"{'':<22} {'p50 us':>9} {'p99 us':>9}")
+    steady, _ = analyze_all(agent, documents)
+    summarize("steady", steady)
+    
+    stop = threading.Event()
+    swaps = 0
+    
+    def swap_continuously():
+        nonlocal swaps
+        while not stop.wait(args.swap_interval):
+            client.swap_bundle(bundles[swaps % 2])
+            swaps += 1
+    
+    swapper = threading.Thread(target=swap_continuously)
+    swapper.start()
+    try:
+        swapping, versions = analyze_all(agent, documents)
+    finally:
+        stop.set()
+        swapper.join()
+    summarize("swapping", swapping)
+    print(f"{swaps} swaps during the run, {len(versions)} bundle version(s) recorded")
+
+
+if __name__ == "__main__":
+    main()
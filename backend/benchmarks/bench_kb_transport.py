@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrent analyses over the pooled knowledge base transport.
+
+Run from the repository root:
+    PYTHONPATH=. python -m backend.benchmarks.bench_kb_transport
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.app.schemas import ParsedDocument
+from backend.app.services.kb_stub_server import KnowledgeBaseStubServer
+from backend.app.services.kb_transport import HTTPTransport
+from backend.app.services.knowledge_base_client import MedicalKnowledgeBaseClient
+from backend.app.services.medical_agent import MedicalAnalysisAgent
+
+
+DOCUMENTS = [
+    ParsedDocument(text="Metformin 500mg twice daily. Lisinopril 10mg once daily for blood pressure."),
+    ParsedDocument(text="Warfarin 5mg and Amoxicillin 500mg three times daily for 7 days."),
+    ParsedDocument(text="Glucophage 1000mg daily. Urgent follow-up with endocrinologist."),
+    ParsedDocument(text="Lipitor 20mg at bedtime. Blood work needed in 3 months."),
+]
+
+
+def run_once(analyses: int, pool_size: int, keep_alive: bool, latency: float) -> None:
+    with KnowledgeBaseStubServer(latency=latency) as server:
+        transport = HTTPTransport(server.base_url, pool_size=pool_size, keep_alive=keep_alive)
+        agent = MedicalAnalysisAgent(knowledge_base_client=MedicalKnowledgeBaseClient(transport=transport))
+        requests_before = server.request_count
+        connections_before = server.connection_count
+        
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=analyses) as pool:
+            list(pool.map(lambda i: agent.analyze_document(DOCUMENTS[i % len(DOCUMENTS)]), range(analyses)))
+        elapsed = time.perf_counter() - started
+        
+        requests = server.request_count - requests_before
+        connections = server.connection_count - connections_before
+        transport.close()
+    
+    mode = "keep-alive" if keep_alive else "close"
+    print(
+        f"{mode:>10} {pool_size:>5} {elapsed * 1000:>9.1f} {analyses / elapsed:>12.1f} "
+        f"{requests:>9} {connections:>12}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--analyses", type=int, default=100)
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[4, 16])
+    parser.add_argument("--latency", type=float, default=0.002, help="Stub server latency per request in seconds")
+    args = parser.parse_args()
+    
+    print(f"{'mode':>10} {'pool':>5} {'wall ms':>9} {'analyses/s':>12} {'requests':>9} {'connections':>12}")
+    for pool_size in args.pool_sizes:
+        for keep_alive in (False, True):
+            run_once(args.analyses, pool_size, keep_alive, args.latency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark the medication scanner against the original per-name substring scan.
+
+Run from the repository root:
+    PYTHONPATH=. python -m backend.benchmarks.bench_medication_scanner
+"""
+
+import argparse
+import random
+import re
+import timeit
+from typing import List
+
+from backend.app.services.medication_scanner import MedicationScanner
+
+
+LEGACY_PATTERNS = [
+    r'\b([A-Z][a-z]+(?:ol|in|ide|one|ate|mine|pril|sartan|statin))\b',
+    r'(?:^|\n|\. )([A-Z][a-z]{4,})\s+\d+\s*mg',
+]
+
+SYLLABLES = [
+    "am", "ox", "ic", "ill", "met", "for", "lis", "in", "pril", "tor",
+    "va", "sta", "tin", "ome", "pra", "zole", "lev", "thy", "rox", "los",
+    "tan", "gab", "pen", "ami", "lo", "di", "pine", "cef", "tri", "ax",
+]
+
+
+def make_lexicon(size: int, seed: int = 7) -> List[str]:
+    """Generate a deterministic lexicon of distinct drug-like names."""
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < size:
+        names.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(3, 5))))
+    return sorted(names)
+
+
+def make_document(lexicon: List[str], words: int = 2000, mentions: int = 40, seed: int = 11) -> str:
+    """Generate a document with a known number of lexicon mentions."""
+    rng = random.Random(seed)
+    filler = ["patient", "daily", "take", "with", "food", "follow", "up", "in", "weeks", "and"]
+    tokens = [rng.choice(filler) for _ in range(words)]
+    for _ in range(mentions):
+        position = rng.randrange(len(tokens))
+        tokens[position] = f"{rng.choice(lexicon).capitalize()} {rng.randint(1, 50) * 10}mg"
+    return " ".join(tokens)
+
+
+def legacy_extract(text: str, lexicon: List[str]) -> List[str]:
+    """The original extraction: one substring test per name, then uncompiled regexes."""
+    medications = []
+    text_lower = text.lower()
+    for med in lexicon:
+        if med in text_lower:
+            medications.append(med.capitalize())
+    for pattern in LEGACY_PATTERNS:
+        for match in re.findall(pattern, text):
+            if match not in medications:
+                medications.append(match)
+    return medications
+
+
+def scanner_extract(text: str, scanner: MedicationScanner) -> List[str]:
+    """Scanner-based extraction as done by MedicalAnalysisAgent."""
+    medications = []
+    seen = set()
+    for match in scanner.find_all(text):
+        name = match.name.capitalize()
+        if name not in seen:
+            seen.add(name)
+            medications.append(name)
+    return medications
+
+
+def run(sizes: List[int], repeat: int) -> None:
+    print(f"{'lexicon':>8} {'build ms':>10} {'legacy ms':>10} {'scanner ms':>11} {'speedup':>8}")
+    for size in sizes:
+        lexicon = make_lexicon(size)
+        document = make_document(lexicon)
+        
+        build = timeit.timeit(lambda: MedicationScanner(lexicon), number=1)
+        scanner = MedicationScanner(lexicon)
+        legacy = min(timeit.repeat(lambda: legacy_extract(document, lexicon), number=1, repeat=repeat))
+        fast = min(timeit.repeat(lambda: scanner_extract(document, scanner), number=1, repeat=repeat))
+        
+        print(f"{size:>8} {build * 1000:>10.2f} {legacy * 1000:>10.2f} {fast * 1000:>11.2f} {legacy / fast:>7.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
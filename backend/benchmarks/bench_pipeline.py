@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Compare sequential and concurrent stage execution against a slow knowledge base.
+
+Run from the repository root:
+    PYTHONPATH=. python -m backend.benchmarks.bench_pipeline
+"""
+
+import argparse
+import time
+
+from backend.app.schemas import ParsedDocument
+from backend.app.services.kb_stub_server import KnowledgeBaseStubServer
+from backend.app.services.kb_transport import HTTPTransport
+from backend.app.services.knowledge_base_client import MedicalKnowledgeBaseClient
+from backend.app.services.medical_agent import MedicalAnalysisAgent
+from backend.app.services.pipeline import ThreadPoolStageExecutor
+
+
+DOCUMENT = ParsedDocument(
+    text="Metformin 500mg twice daily for diabetes. Warfarin 5mg daily.\nUrgent blood work and imaging."
+)
+
+
+def per_document_ms(agent: MedicalAnalysisAgent, number: int) -> float:
+    agent.analyze_document(DOCUMENT)
+    started = time.perf_counter()
+    for _ in range(number):
+        agent.analyze_document(DOCUMENT)
+    return (time.perf_counter() - started) / number * 1e3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=0.005, help="Stub server latency per request in seconds")
+    parser.add_argument("--number", type=int, default=40)
+    args = parser.parse_args()
+    
+    with KnowledgeBaseStubServer(latency=args.latency) as server:
+        transport = HTTPTransport(server.base_url, pool_size=8)
+        kb_client = MedicalKnowledgeBaseClient(transport=transport)
+        executor = ThreadPoolStageExecutor(max_workers=4)
+        agents = {
+            "sequential": MedicalAnalysisAgent(knowledge_base_client=kb_client),
+            "thread pool": MedicalAnalysisAgent(knowledge_base_client=kb_client, executor=executor),
+        }
+        
+        print(f"knowledge base latency {args.latency * 1e3:.1f} ms per request")
+        print(f"{'executor':>12} {'ms/doc':>8} {'speedup':>7}")
+        baseline = None
+        for name, agent in agents.items():
+            elapsed = per_document_ms(agent, args.number)
+            baseline = baseline or elapsed
+            print(f"{name:>12} {elapsed:>8.2f} {baseline / elapsed:>6.2f}x")
+        executor.shutdown()
+        transport.close()
+
+
+if __name__ == "__main__":
+    main()
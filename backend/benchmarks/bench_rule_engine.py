@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Compare the compiled rule table with per-keyword substring checks as the rule count grows.
+
+Run from the repository root:
+    PYTHONPATH=. python -m backend.benchmarks.bench_rule_engine
+"""
+
+import argparse
+import random
+import string
+import timeit
+
+from backend.app.services.rule_engine import RuleEngine
+from backend.benchmarks.corpus import generate_corpus
+
+
+def synthetic_rules(count: int, generator: random.Random):
+    return [
+        {
+            "keywords": ["".join(generator.choices(string.ascii_lowercase, k=generator.randint(5, 10)))
+                         for _ in range(4)],
+            "result": {"category": f"rule {index}"},
+        }
+        for index in range(count)
+    ]
+
+
+def substring_scan(rules, text: str):
+    """The previous approach: one substring search of the document per keyword per rule."""
+    text_lower = text.lower()
+    return [rule["result"] for rule in rules if any(keyword in text_lower for keyword in rule["keywords"])]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--rule-counts", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    
+    texts = [document.text for document in generate_corpus(args.documents, seed=0)]
+    generator = random.Random(0)
+    print(f"{args.documents} documents, {sum(map(len, texts)) // len(texts)} characters on average")
+    print(f"{'rules':>6} {'substring us':>13} {'rule table us':>14} {'speedup':>8}")
+    
+    for count in args.rule_counts:
+        rules = synthetic_rules(count, generator)
+        engine = RuleEngine({"red_flags": rules})
+        substring = min(timeit.repeat(lambda: [substring_scan(rules, text) for text in texts], number=1,
+                                      repeat=args.repeat)) / len(texts) * 1e6
+        compiled = min(timeit.repeat(lambda: [engine.evaluate("red_flags", [text]) for text in texts], number=1,
+                                     repeat=args.repeat)) / len(texts) * 1e6
+        print(f"{count:>6} {substring:>13.1f} {compiled:>14.1f} {substring / compiled:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Compare AnalysisResult JSON encoding and NDJSON throughput across backends.
+
+Run from the repository root:
+    PYTHONPATH=. python -m backend.benchmarks.bench_serialization
+"""
+
+import argparse
+import io
+import random
+import timeit
+
+from backend.app.schemas import AnalysisResult, ParsedDocument
+from backend.app.services import serialization
+from backend.app.services.medical_agent import MedicalAnalysisAgent
+from backend.benchmarks.corpus import generate_document
+
+
+def best_us(func, number: int, repeat: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
+
+
+def ndjson_round_trip(results, repeat: int) -> tuple:
+    """Best ``(write, read)`` throughput in results per second."""
+    handle = io.BytesIO()
+    write = min(timeit.repeat(lambda: serialization.write_ndjson(io.BytesIO(), results), number=1, repeat=repeat))
+    serialization.write_ndjson(handle, results)
+    read = min(timeit.repeat(lambda: sum(1 for _ in serialization.iter_ndjson(io.BytesIO(handle.getvalue()))),
+                             number=1, repeat=repeat))
+    return len(results) / write, len(results) / read
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--medications", type=int, default=40)
+    parser.add_argument("--number", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--lines", type=int, default=2000, help="Results per NDJSON batch")
+    args = parser.parse_args()
+    
+    agent = MedicalAnalysisAgent()
+    text = generate_document(random.Random(0), kind="discharge_summary", medications=args.medications, filler_lines=30)
+    result = agent.analyze_document(ParsedDocument(text=text))
+    payload = result.model_dump_json()
+    results = [result] * args.lines
+    print(f"{len(result.prescription_summary.items)} medications, {len(payload)} bytes of JSON")
+    
+    baseline = best_us(result.model_dump_json, args.number, args.repeat)
+    print(f"{'encoder':>22} {'us/result':>10} {'speedup':>8}")
+    print(f"{'model_dump_json':>22} {baseline:>10.1f} {1:>7.2f}x")
+    fast = serialization.orjson
+    backends = [("dumps (fallback)", None)]
+    if fast is not None:
+        backends.insert(0, ("dumps (orjson)", fast))
+    for name, module in backends:
+        serialization.orjson = module
+        per_result = best_us(lambda: serialization.dumps(result), args.number, args.repeat)
+        print(f"{name:>22} {per_result:>10.1f} {baseline / per_result:>7.2f}x")
+    serialization.orjson = fast
+    
+    decode = best_us(lambda: AnalysisResult.model_validate_json(payload), args.number, args.repeat)
+    print(f"{'model_validate_json':>22} {decode:>10.1f}")
+    
+    write, read = ndjson_round_trip(results, args.repeat)
+    print(f"NDJSON ({serialization.BACKEND}): write {write:,.0f} results/s, read {read:,.0f} results/s")
+
+
+if __name__ == "__main__":
+    main()
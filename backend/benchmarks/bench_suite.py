@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Run per-stage and end-to-end analysis benchmarks over a synthetic corpus.
+
+Run from the repository root:
+    PYTHONPATH=. python -m backend.benchmarks.bench_suite --save baseline.json
+    PYTHONPATH=. python -m backend.benchmarks.bench_suite --baseline baseline.json
+"""
+
+import argparse
+import json
+import math
+import platform
+import sys
+import time
+from typing import Callable, Dict, List, Sequence
+
+from backend.app.services.analysis_stream import SECTIONS
+from backend.app.services.medical_agent import MedicalAnalysisAgent
+from backend.app.services.result_cache import normalize_document_text
+from backend.benchmarks.corpus import generate_corpus
+
+
+HIGHER_IS_BETTER = ("docs_per_s",)
+
+# Tail percentiles are reported but too noisy on shared machines to gate on.
+CHECKED_METRICS = ("mean_us", "p50_us", "docs_per_s")
+
+
+def percentile(samples: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of a non-empty sample."""
+    ordered = sorted(samples)
+    rank = max(1, min(len(ordered), math.ceil(fraction * len(ordered))))
+    return ordered[rank - 1]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Latency statistics in microseconds for samples given in seconds."""
+    return {
+        "calls": len(samples),
+        "mean_us": sum(samples) / len(samples) * 1e6,
+        "p50_us": percentile(samples, 0.50) * 1e6,
+        "p90_us": percentile(samples, 0.90) * 1e6,
+        "p99_us": percentile(samples, 0.99) * 1e6,
+    }
+
+
+def time_calls(func: Callable, inputs: Sequence, repeat: int) -> List[float]:
+    """Time ``func(item)`` for every input, ``repeat`` times over."""
+    samples = []
+    clock = time.perf_counter
+    for _ in range(repeat):
+        for item in inputs:
+            started = clock()
+            func(item)
+            samples.append(clock() - started)
+    return samples
+
+
+def stage_benchmarks(agent: MedicalAnalysisAgent, texts: List[str], repeat: int) -> Dict[str, Dict[str, float]]:
+    """
+    Time each analysis stage on its own, with inputs precomputed from the corpus.
+    
+    Args:
+        agent: Agent under test
+        texts: Normalized document texts
+        repeat: Passes over the corpus per stage
+    
+    Returns:
+        Mapping of stage name to latency statistics
+    """
+    kb = agent.kb_client
+    medications = [agent._extract_medications_from_text(text) for text in texts]
+    prescriptions = [agent._parse_prescription_details(text, meds) for text, meds in zip(texts, medications)]
+    pairs = list(zip(texts, medications))
+    
+    stages = {
+        "extract_medications": (agent._extract_medications_from_text, texts),
+        "parse_prescription_details": (lambda pair: agent._parse_prescription_details(*pair), pairs),
+        "generate_timing_schedule": (agent._generate_timing_schedule, prescriptions),
+        "generate_suggestions": (lambda pair: agent._generate_suggestions(*pair), pairs),
+        "generate_insights": (lambda pair: agent._generate_insights(*pair), pairs),
+        "kb.get_medication_info_many": (kb.get_medication_info_many, medications),
+        "kb.check_interactions": (kb.check_interactions, medications),
+        "kb.identify_red_flags": (lambda pair: kb.identify_red_flags(*pair), pairs),
+        "kb.get_specialty_recommendations": (
+            lambda pair: kb.get_specialty_recommendations(pair[1] + [pair[0]]), pairs
+        ),
+    }
+    return {name: summarize(time_calls(func, inputs, repeat)) for name, (func, inputs) in stages.items()}
+
+
+def end_to_end_benchmark(agent: MedicalAnalysisAgent, documents: List, repeat: int) -> Dict[str, float]:
+    """Latency percentiles and throughput of analyze_document over the corpus."""
+    started = time.perf_counter()
+    samples = time_calls(agent.analyze_document, documents, repeat)
+    elapsed = time.perf_counter() - started
+    stats = summarize(samples)
+    stats["docs_per_s"] = len(samples) / elapsed
+    return stats
+
+
+def selective_benchmarks(agent: MedicalAnalysisAgent, documents: List, repeat: int) -> Dict[str, Dict[str, float]]:
+    """End-to-end statistics of analyze_document restricted to each single section."""
+    results = {}
+    for section in SECTIONS:
+        def analyze(document, section=section):
+            return agent.analyze_document(document, include=(section,))
+        started = time.perf_counter()
+        samples = time_calls(analyze, documents, repeat)
+        elapsed = time.perf_counter() - started
+        stats = summarize(samples)
+        stats["docs_per_s"] = len(samples) / elapsed
+        results[f"analyze_document[{section}]"] = stats
+    return results
+
+
+def run_suite(size: int = 200, seed: int = 0, repeat: int = 3, warmup: int = 1) -> Dict:
+    """
+    Run every benchmark and return a JSON-serializable report.
+    
+    Args:
+        size: Number of corpus documents
+        seed: Corpus seed
+        repeat: Timed passes over the corpus
+        warmup: Untimed passes run first
+    
+    Returns:
+        Report with ``meta`` and ``results`` keys
+    """
+    documents = generate_corpus(size, seed=seed)
+    texts = [normalize_document_text(document.text) for document in documents]
+    agent = MedicalAnalysisAgent()
+    
+    for _ in range(warmup):
+        for document in documents:
+            agent.analyze_document(document)
+    
+    results = stage_benchmarks(agent, texts, repeat)
+    results["analyze_document"] = end_to_end_benchmark(agent, documents, repeat)
+    results.update(selective_benchmarks(agent, documents, repeat))
+    return {
+        "meta": {
+            "corpus_size": size,
+            "seed": seed,
+            "repeat": repeat,
+            "corpus_chars": sum(len(text) for text in texts),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def compare(
+    current: Dict,
+    baseline: Dict,
+    tolerance: float = 0.25,
+    metrics: Sequence[str] = CHECKED_METRICS
+) -> List[str]:
+    """
+    List the metrics that regressed beyond ``tolerance`` against a baseline.
+    
+    Latencies regress when they grow by more than the tolerance, throughput
+    when it drops by more than it. Benchmarks missing from either report are
+    skipped.
+    
+    Args:
+        current: Report from run_suite
+        baseline: Previously saved report
+        tolerance: Allowed relative change, e.g. 0.25 for 25%
+        metrics: Metrics to check
+    
+    Returns:
+        Human-readable regression descriptions; empty when none regressed
+    """
+    regressions = []
+    for name, stats in current["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            continue
+        for metric in metrics:
+            if metric not in stats or not reference.get(metric):
+                continue
+            change = stats[metric] / reference[metric] - 1
+            worse = change < -tolerance if metric in HIGHER_IS_BETTER else change > tolerance
+            if worse:
+                regressions.append(
+                    f"{name} {metric}: {reference[metric]:.1f} -> {stats[metric]:.1f} ({change:+.0%})"
+                )
+    return regressions
+
+
+def print_report(report: Dict) -> None:
+    print(f"{'benchmark':<40} {'mean us':>10} {'p50 us':>10} {'p90 us':>10} {'p99 us':>10} {'docs/s':>9}")
+    for name, stats in report["results"].items():
+        throughput = f"{stats['docs_per_s']:>9.1f}" if "docs_per_s" in stats else f"{'':>9}"
+        print(
+            f"{name:<40} {stats['mean_us']:>10.1f} {stats['p50_us']:>10.1f} "
+            f"{stats['p90_us']:>10.1f} {stats['p99_us']:>10.1f} {throughput}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=200, help="Corpus documents")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", help="Write the report to this JSON file")
+    parser.add_argument("--baseline", help="Compare against this saved JSON report")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown")
+    parser.add_argument("--metrics", nargs="+", default=list(CHECKED_METRICS), help="Metrics compared to the baseline")
+    args = parser.parse_args()
+    
+    report = run_suite(args.size, args.seed, args.repeat)
+    print_report(report)
+    
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+    
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            regressions = compare(report, json.load(handle), args.tolerance, args.metrics)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Seeded generator of synthetic prescriptions and discharge summaries.
+
+The same seed always yields the same corpus, so benchmark runs on
+different revisions analyze identical documents.
+"""
+
+import random
+from typing import List, Optional, Tuple
+
+from backend.app.schemas import ParsedDocument
+
+
+KINDS = ("prescription", "discharge_summary")
+
+MEDICATIONS = [
+    "Amoxicillin", "Metformin", "Lisinopril", "Atorvastatin", "Aspirin", "Ibuprofen",
+    "Acetaminophen", "Omeprazole", "Levothyroxine", "Amlodipine", "Losartan", "Gabapentin",
+    "Warfarin", "Glucophage", "Lipitor", "Zestril", "Metoprolol", "Sertraline",
+    "Prednisone", "Furosemide", "Clopidogrel", "Simvastatin", "Hydrochlorothiazide", "Tramadol",
+    "Pantoprazole", "Escitalopram", "Rosuvastatin", "Montelukast", "Carvedilol", "Valsartan",
+    "Citalopram", "Pravastatin", "Tamsulosin", "Meloxicam", "Spironolactone", "Allopurinol",
+    "Cyclobenzaprine", "Glipizide", "Trazodone", "Duloxetine", "Venlafaxine", "Propranolol",
+    "Cetirizine", "Doxycycline", "Cephalexin", "Azithromycin", "Ondansetron", "Famotidine",
+]
+
+DOSAGES = ["5mg", "10mg", "20mg", "25mg", "40mg", "81mg", "250mg", "500mg", "850mg", "1000mg"]
+
+FREQUENCIES = [
+    "once daily", "twice daily", "three times daily", "2 times daily",
+    "every 8 hours", "every 12 hours",
+]
+
+DURATIONS = ["for 5 days", "for 7 days", "for 10 days", "for 2 weeks", "for 3 months"]
+
+INSTRUCTIONS = ["with food", "at bedtime", "in the morning", "before breakfast", "as needed for pain"]
+
+FILLER = [
+    "Patient reports improved sleep and appetite since the last visit.",
+    "Vital signs stable; temperature 36.8 C, pulse 72, respirations 16.",
+    "No known drug allergies documented at intake.",
+    "Discussed diet, exercise and weight management goals.",
+    "Follow up in clinic in 4 weeks to review progress.",
+    "Blood work ordered to check renal function and electrolytes.",
+    "Chest x-ray shows no acute cardiopulmonary process.",
+    "History of type 2 diabetes and blood pressure concerns.",
+    "Patient educated on warning signs requiring urgent review.",
+    "Wound site clean and dry with no signs of infection.",
+    "Allergies: penicillin (rash).",
+    "Family history of heart disease in first-degree relatives.",
+]
+
+DISCHARGE_HEADINGS = [
+    "Admission Diagnosis:", "Hospital Course:", "Procedures:", "Condition at Discharge:",
+    "Follow-up Instructions:",
+]
+
+
+def medication_line(rng: random.Random, name: str) -> str:
+    """One prescription line with dosage, frequency and optional duration."""
+    parts = [name, rng.choice(DOSAGES), rng.choice(FREQUENCIES)]
+    if rng.random() < 0.4:
+        parts.append(rng.choice(DURATIONS))
+    if rng.random() < 0.5:
+        parts.append(rng.choice(INSTRUCTIONS))
+    return " ".join(parts) + "."
+
+
+def generate_document(
+    rng: random.Random,
+    kind: str = "prescription",
+    medications: int = 4,
+    filler_lines: int = 8
+) -> str:
+    """
+    Generate the text of one synthetic document.
+    
+    Args:
+        rng: Random source; consumed deterministically
+        kind: One of KINDS
+        medications: Number of distinct medications prescribed
+        filler_lines: Number of narrative lines around the prescriptions
+    
+    Returns:
+        Document text
+    """
+    if kind not in KINDS:
+        raise ValueError(f"unknown document kind: {kind}")
+    names = rng.sample(MEDICATIONS, min(medications, len(MEDICATIONS)))
+    prescribed = [medication_line(rng, name) for name in names]
+    narrative = [rng.choice(FILLER) for _ in range(filler_lines)]
+    
+    if kind == "prescription":
+        lines = [f"Prescription #{rng.randint(10000, 99999)}", f"Date: 2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"]
+        lines += narrative[:filler_lines // 2] + ["Rx:"] + prescribed + narrative[filler_lines // 2:]
+        lines.append("Dr. A. Example, MD")
+        return "\n".join(lines)
+    
+    lines = ["DISCHARGE SUMMARY", f"Length of stay: {rng.randint(1, 14)} days"]
+    sections = len(DISCHARGE_HEADINGS)
+    for position, heading in enumerate(DISCHARGE_HEADINGS):
+        lines.append(heading)
+        lines += narrative[position * filler_lines // sections:(position + 1) * filler_lines // sections]
+    lines.append("Discharge Medications:")
+    lines += prescribed
+    return "\n".join(lines)
+
+
+def generate_corpus(
+    size: int,
+    seed: int = 0,
+    kind: Optional[str] = None,
+    medications: Tuple[int, int] = (1, 8),
+    filler_lines: Tuple[int, int] = (4, 40)
+) -> List[ParsedDocument]:
+    """
+    Generate a reproducible corpus of parsed documents.
+    
+    Args:
+        size: Number of documents
+        seed: Random seed
+        kind: Restrict to one of KINDS; alternates between them by default
+        medications: Inclusive range of medications per document
+        filler_lines: Inclusive range of narrative lines per document
+    
+    Returns:
+        List of ParsedDocument objects
+    """
+    rng = random.Random(seed)
+    documents = []
+    for index in range(size):
+        document_kind = kind or KINDS[index % len(KINDS)]
+        text = generate_document(
+            rng,
+            kind=document_kind,
+            medications=rng.randint(*medications),
+            filler_lines=rng.randint(*filler_lines)
+        )
+        documents.append(ParsedDocument(text=text, metadata={"kind": document_kind, "seed": seed, "index": index}))
+    return documents
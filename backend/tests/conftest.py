@@ -0,0 +1,11 @@
+import pytest
+
+from backend.app.services.medical_agent import reset_agent
+
+
+@pytest.fixture(autouse=True)
+def isolated_shared_agent():
+    """Give every test a fresh shared agent so configuration cannot leak."""
+    reset_agent()
+    yield
+    reset_agent()
@@ -0,0 +1,89 @@
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from backend.app.schemas import AnalysisResult, MedicationTimingSchedule, ParsedDocument
+from backend.app.services.analysis_records import (
+    AnalysisRecord,
+    InsightsRecord,
+    PrescriptionRecord,
+    SuggestionsRecord,
+    TimingScheduleRecord,
+    TimingSlotRecord,
+    section_model,
+    summarize_prescriptions,
+    to_analysis_result,
+)
+from backend.app.services.medical_agent import MedicalAnalysisAgent
+
+
+TEXT = "Metformin 500mg twice daily.\nWarfarin 5mg once daily. Urgent blood work; allergic to penicillin."
+
+
+class TestStageRecords:
+    """Internal stages produce records, not pydantic models."""
+    
+    def test_stage_outputs_are_records(self):
+        agent = MedicalAnalysisAgent()
+        medications = agent._extract_medications_from_text(TEXT)
+        
+        prescriptions = agent._parse_prescription_details(TEXT, medications)
+        outputs = [
+            *prescriptions,
+            agent._generate_timing_schedule(prescriptions),
+            agent._generate_suggestions(TEXT, medications),
+            agent._generate_insights(TEXT, medications),
+        ]
+        
+        assert all(isinstance(output, tuple) and not isinstance(output, BaseModel) for output in outputs)
+        assert isinstance(prescriptions[0], PrescriptionRecord)
+    
+    def test_result_matches_models_built_from_the_same_stages(self):
+        agent = MedicalAnalysisAgent()
+        medications = agent._extract_medications_from_text(TEXT)
+        prescriptions = agent._parse_prescription_details(TEXT, medications)
+        
+        record = AnalysisRecord(
+            summarize_prescriptions(prescriptions),
+            agent._generate_timing_schedule(prescriptions),
+            agent._generate_suggestions(TEXT, medications),
+            agent._generate_insights(TEXT, medications),
+            agent.kb_client.data_version
+        )
+        
+        assert to_analysis_result(record) == agent.analyze_document(ParsedDocument(text=TEXT))
+
+
+class TestBoundaryConversion:
+    """Tests for converting records into schemas models."""
+    
+    def test_nested_records_become_models(self):
+        record = AnalysisRecord(
+            summarize_prescriptions([PrescriptionRecord("Aspirin", "81mg", "once daily")]),
+            TimingScheduleRecord([TimingSlotRecord("08:00 AM", ["Aspirin 81mg"], "Take with water")]),
+            SuggestionsRecord([], []),
+            InsightsRecord([])
+        )
+        
+        result = to_analysis_result(record)
+        
+        assert isinstance(result, AnalysisResult)
+        assert result.prescription_summary.items[0].duration is None
+        assert result.medication_timing.schedule[0].medications == ["Aspirin 81mg"]
+        assert AnalysisResult.model_validate_json(result.model_dump_json()) == result
+    
+    def test_section_model_uses_the_field_type(self):
+        timing = section_model("medication_timing", TimingScheduleRecord([], "Follow schedule"))
+        
+        assert isinstance(timing, MedicationTimingSchedule)
+        assert timing.general_instructions == "Follow schedule"
+    
+    def test_conversion_validates_records(self):
+        record = AnalysisRecord(
+            summarize_prescriptions([PrescriptionRecord("Aspirin", None, "once daily")]),
+            TimingScheduleRecord([]),
+            SuggestionsRecord([], []),
+            InsightsRecord([])
+        )
+        
+        with pytest.raises(ValidationError):
+            to_analysis_result(record)
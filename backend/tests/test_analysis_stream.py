@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from backend.app.schemas import ParsedDocument, PrescriptionSummary
+from backend.app.services.analysis_stream import (
+    SECTIONS,
+    assemble_result,
+    format_ndjson,
+    format_sse,
+)
+from backend.app.services.medical_agent import MedicalAnalysisAgent, analyze_document_stream
+from backend.app.services.result_cache import InMemoryResultCache
+
+
+DOCUMENT = ParsedDocument(
+    text="Metformin 500mg twice daily for diabetes.\nWarfarin 5mg and Amoxicillin 500mg.\nUrgent follow-up.",
+    metadata={}
+)
+
+
+class TestAnalyzeDocumentStream:
+    """Tests for section-by-section streaming analysis."""
+    
+    def test_sections_arrive_in_order_and_match_full_result(self):
+        agent = MedicalAnalysisAgent()
+        
+        events = list(agent.analyze_document_stream(DOCUMENT))
+        
+        assert [event.section for event in events] == list(SECTIONS)
+        assembled = assemble_result(events, agent.kb_client.data_version)
+        assert assembled.model_dump() == agent.analyze_document(DOCUMENT).model_dump()
+    
+    def test_prescriptions_are_yielded_before_later_stages_run(self):
+        agent = MedicalAnalysisAgent()
+        calls = []
+        original = agent._generate_suggestions
+        agent._generate_suggestions = lambda text, medications: calls.append("suggestions") or original(text, medications)
+        
+        stream = agent.analyze_document_stream(DOCUMENT)
+        first = next(stream)
+        
+        assert isinstance(first.data, PrescriptionSummary)
+        assert first.data.total_medications == 3
+        assert calls == []
+        list(stream)
+        assert calls == ["suggestions"]
+    
+    def test_stream_uses_and_fills_result_cache(self):
+        agent = MedicalAnalysisAgent(result_cache=InMemoryResultCache())
+        
+        streamed = assemble_result(agent.analyze_document_stream(DOCUMENT))
+        agent._extract_medications_from_text = None
+        cached = assemble_result(agent.analyze_document_stream(DOCUMENT))
+        
+        assert len(agent.result_cache) == 1
+        assert cached.model_dump() == streamed.model_dump()
+    
+    def test_module_level_stream_uses_shared_agent(self):
+        assert [event.section for event in analyze_document_stream(DOCUMENT)] == list(SECTIONS)
+
+
+class TestStreamSerializers:
+    """Tests for NDJSON and SSE framing of stream events."""
+    
+    def test_ndjson_lines_round_trip(self):
+        events = list(MedicalAnalysisAgent().analyze_document_stream(DOCUMENT))
+        
+        lines = [format_ndjson(event) for event in events]
+        
+        assert all(line.endswith("\n") and line.count("\n") == 1 for line in lines)
+        decoded = [json.loads(line) for line in lines]
+        assert [item["event"] for item in decoded] == list(SECTIONS)
+        assert decoded[0]["data"] == events[0].data.model_dump()
+    
+    def test_sse_messages(self):
+        event = next(MedicalAnalysisAgent().analyze_document_stream(DOCUMENT))
+        
+        message = format_sse(event)
+        
+        assert message.startswith("event: prescription_summary\ndata: {")
+        assert message.endswith("\n\n")
+        assert json.loads(message.split("data: ", 1)[1]) == event.data.model_dump()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,133 @@
+import asyncio
+import time
+
+import pytest
+
+from backend.app.schemas import ParsedDocument, AnalysisResult
+from backend.app.services.async_knowledge_base_client import AsyncMedicalKnowledgeBaseClient
+from backend.app.services.kb_stub_server import KnowledgeBaseStubServer
+from backend.app.services.kb_transport import HTTPTransport
+from backend.app.services.knowledge_base_client import KnowledgeBaseError, MedicalKnowledgeBaseClient
+from backend.app.services.medical_agent import MedicalAnalysisAgent
+
+
+DOCUMENT = ParsedDocument(
+    text="""
+    Metformin 1000mg twice daily for diabetes.
+    Lisinopril 10mg once daily for blood pressure.
+    Warfarin 5mg and Amoxicillin 500mg three times daily for 7 days.
+    Patient allergic to sulfa drugs.
+    """,
+    metadata={}
+)
+
+
+@pytest.fixture
+def stub_server():
+    with KnowledgeBaseStubServer(latency=0.1) as server:
+        yield server
+
+
+class TestAsyncMedicalKnowledgeBaseClient:
+    """Tests for the async knowledge base client against the local stub server."""
+    
+    def test_remote_lookups_match_local_client(self, stub_server):
+        remote = AsyncMedicalKnowledgeBaseClient(base_url=stub_server.base_url)
+        local = stub_server.client
+        
+        async def run():
+            return await asyncio.gather(
+                remote.get_medication_info("Amoxicillin"),
+                remote.check_interactions(["Warfarin", "Amoxicillin"]),
+                remote.get_specialty_recommendations(["diabetes"]),
+                remote.identify_red_flags("urgent case", [])
+            )
+        
+        info, interactions, recommendations, red_flags = asyncio.run(run())
+        
+        assert info == local.get_medication_info("Amoxicillin")
+        assert interactions == local.check_interactions(["Warfarin", "Amoxicillin"])
+        assert recommendations == local.get_specialty_recommendations(["diabetes"])
+        assert red_flags == local.identify_red_flags("urgent case", [])
+    
+    def test_offline_client_uses_local_data(self):
+        client = AsyncMedicalKnowledgeBaseClient()
+        
+        info = asyncio.run(client.get_medication_info("Metformin"))
+        
+        assert info["class"] == "Antidiabetic"
+    
+    def test_http_errors_raise_knowledge_base_error(self, stub_server):
+        client = AsyncMedicalKnowledgeBaseClient(base_url=stub_server.base_url + "/missing")
+        
+        with pytest.raises(KnowledgeBaseError):
+            asyncio.run(client.check_interactions(["Aspirin"]))
+    
+    def test_timeout_raises_knowledge_base_error(self, stub_server):
+        client = AsyncMedicalKnowledgeBaseClient(base_url=stub_server.base_url, timeout=0.01)
+        
+        with pytest.raises(KnowledgeBaseError):
+            asyncio.run(client.get_medication_info("Aspirin"))
+
+
+class TestAnalyzeDocumentAsync:
+    """Tests for the asyncio analysis path."""
+    
+    def test_async_result_matches_sync_result(self, stub_server):
+        async_client = AsyncMedicalKnowledgeBaseClient(base_url=stub_server.base_url)
+        agent = MedicalAnalysisAgent(async_knowledge_base_client=async_client)
+        
+        result = asyncio.run(agent.analyze_document_async(DOCUMENT))
+        
+        assert isinstance(result, AnalysisResult)
+        assert result.model_dump_json() == agent.analyze_document(DOCUMENT).model_dump_json()
+    
+    def test_latency_bounded_by_slowest_call(self, stub_server):
+        async_client = AsyncMedicalKnowledgeBaseClient(base_url=stub_server.base_url)
+        agent = MedicalAnalysisAgent(async_knowledge_base_client=async_client)
+        
+        started = time.perf_counter()
+        asyncio.run(agent.analyze_document_async(DOCUMENT))
+        elapsed = time.perf_counter() - started
+        
+        sequential_latency = 0.1 * stub_server.request_count
+        assert stub_server.request_count == 4
+        assert elapsed < sequential_latency / 2
+    
+    def test_transport_backed_analyses_overlap(self, stub_server):
+        with HTTPTransport(stub_server.base_url) as transport:
+            agent = MedicalAnalysisAgent(knowledge_base_client=MedicalKnowledgeBaseClient(transport=transport))
+            ticks = 0
+            
+            async def tick():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.005)
+                    ticks += 1
+                    
+            async def run():
+                ticker = asyncio.create_task(tick())
+                started = time.perf_counter()
+                results = await asyncio.gather(*(agent.analyze_document_async(DOCUMENT) for _ in range(5)))
+                elapsed = time.perf_counter() - started
+                ticker.cancel()
+                return results, elapsed
+                
+            requests_before = stub_server.request_count
+            results, elapsed = asyncio.run(run())
+            
+        sequential_latency = 0.1 * (stub_server.request_count - requests_before)
+        assert all(result == results[0] for result in results)
+        assert elapsed < sequential_latency / 4
+        assert ticks >= elapsed / 0.005 / 2
+    
+    def test_async_without_remote_backend(self):
+        agent = MedicalAnalysisAgent()
+        
+        result = asyncio.run(agent.analyze_document_async(DOCUMENT))
+        
+        assert result.model_dump_json() == agent.analyze_document(DOCUMENT).model_dump_json()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
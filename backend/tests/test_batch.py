@@ -0,0 +1,106 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from backend.app.schemas import ParsedDocument
+from backend.app.services import batch
+from backend.app.services.batch import analyze_documents
+from backend.app.services.knowledge_base_client import MedicalKnowledgeBaseClient
+from backend.app.services.medical_agent import MedicalAnalysisAgent
+
+
+class ExplodingKnowledgeBaseClient(MedicalKnowledgeBaseClient):
+    """Knowledge base client that fails for one specific medication."""
+    
+    def get_medication_info(self, medication_name: str):
+        if medication_name.lower() == "explodamine":
+            raise RuntimeError("knowledge base unavailable")
+        return super().get_medication_info(medication_name)
+
+
+def make_documents():
+    return [
+        ParsedDocument(text="Metformin 500mg twice daily.", metadata={}),
+        ParsedDocument(text="Amoxicillin 500mg three times daily for 7 days.", metadata={}),
+        ParsedDocument(text="Explodamine 5mg once daily.", metadata={}),
+        ParsedDocument(text="Lisinopril 10mg once daily. Urgent follow-up.", metadata={}),
+        ParsedDocument(text="Warfarin 5mg and Amoxicillin 250mg.", metadata={}),
+    ]
+
+
+class TestAnalyzeDocuments:
+    """Tests for batch analysis over a process pool."""
+    
+    def test_ordered_results_match_sequential_analysis(self):
+        documents = [doc for doc in make_documents() if "Explodamine" not in doc.text]
+        agent = MedicalAnalysisAgent()
+        
+        results = list(analyze_documents(documents, workers=2, chunksize=2))
+        
+        assert [item.index for item in results] == list(range(len(documents)))
+        for item, parsed in zip(results, documents):
+            assert item.ok
+            assert item.result.model_dump_json() == agent.analyze_document(parsed).model_dump_json()
+    
+    def test_unordered_results_cover_every_document(self):
+        documents = make_documents()
+        
+        results = list(analyze_documents(documents, workers=2, chunksize=1, ordered=False))
+        
+        assert sorted(item.index for item in results) == list(range(len(documents)))
+    
+    def test_errors_are_captured_per_document(self):
+        documents = make_documents()
+        
+        results = list(analyze_documents(
+            documents,
+            workers=2,
+            chunksize=2,
+            knowledge_base_factory=ExplodingKnowledgeBaseClient
+        ))
+        
+        failed = [item for item in results if not item.ok]
+        assert [item.index for item in failed] == [2]
+        assert "knowledge base unavailable" in failed[0].error
+        assert all(item.result is not None for item in results if item.ok)
+        assert len(results) == len(documents)
+    
+    def test_single_worker_runs_in_process(self):
+        documents = make_documents()[:2]
+        
+        results = list(analyze_documents(iter(documents), workers=1))
+        
+        assert len(results) == 2
+        assert all(item.ok for item in results)
+    
+    def test_single_worker_leaves_the_worker_agent_alone(self, monkeypatch):
+        monkeypatch.setattr(batch, "_worker_agent", None)
+        
+        results = list(analyze_documents(
+            make_documents(),
+            workers=1,
+            knowledge_base_factory=ExplodingKnowledgeBaseClient
+        ))
+        
+        assert [item.index for item in results if not item.ok] == [2]
+        assert batch._worker_agent is None
+    
+    def test_broken_pool_at_submit_is_reported_per_document(self, monkeypatch):
+        def broken_submit(self, *args, **kwargs):
+            raise BrokenProcessPool("a worker process died")
+            
+        monkeypatch.setattr(ProcessPoolExecutor, "submit", broken_submit)
+        
+        results = list(analyze_documents(make_documents(), workers=2, chunksize=2))
+        
+        assert [item.index for item in results] == list(range(5))
+        assert all(item.error == "BrokenProcessPool: a worker process died" for item in results)
+    
+    def test_rejects_invalid_chunksize(self):
+        with pytest.raises(ValueError):
+            list(analyze_documents(make_documents(), chunksize=0))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from backend.app.services.medical_agent import MedicalAnalysisAgent
+from backend.benchmarks.bench_suite import compare, percentile, run_suite
+from backend.benchmarks.corpus import KINDS, generate_corpus, generate_document
+
+
+class TestCorpus:
+    """Tests for the synthetic document generator."""
+    
+    def test_same_seed_gives_same_corpus(self):
+        first = generate_corpus(20, seed=3)
+        second = generate_corpus(20, seed=3)
+        
+        assert [doc.text for doc in first] == [doc.text for doc in second]
+        assert [doc.text for doc in first] != [doc.text for doc in generate_corpus(20, seed=4)]
+    
+    def test_kinds_alternate_by_default(self):
+        corpus = generate_corpus(4)
+        
+        assert [doc.metadata["kind"] for doc in corpus] == list(KINDS) * 2
+        assert corpus[1].text.startswith("DISCHARGE SUMMARY")
+    
+    @pytest.mark.parametrize("kind", KINDS)
+    def test_prescribed_medications_are_extracted(self, kind):
+        agent = MedicalAnalysisAgent()
+        text = generate_document(random.Random(1), kind=kind, medications=6, filler_lines=12)
+        
+        items = agent._parse_prescription_details(text, agent._extract_medications_from_text(text))
+        
+        assert len(items) >= 6
+        assert all(item.dosage.endswith("mg") for item in items)
+    
+    def test_rejects_unknown_kind(self):
+        with pytest.raises(ValueError):
+            generate_document(random.Random(0), kind="referral")
+
+
+class TestRegressionCheck:
+    """Tests for baseline comparison."""
+    
+    def test_percentile_uses_nearest_rank(self):
+        samples = list(range(1, 101))
+        
+        assert percentile(samples, 0.5) == 50
+        assert percentile(samples, 0.99) == 99
+        assert percentile([7.0], 0.9) == 7.0
+    
+    def test_flags_slower_latency_and_lower_throughput(self):
+        baseline = {"results": {"stage": {"mean_us": 100.0, "p50_us": 90.0}, "e2e": {"mean_us": 10.0, "docs_per_s": 1000.0}}}
+        current = {"results": {"stage": {"mean_us": 140.0, "p50_us": 95.0}, "e2e": {"mean_us": 10.0, "docs_per_s": 700.0}}}
+        
+        regressions = compare(current, baseline, tolerance=0.25)
+        
+        assert len(regressions) == 2
+        assert regressions[0].startswith("stage mean_us")
+        assert regressions[1].startswith("e2e docs_per_s")
+    
+    def test_improvements_and_new_benchmarks_pass(self):
+        baseline = {"results": {"stage": {"mean_us": 100.0, "p50_us": 100.0}}}
+        current = {"results": {"stage": {"mean_us": 50.0, "p50_us": 50.0}, "new_stage": {"mean_us": 1.0}}}
+        
+        assert compare(current, baseline) == []
+    
+    def test_suite_report_covers_stages_and_end_to_end(self):
+        report = run_suite(size=4, repeat=1, warmup=0)
+        
+        assert report["meta"]["corpus_size"] == 4
+        assert {"extract_medications", "parse_prescription_details", "generate_timing_schedule",
+                "kb.get_medication_info_many", "analyze_document"} <= set(report["results"])
+        assert report["results"]["analyze_document"]["calls"] == 4
+        assert report["results"]["analyze_document"]["docs_per_s"] > 0
+        assert report["results"]["analyze_document[additional_insights]"]["calls"] == 4
+        assert compare(report, report) == []
@@ -0,0 +1,133 @@
+from concurrent.futures import ThreadPoolExecutor
+import io
+
+import pytest
+
+from backend.app.schemas import ParsedDocument
+from backend.app.services.chunked_analysis import analyze_document_chunked, analyze_file_chunked, iter_windows
+from backend.app.services.knowledge_base_client import MedicalKnowledgeBaseClient
+from backend.app.services.medical_agent import MedicalAnalysisAgent
+
+
+LINES = [
+    "Patient history: type 2 diabetes, blood pressure review.",
+    "Metformin 500mg twice daily for 30 days.",
+    "Lisinopril 10mg once daily.",
+    "Zyrtec",
+    "25 mg with breakfast.",
+    "Allergies: penicillin causes adverse reaction.",
+    "Order blood work and a chest x-ray.",
+    "Warfarin 5mg once daily; monitor INR.",
+    "Amoxicillin 500mg every 8 hours for 7 days (antibiotic).",
+    "Metformin dose unchanged at 1000 mg.",
+    "Seek emergency care for severe chest pain.",
+]
+
+DOCUMENT = ParsedDocument(text="\r\n".join(LINES * 3), metadata={})
+
+
+class TestIterWindows:
+    """Tests for line-aligned window splitting."""
+    
+    def test_cores_cover_the_document_exactly(self):
+        text = "\n".join(LINES) + "\n"
+        
+        windows = list(iter_windows(io.StringIO(text), window_size=100, overlap=30))
+        
+        assert len(windows) > 1
+        assert "".join(window.core for window in windows) == text
+        for window in windows:
+            assert window.core.endswith("\n")
+            assert text[window.start:window.start + len(window.text)] == window.text
+            assert len(window.text) - window.core_length >= min(30, len(text) - window.start - window.core_length)
+    
+    def test_long_line_forms_its_own_window(self):
+        text = "x" * 50 + "\nshort\n"
+        
+        windows = list(iter_windows(io.StringIO(text), window_size=10, overlap=0))
+        
+        assert [window.core for window in windows] == ["x" * 50 + "\n", "short\n"]
+    
+    def test_lookahead_reaches_next_non_blank_line(self):
+        text = "first\n\n\nsecond\nthird\n"
+        
+        windows = list(iter_windows(io.StringIO(text), window_size=6, overlap=0))
+        
+        assert windows[0].text == "first\n\n\nsecond\n"
+        assert "".join(window.core for window in windows) == text
+    
+    def test_empty_input_has_no_windows(self):
+        assert list(iter_windows(io.StringIO(""))) == []
+
+
+class TestAnalyzeDocumentChunked:
+    """Tests for chunked analysis against whole-document analysis."""
+    
+    @pytest.mark.parametrize("window_size", [16, 64, 200, 1 << 16])
+    def test_matches_whole_document_analysis(self, window_size):
+        agent = MedicalAnalysisAgent()
+        
+        chunked = analyze_document_chunked(DOCUMENT, agent=agent, window_size=window_size, overlap=32)
+        
+        assert chunked.model_dump() == agent.analyze_document(DOCUMENT).model_dump()
+    
+    def test_medication_split_across_windows_is_found(self):
+        agent = MedicalAnalysisAgent()
+        
+        result = analyze_document_chunked(DOCUMENT, agent=agent, window_size=16, overlap=32)
+        
+        names = [item.medication_name for item in result.prescription_summary.items]
+        assert "Zyrtec" in names
+    
+    def test_parallel_workers_match_in_process(self):
+        agent = MedicalAnalysisAgent()
+        
+        parallel = analyze_document_chunked(
+            DOCUMENT, agent=agent, window_size=64, overlap=32, workers=2,
+            knowledge_base_factory=MedicalKnowledgeBaseClient
+        )
+        
+        assert parallel.model_dump() == agent.analyze_document(DOCUMENT).model_dump()
+    
+    def test_parallel_workers_need_the_agents_knowledge_base(self):
+        with pytest.raises(ValueError):
+            analyze_document_chunked(DOCUMENT, agent=MedicalAnalysisAgent(), workers=2)
+    
+    def test_attributes_bind_forward_without_overlap(self):
+        agent = MedicalAnalysisAgent()
+        text = "Lisinopril 5mg twice daily.\nIbu.afen 5mg every 12 hours for 5 days."
+        parsed = ParsedDocument(text=text, metadata={})
+        
+        result = analyze_document_chunked(parsed, agent=agent, window_size=50, overlap=0)
+        
+        assert result.model_dump() == agent.analyze_document(parsed).model_dump()
+    
+    def test_concurrent_analyses_bind_their_own_medications(self):
+        agent = MedicalAnalysisAgent()
+        documents = [DOCUMENT, ParsedDocument(text="\n".join(LINES[7:9] * 20), metadata={})]
+        expected = [agent.analyze_document(document).model_dump() for document in documents]
+        
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(
+                lambda index: analyze_document_chunked(documents[index % 2], agent=agent, window_size=64, overlap=32),
+                range(40)
+            ))
+            
+        assert [result.model_dump() for result in results] == [expected[index % 2] for index in range(40)]
+    
+    def test_file_is_streamed_from_disk(self, tmp_path):
+        agent = MedicalAnalysisAgent()
+        path = tmp_path / "document.txt"
+        path.write_bytes(DOCUMENT.text.encode("utf-8"))
+        
+        result = analyze_file_chunked(str(path), agent=agent, window_size=64)
+        
+        assert result.model_dump() == agent.analyze_document(DOCUMENT).model_dump()
+    
+    def test_document_without_medications(self):
+        agent = MedicalAnalysisAgent()
+        parsed = ParsedDocument(text="Routine visit.\nNo changes.", metadata={})
+        
+        result = analyze_document_chunked(parsed, agent=agent, window_size=8, overlap=0)
+        
+        assert result.model_dump() == agent.analyze_document(parsed).model_dump()
@@ -0,0 +1,88 @@
+from backend.app.schemas import ParsedDocument
+from backend.app.services.document_context import DocumentContext, Token, document_text
+from backend.app.services.knowledge_base_client import MedicalKnowledgeBaseClient
+from backend.app.services.medical_agent import MedicalAnalysisAgent
+from backend.app.services.medication_scanner import MedicationScanner
+from backend.app.services.rule_engine import RULE_FACILITIES, RULE_RED_FLAGS, RULE_SPECIALTIES
+
+
+TEXT = (
+    "Metformin 500mg twice daily for blood sugar.\n"
+    "Amoxicillin 250mg three times daily. Urgent X-ray needed!\n"
+    "Allergic to penicillin; avoid NSAIDs."
+)
+
+
+class TestDocumentContext:
+    """Tests for the shared per-analysis document context."""
+    
+    def test_views_of_the_text(self):
+        document = DocumentContext(TEXT)
+        
+        assert len(document) == len(TEXT)
+        assert document.lowered == TEXT.lower()
+        assert document.folded is document.lowered
+        assert document.tokens[:3] == (Token(0, 9, "metformin"), Token(10, 15, "500mg"), Token(16, 21, "twice"))
+        assert all(TEXT[token.start:token.end].lower() == token.text for token in document.tokens)
+        assert document.line_starts == (0, 45, 103)
+        assert document.line_of(50) == 1
+        assert [document.segment_of(TEXT.index(word)) for word in ("blood", "Urgent", "avoid")] == [0, 3, 6]
+    
+    def test_folded_view_keeps_offsets_aligned(self):
+        document = DocumentContext("İbuprofen 200mg")
+        
+        assert len(document.lowered) == len(document.text) + 1
+        assert len(document.folded) == len(document.text)
+        assert [token.start for token in document.tokens] == [0, 10]
+    
+    def test_views_are_built_once(self):
+        document = DocumentContext(TEXT)
+        builds = []
+        
+        first = document.derived("view", lambda: builds.append(1) or object())
+        
+        assert document.derived("view", lambda: builds.append(1) or object()) is first
+        assert document.lowered is document.lowered
+        assert len(builds) == 1
+    
+    def test_of_and_document_text_accept_either_form(self):
+        document = DocumentContext(TEXT)
+        
+        assert DocumentContext.of(document) is document
+        assert DocumentContext.of(TEXT).text == TEXT
+        assert document_text(document) == document_text(TEXT) == TEXT
+
+
+class TestDocumentContextConsumers:
+    """Tests for stages and knowledge base methods taking a DocumentContext."""
+    
+    def test_rule_kinds_share_one_scan_of_the_document(self):
+        engine = MedicalKnowledgeBaseClient().rule_engine
+        document = DocumentContext(TEXT)
+        scanned = []
+        scan = engine._scan
+        engine._scan = lambda lowered: scanned.append(lowered) or scan(lowered)
+        
+        for kind in (RULE_SPECIALTIES, RULE_FACILITIES, RULE_RED_FLAGS):
+            engine.evaluate(kind, document)
+            
+        assert scanned == [document.lowered]
+    
+    def test_knowledge_base_answers_match_raw_text(self):
+        client = MedicalKnowledgeBaseClient()
+        document = DocumentContext(TEXT)
+        
+        assert client.identify_red_flags(document, ["Metformin"]) == client.identify_red_flags(TEXT, ["Metformin"])
+        assert client.get_specialty_recommendations(["Metformin", document]) == \
+            client.get_specialty_recommendations(["Metformin", TEXT])
+        assert MedicationScanner(["amoxicillin"]).find_all(document) == MedicationScanner(["amoxicillin"]).find_all(TEXT)
+    
+    def test_stages_share_the_pipeline_document(self):
+        agent = MedicalAnalysisAgent()
+        
+        values = agent.run_pipeline(ParsedDocument(text=TEXT))
+        document = values["document"]
+        
+        assert isinstance(document, DocumentContext) and document.text == values["text"]
+        assert agent.kb_client.rule_engine in document._derived
+        assert values["additional_insights"] == agent._generate_insights(TEXT, values["medications"])
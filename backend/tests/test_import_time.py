@@ -0,0 +1,42 @@
+import pytest
+
+from backend.benchmarks.bench_import_time import cumulative_ms, measure_import
+from backend.app.services.medical_agent import MedicalAnalysisAgent, PRESCRIPTION_EXTRACTION_TEMPLATE
+
+
+IMPORT_BUDGET_MS = 250.0
+
+
+class TestColdStart:
+    """Import-time budget for the rule-based analysis path."""
+    
+    @pytest.mark.parametrize("module", [
+        "backend.app.services.medical_agent",
+        "backend.app.services.batch",
+    ])
+    def test_heavy_dependencies_are_not_imported(self, module):
+        _, loaded = measure_import(module)
+        
+        assert loaded == []
+    
+    def test_import_stays_within_budget(self):
+        assert cumulative_ms("backend.app.services.medical_agent") < IMPORT_BUDGET_MS
+
+
+class TestLazyPrompts:
+    """Prompt templates are still available when an LLM path needs them."""
+    
+    def test_prompts_are_built_on_first_access(self):
+        agent = MedicalAnalysisAgent()
+        
+        assert "prescription_extraction_prompt" not in vars(agent)
+        prompt = agent.prescription_extraction_prompt
+        
+        assert prompt is agent.prescription_extraction_prompt
+        assert prompt.template == PRESCRIPTION_EXTRACTION_TEMPLATE
+        assert "Aspirin 81mg" in prompt.format(document_text="Aspirin 81mg")
+        assert agent.insights_prompt.input_variables == ["document_text", "interactions", "medications"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,156 @@
+import pytest
+
+from backend.app.schemas import ParsedDocument
+from backend.app.services.incremental import IncrementalAnalyzer, TextEdit, diff_texts
+from backend.app.services.medical_agent import MedicalAnalysisAgent
+
+
+LINES = [
+    "Patient history: type 2 diabetes, blood pressure review.",
+    "Metformin 500mg twice daily for 30 days.",
+    "Lisinopril 10mg once daily.",
+    "Order blood work.",
+    "Amoxicillin 500mg every 8 hours for 7 days.",
+]
+
+TEXT = "\n".join(LINES * 4)
+
+
+def full_result(agent, text):
+    return agent.analyze_document(ParsedDocument(text=text))
+
+
+@pytest.fixture
+def agent():
+    return MedicalAnalysisAgent()
+
+
+@pytest.fixture
+def analyzer(agent):
+    return IncrementalAnalyzer(agent, block_size=120, overlap=40)
+
+
+class TestIncrementalAnalyzer:
+    """Tests for re-analysis of edited documents."""
+    
+    def test_initial_state_matches_full_analysis(self, agent, analyzer):
+        state = analyzer.analyze(ParsedDocument(text=TEXT.replace("\n", "\r\n")))
+        
+        assert state.text == TEXT
+        assert len(state.blocks) > 1
+        assert state.result == full_result(agent, TEXT)
+    
+    @pytest.mark.parametrize("edit", [
+        TextEdit(len(TEXT), len(TEXT), "\nWarfarin 5mg once daily. Seek emergency care."),
+        TextEdit(0, 0, "Allergies: penicillin.\n"),
+        TextEdit(TEXT.index("Lisinopril"), TEXT.index("Lisinopril") + len("Lisinopril 10mg"), "Aspirin 81mg"),
+        TextEdit(TEXT.index("Order"), TEXT.index("Amoxicillin"), ""),
+        TextEdit(100, 100, "\n"),
+    ])
+    def test_update_matches_full_analysis(self, agent, analyzer, edit):
+        state = analyzer.analyze(ParsedDocument(text=TEXT))
+        
+        updated = analyzer.update(state, edit)
+        
+        assert updated.text == TEXT[:edit.start] + edit.replacement + TEXT[edit.end:]
+        assert updated.result == full_result(agent, updated.text)
+    
+    def test_medication_split_across_blocks(self, agent):
+        analyzer = IncrementalAnalyzer(agent, block_size=60, overlap=40)
+        state = analyzer.analyze(ParsedDocument(text="Order blood work for the review.\nZyrtec"))
+        
+        updated = analyzer.append(state, "\n25 mg with breakfast.")
+        
+        assert "Zyrtec" in [item.medication_name for item in updated.result.prescription_summary.items]
+        assert updated.result == full_result(agent, updated.text)
+    
+    def test_edit_to_next_line_rebinds_forward(self, agent):
+        analyzer = IncrementalAnalyzer(agent, block_size=20, overlap=20)
+        text = "Order blood work.\nZyrtec\n25 mg with breakfast.\nLisinopril 10mg once daily."
+        state = analyzer.analyze(ParsedDocument(text=text))
+        
+        updated = analyzer.update(state, TextEdit(text.index("25 mg"), text.index("25 mg") + 2, "50"))
+        
+        dosages = {item.medication_name: item.dosage for item in updated.result.prescription_summary.items}
+        assert dosages["Zyrtec"] == "50 mg"
+        assert updated.result == full_result(agent, updated.text)
+    
+    @pytest.mark.parametrize("text", [
+        "Lisinopril 5mg twice daily.\nIbu.afen 5mg every 12 hours for 5 days.",
+        "Zyrtec\n\n\n25 mg with breakfast.",
+    ])
+    def test_attributes_bind_forward_without_overlap(self, agent, text):
+        analyzer = IncrementalAnalyzer(agent, block_size=20, overlap=0)
+        state = analyzer.analyze(ParsedDocument(text="Order blood work."))
+        
+        updated = analyzer.append(state, "\n" + text)
+        
+        assert analyzer.analyze(ParsedDocument(text=updated.text)).result == full_result(agent, updated.text)
+        assert updated.result == full_result(agent, updated.text)
+    
+    def test_only_new_medications_and_pairs_reach_the_knowledge_base(self, agent, analyzer):
+        state = analyzer.analyze(ParsedDocument(text=TEXT))
+        lookups, checks = [], []
+        kb = agent.kb_client
+        get_many, check = kb.get_medication_info_many, kb.check_interactions
+        kb.get_medication_info_many = lambda names: lookups.append(list(names)) or get_many(names)
+        kb.check_interactions = lambda medications: checks.append(list(medications)) or check(medications)
+        
+        updated = analyzer.append(state, "\nWarfarin 5mg once daily.")
+        
+        assert lookups == [["Warfarin"]]
+        assert all("Warfarin" in pair and len(pair) == 2 for pair in checks)
+        assert len(checks) == len(state.medications)
+        assert any(flag.category == "Drug Interaction" for flag in updated.result.additional_insights.red_flags)
+    
+    def test_unchanged_blocks_are_reused(self, analyzer):
+        state = analyzer.analyze(ParsedDocument(text=TEXT))
+        
+        updated = analyzer.append(state, "\nFollow-up in two weeks.")
+        
+        assert updated.blocks[:-2] == state.blocks[:-2]
+        assert all(new.scan is old.scan for new, old in zip(updated.blocks[:-2], state.blocks))
+    
+    def test_previous_state_is_left_intact(self, agent, analyzer):
+        state = analyzer.analyze(ParsedDocument(text=TEXT))
+        before = state.result.model_dump()
+        
+        analyzer.append(state, "\nWarfarin 5mg once daily.")
+        
+        assert state.result.model_dump() == before
+        assert "Warfarin" not in state.medication_infos
+    
+    def test_update_text_diffs_against_previous_version(self, agent, analyzer):
+        state = analyzer.analyze(ParsedDocument(text=TEXT))
+        edited = TEXT.replace("Order blood work.", "Urgent: order blood work and an MRI.", 1)
+        
+        updated = analyzer.update_text(state, edited)
+        
+        assert updated.result == full_result(agent, edited)
+    
+    def test_edit_outside_document_is_rejected(self, analyzer):
+        state = analyzer.analyze(ParsedDocument(text="Metformin 500mg"))
+        
+        with pytest.raises(ValueError):
+            analyzer.update(state, TextEdit(10, 40, ""))
+
+
+class TestDiffTexts:
+    """Tests for single-edit text diffs."""
+    
+    @pytest.mark.parametrize("old,new,expected", [
+        ("abc", "abc", TextEdit(3, 3, "")),
+        ("abc", "abXc", TextEdit(2, 2, "X")),
+        ("abcdef", "abef", TextEdit(2, 4, "")),
+        ("", "new", TextEdit(0, 0, "new")),
+        ("aaaa", "aa", TextEdit(2, 4, "")),
+    ])
+    def test_smallest_edit(self, old, new, expected):
+        assert diff_texts(old, new) == expected
+    
+    def test_long_texts(self):
+        old = "x" * 10000 + "middle" + "y" * 10000
+        
+        edit = diff_texts(old, old.replace("middle", "center"))
+        
+        assert edit == TextEdit(10000, 10006, "center")
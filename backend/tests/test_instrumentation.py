@@ -0,0 +1,172 @@
+import asyncio
+import json
+
+import pytest
+
+from backend.app.schemas import ParsedDocument
+from backend.app.services.instrumentation import (
+    KIND_CLIENT,
+    NO_INSTRUMENTATION,
+    HistogramAggregator,
+    OTLPJsonFileExporter,
+    SpanRecord,
+    Tracer,
+)
+from backend.app.services.medical_agent import MedicalAnalysisAgent
+
+
+DOCUMENT = ParsedDocument(
+    text="Metformin 500mg twice daily for diabetes.\nWarfarin 5mg daily.\nUrgent blood work.",
+    metadata={}
+)
+
+STAGES = {
+    "extract_medications",
+    "parse_prescription_details",
+    "generate_timing_schedule",
+    "generate_suggestions",
+    "generate_insights",
+}
+
+
+def traced_agent():
+    spans = []
+    return MedicalAnalysisAgent(instrumentation=Tracer(spans.append)), spans
+
+
+def by_name(spans, span_id):
+    return next((span.name for span in spans if span.span_id == span_id), "")
+
+
+class TestTracing:
+    """Tests for stage and knowledge base spans."""
+    
+    def test_default_agent_is_not_instrumented(self):
+        agent = MedicalAnalysisAgent()
+        
+        assert agent.instrumentation is NO_INSTRUMENTATION
+        assert type(agent.kb_client).__name__ == "MedicalKnowledgeBaseClient"
+    
+    def test_stages_nest_under_the_document_span(self):
+        agent, spans = traced_agent()
+        spans.clear()
+        
+        agent.analyze_document(DOCUMENT)
+        
+        root = spans[-1]
+        stages = [span for span in spans if span.name in STAGES]
+        assert root.name == "analyze_document"
+        assert root.parent_span_id is None
+        assert root.attributes == {"input_size": len(DOCUMENT.text), "output_count": 2}
+        assert {span.name for span in stages} == STAGES
+        assert all(span.parent_span_id == root.span_id for span in stages)
+        assert {span.trace_id for span in spans} == {root.trace_id}
+        assert all(span.wall_ns <= root.wall_ns for span in spans)
+    
+    def test_knowledge_base_calls_are_client_spans_of_their_stage(self):
+        agent, spans = traced_agent()
+        spans.clear()
+        
+        agent.analyze_document(DOCUMENT)
+        
+        by_id = {span.span_id: span for span in spans}
+        kb_spans = [span for span in spans if span.name.startswith("kb.")]
+        assert {span.name for span in kb_spans} == {
+            "kb.get_medication_info_many",
+            "kb.get_specialty_recommendations",
+            "kb.identify_red_flags",
+            "kb.check_interactions",
+        }
+        assert all(span.kind == KIND_CLIENT for span in kb_spans)
+        parent = by_id[next(span for span in kb_spans if span.name == "kb.get_medication_info_many").parent_span_id]
+        assert parent.name == "parse_prescription_details"
+        assert parent.attributes["output_count"] == 2
+    
+    def test_failed_stage_records_error(self):
+        agent, spans = traced_agent()
+        agent.kb_client.wrapped.check_interactions = None
+        
+        with pytest.raises(TypeError):
+            agent.analyze_document(DOCUMENT)
+            
+        failed = {span.name for span in spans if span.error}
+        assert failed == {"kb.check_interactions", "generate_insights", "analyze_document"}
+    
+    def test_async_analysis_is_traced(self):
+        agent, spans = traced_agent()
+        spans.clear()
+        
+        asyncio.run(agent.analyze_document_async(DOCUMENT))
+        
+        root = spans[-1]
+        assert root.name == "analyze_document"
+        assert STAGES <= {span.name for span in spans}
+        assert all(span.trace_id == root.trace_id for span in spans)
+        assert any(span.name.startswith("kb.") and span.kind == KIND_CLIENT for span in spans)
+        assert not any(span.name.startswith("kb.") and by_name(spans, span.parent_span_id).startswith("kb.") for span in spans)
+
+
+class TestHistogramAggregator:
+    """Tests for the per-span latency histogram."""
+    
+    def test_summary_per_stage(self):
+        histogram = HistogramAggregator()
+        agent = MedicalAnalysisAgent(instrumentation=Tracer(histogram))
+        histogram.reset()
+        
+        for _ in range(5):
+            agent.analyze_document(DOCUMENT)
+            
+        summary = histogram.summary()
+        assert summary["analyze_document"]["count"] == 5
+        assert summary["extract_medications"]["count"] == 5
+        stats = summary["analyze_document"]
+        assert 0 < stats["p50_us"] <= stats["p99_us"] <= stats["max_us"]
+        assert stats["errors"] == 0
+    
+    def test_percentiles_use_bucket_upper_bounds(self):
+        histogram = HistogramAggregator()
+        
+        for wall_us in [3] * 90 + [700] * 10:
+            histogram(SpanRecord("stage", "internal", "t", "s", None, 0, 0, wall_us * 1000, 0, {}, None))
+            
+        assert histogram.percentile("stage", 0.5) == 5
+        assert histogram.percentile("stage", 0.9) == 5
+        assert histogram.percentile("stage", 0.99) == 700
+
+
+class TestOTLPJsonFileExporter:
+    """Tests for the OpenTelemetry span file exporter."""
+    
+    def test_writes_otlp_json_lines(self, tmp_path):
+        path = tmp_path / "spans.jsonl"
+        with OTLPJsonFileExporter(str(path), batch_size=1000) as exporter:
+            agent = MedicalAnalysisAgent(instrumentation=Tracer(exporter))
+            agent.analyze_document(DOCUMENT)
+            
+        lines = path.read_text().splitlines()
+        assert len(lines) == 1
+        resource_spans = json.loads(lines[0])["resourceSpans"][0]
+        assert resource_spans["resource"]["attributes"][0]["value"] == {"stringValue": "medical-analysis-agent"}
+        spans = resource_spans["scopeSpans"][0]["spans"]
+        root = next(span for span in spans if span["name"] == "analyze_document")
+        kb_span = next(span for span in spans if span["name"] == "kb.check_interactions")
+        assert len(root["traceId"]) == 32 and len(root["spanId"]) == 16
+        assert "parentSpanId" not in root
+        assert kb_span["kind"] == 3 and kb_span["parentSpanId"]
+        assert int(root["endTimeUnixNano"]) >= int(root["startTimeUnixNano"])
+        assert {"key": "output_count", "value": {"intValue": "2"}} in root["attributes"]
+        assert root["status"] == {"code": 1}
+    
+    def test_flushes_full_batches(self, tmp_path):
+        path = tmp_path / "spans.jsonl"
+        exporter = OTLPJsonFileExporter(str(path), batch_size=2)
+        tracer = Tracer(exporter)
+        
+        for _ in range(3):
+            with tracer.span("stage"):
+                pass
+                
+        assert len(path.read_text().splitlines()) == 1
+        exporter.close()
+        assert len(path.read_text().splitlines()) == 2
@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+from backend.app.services.interaction_graph import InteractionGraph
+from backend.app.services.knowledge_base_client import MedicalKnowledgeBaseClient
+
+
+def edge(first, second, severity="moderate"):
+    return {
+        "medications": [first, second],
+        "severity": severity,
+        "description": f"{first} with {second}",
+        "action": "Review",
+    }
+
+
+class TestInteractionGraph:
+    """Tests for the pairwise drug interaction graph."""
+    
+    def test_direct_edge_is_symmetric(self):
+        graph = InteractionGraph([edge("warfarin", "amoxicillin")])
+        
+        forward = graph.check([("Warfarin", "warfarin"), ("Amoxicillin", "amoxicillin")])
+        backward = graph.check([("Amoxicillin", "amoxicillin"), ("Warfarin", "warfarin")])
+        
+        assert len(forward) == len(backward) == 1
+        assert forward[0]["medications"] == ["Warfarin", "Amoxicillin"]
+        assert backward[0]["medications"] == ["Amoxicillin", "Warfarin"]
+    
+    def test_class_level_edges(self):
+        graph = InteractionGraph(
+            [edge("lisinopril", "class:nsaids")],
+            classes={"nsaids": ["ibuprofen", "naproxen"]}
+        )
+        
+        interactions = graph.check([
+            ("Ibuprofen", "ibuprofen"),
+            ("Lisinopril", "lisinopril"),
+            ("Naproxen", "naproxen"),
+        ])
+        
+        assert [i["medications"] for i in interactions] == [
+            ["Ibuprofen", "Lisinopril"],
+            ["Lisinopril", "Naproxen"],
+        ]
+    
+    def test_orders_by_severity(self):
+        graph = InteractionGraph([edge("a", "b", "low"), edge("b", "c", "high")])
+        
+        interactions = graph.check([("A", "a"), ("B", "b"), ("C", "c")])
+        
+        assert [i["severity"] for i in interactions] == ["high", "low"]
+    
+    def test_no_false_positive_from_substrings(self):
+        graph = InteractionGraph([edge("warfarin", "amoxicillin")])
+        
+        assert graph.check([("Warfarin-free", "warfarin-free"), ("Amoxicillin", "amoxicillin")]) == []
+    
+    def test_large_graph_with_many_medications(self):
+        interactions = [edge(f"drug{i}", f"drug{i + 1}") for i in range(30000)]
+        graph = InteractionGraph(interactions)
+        medications = [(f"Drug{i}", f"drug{i}") for i in range(100, 116)]
+        
+        found = graph.check(medications)
+        
+        assert len(graph) == 30000
+        assert len(found) == 15
+    
+    def test_from_file(self, tmp_path):
+        path = tmp_path / "interactions.json"
+        path.write_text(json.dumps({"version": 3, "interactions": [edge("x", "y")]}))
+        
+        graph = InteractionGraph.from_file(str(path))
+        
+        assert graph.version == "3"
+        assert len(graph.check([("X", "x"), ("Y", "y")])) == 1
+
+
+class TestKnowledgeBaseInteractions:
+    """Tests for check_interactions backed by the bundled interaction data."""
+    
+    def test_brand_names_resolve_to_graph_ids(self):
+        client = MedicalKnowledgeBaseClient()
+        
+        interactions = client.check_interactions(["Amoxil", "Warfarin"])
+        
+        assert interactions[0]["medications"] == ["Amoxil", "Warfarin"]
+    
+    def test_metformin_contrast_interaction(self):
+        client = MedicalKnowledgeBaseClient()
+        
+        interactions = client.check_interactions(["Metformin", "Contrast dye"])
+        
+        assert interactions[0]["severity"] == "high"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
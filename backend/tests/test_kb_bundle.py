@@ -0,0 +1,164 @@
+import asyncio
+import json
+import os
+
+from backend.app.schemas import ParsedDocument
+from backend.app.services.kb_bundle import BUNDLE_RULES, BundleWatcher, load_bundle, write_bundle
+from backend.app.services.kb_cache import CachingKnowledgeBaseClient
+from backend.app.services.knowledge_base_client import (
+    DEFAULT_INTERACTIONS_PATH,
+    DEFAULT_RULES_PATH,
+    MedicalKnowledgeBaseClient,
+)
+from backend.app.services.medical_agent import MedicalAnalysisAgent
+from backend.app.services.result_cache import InMemoryResultCache
+
+
+DOCUMENT = ParsedDocument(text="Metformin 500mg twice daily. Patient reports feeling dizzy.")
+
+DIZZINESS_RULE = {
+    "keywords": ["dizzy"],
+    "result": {
+        "category": "Dizziness",
+        "description": "Dizziness reported",
+        "severity": "medium",
+        "recommendation": "Check blood pressure"
+    }
+}
+
+
+def bundle_directory(path, extra_red_flags=()):
+    write_bundle(str(path), MedicalKnowledgeBaseClient()._initialize_mock_data(), DEFAULT_INTERACTIONS_PATH,
+                 DEFAULT_RULES_PATH)
+    if extra_red_flags:
+        rules_path = os.path.join(str(path), BUNDLE_RULES)
+        with open(rules_path, encoding="utf-8") as handle:
+            rules = json.load(handle)
+        rules["red_flags"].extend(extra_red_flags)
+        with open(rules_path, "w", encoding="utf-8") as handle:
+            json.dump(rules, handle)
+    return str(path)
+
+
+def red_flag_categories(result):
+    return [flag.category for flag in result.additional_insights.red_flags]
+
+
+class TestKnowledgeBaseBundle:
+    """Tests for compiled, hot-swappable knowledge base bundles."""
+    
+    def test_written_bundle_matches_builtin_data(self, tmp_path):
+        directory = bundle_directory(tmp_path / "bundle")
+        
+        client = MedicalKnowledgeBaseClient(bundle_path=directory)
+        
+        assert client.data_version == MedicalKnowledgeBaseClient().data_version
+        assert MedicalAnalysisAgent(knowledge_base_client=client).analyze_document(DOCUMENT) == \
+            MedicalAnalysisAgent().analyze_document(DOCUMENT)
+    
+    def test_results_record_the_bundle_version(self):
+        agent = MedicalAnalysisAgent()
+        
+        result = agent.analyze_document(DOCUMENT)
+        partial = agent.analyze_document(DOCUMENT, include=["suggestions"])
+        
+        assert result.knowledge_base_version == agent.kb_client.data_version
+        assert partial.knowledge_base_version == agent.kb_client.data_version
+        assert asyncio.run(agent.analyze_document_async(DOCUMENT)) == result
+    
+    def test_swap_changes_results_and_cache_keys(self, tmp_path):
+        client = MedicalKnowledgeBaseClient()
+        agent = MedicalAnalysisAgent(knowledge_base_client=client, result_cache=InMemoryResultCache())
+        before = agent.analyze_document(DOCUMENT)
+        key = agent.result_cache_key(DOCUMENT.text)
+        
+        bundle = client.reload_bundle(bundle_directory(tmp_path / "bundle", [DIZZINESS_RULE]))
+        after = agent.analyze_document(DOCUMENT)
+        
+        assert "Dizziness" not in red_flag_categories(before)
+        assert "Dizziness" in red_flag_categories(after)
+        assert after.knowledge_base_version == bundle.version != before.knowledge_base_version
+        assert agent.result_cache_key(DOCUMENT.text) != key
+    
+    def test_in_flight_analysis_finishes_on_its_bundle(self, tmp_path):
+        client = MedicalKnowledgeBaseClient()
+        agent = MedicalAnalysisAgent(knowledge_base_client=client)
+        new_bundle = load_bundle(bundle_directory(tmp_path / "bundle", [DIZZINESS_RULE]))
+        old_version = client.data_version
+        generate_suggestions = agent._generate_suggestions
+        
+        def swap_then_suggest(text, medications):
+            client.swap_bundle(new_bundle)
+            return generate_suggestions(text, medications)
+            
+        agent._generate_suggestions = swap_then_suggest
+        in_flight = agent.analyze_document(DOCUMENT)
+        agent._generate_suggestions = generate_suggestions
+        
+        assert "Dizziness" not in red_flag_categories(in_flight)
+        assert in_flight.knowledge_base_version == old_version
+        assert "Dizziness" in red_flag_categories(agent.analyze_document(DOCUMENT))
+    
+    def test_stream_keeps_its_bundle_between_events(self, tmp_path):
+        client = MedicalKnowledgeBaseClient()
+        agent = MedicalAnalysisAgent(knowledge_base_client=client)
+        new_bundle = load_bundle(bundle_directory(tmp_path / "bundle", [DIZZINESS_RULE]))
+        
+        stream = agent.analyze_document_stream(DOCUMENT)
+        next(stream)
+        client.swap_bundle(new_bundle)
+        insights = list(stream)[-1].data
+        
+        assert "Dizziness" not in [flag.category for flag in insights.red_flags]
+    
+    def test_cached_lookups_are_keyed_by_version(self, tmp_path):
+        inner = MedicalKnowledgeBaseClient()
+        client = CachingKnowledgeBaseClient(inner)
+        text = "Patient feels dizzy."
+        
+        assert client.identify_red_flags(text, []) == []
+        inner.reload_bundle(bundle_directory(tmp_path / "bundle", [DIZZINESS_RULE]))
+        
+        assert [flag["category"] for flag in client.identify_red_flags(text, [])] == ["Dizziness"]
+    
+    def test_formulary_updates_the_agent_scanner(self, tmp_path):
+        formulary = tmp_path / "formulary.json"
+        formulary.write_text(json.dumps({"medications": {}, "lexicon": ["zolpidem"]}), encoding="utf-8")
+        client = MedicalKnowledgeBaseClient()
+        agent = MedicalAnalysisAgent(knowledge_base_client=client)
+        text = "Take zolpidem 5mg at bedtime."
+        
+        assert "Zolpidem" not in agent._extract_medications_from_text(text)
+        client.load_formulary(str(formulary))
+        
+        assert "Zolpidem" in agent._extract_medications_from_text(text)
+
+
+class TestBundleWatcher:
+    """Tests for reloading bundle directories when they change."""
+    
+    def test_poll_swaps_changed_bundle_into_clients(self, tmp_path):
+        directory = bundle_directory(tmp_path / "bundle")
+        clients = [MedicalKnowledgeBaseClient(bundle_path=directory) for _ in range(2)]
+        watcher = BundleWatcher(directory, clients)
+        
+        assert not watcher.poll()
+        bundle_directory(tmp_path / "bundle", [DIZZINESS_RULE])
+        assert watcher.poll()
+        
+        assert {client.data_version for client in clients} == {load_bundle(directory).version}
+    
+    def test_bad_bundle_keeps_current_data(self, tmp_path):
+        directory = bundle_directory(tmp_path / "bundle")
+        client = MedicalKnowledgeBaseClient(bundle_path=directory)
+        version = client.data_version
+        errors = []
+        watcher = BundleWatcher(directory, [client], on_error=errors.append)
+        
+        with open(os.path.join(directory, BUNDLE_RULES), "w", encoding="utf-8") as handle:
+            handle.write("{not json")
+            
+        assert not watcher.poll()
+        assert client.data_version == version
+        assert watcher.last_error is errors[0]
+        assert isinstance(errors[0], ValueError)
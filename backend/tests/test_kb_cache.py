@@ -0,0 +1,110 @@
+from unittest.mock import Mock
+
+import pytest
+
+from backend.app.schemas import ParsedDocument
+from backend.app.services.kb_cache import CachingKnowledgeBaseClient
+from backend.app.services.knowledge_base_client import MedicalKnowledgeBaseClient
+from backend.app.services.medical_agent import MedicalAnalysisAgent
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+def spy_client():
+    client = MedicalKnowledgeBaseClient()
+    client.get_medication_info = Mock(wraps=client.get_medication_info)
+    client.check_interactions = Mock(wraps=client.check_interactions)
+    client.identify_red_flags = Mock(wraps=client.identify_red_flags)
+    return client
+
+
+class TestCachingKnowledgeBaseClient:
+    """Tests for the LRU/TTL knowledge base cache."""
+    
+    def test_repeated_lookups_hit_cache(self):
+        inner = spy_client()
+        client = CachingKnowledgeBaseClient(inner)
+        
+        first = client.get_medication_info("Metformin")
+        second = client.get_medication_info("Metformin")
+        
+        assert first == second
+        assert inner.get_medication_info.call_count == 1
+        stats = client.stats()["get_medication_info"]
+        assert (stats.hits, stats.misses, stats.loads) == (1, 1, 1)
+        assert stats.hit_rate == 0.5
+    
+    def test_unknown_medications_are_negatively_cached(self):
+        inner = spy_client()
+        clock = FakeClock()
+        client = CachingKnowledgeBaseClient(inner, negative_ttl=10, clock=clock)
+        
+        client.get_medication_info("Mysterium")
+        client.get_medication_info("Mysterium")
+        assert inner.get_medication_info.call_count == 1
+        assert client.stats()["get_medication_info"].negative_hits == 1
+        
+        clock.now = 11
+        client.get_medication_info("Mysterium")
+        client.get_medication_info("Metformin")
+        clock.now = 30
+        client.get_medication_info("Metformin")
+        assert inner.get_medication_info.call_count == 3
+    
+    def test_ttl_expiry(self):
+        inner = spy_client()
+        clock = FakeClock()
+        client = CachingKnowledgeBaseClient(inner, ttls={"check_interactions": 5}, clock=clock)
+        
+        client.check_interactions(["Warfarin", "Amoxicillin"])
+        clock.now = 6
+        client.check_interactions(["Warfarin", "Amoxicillin"])
+        
+        assert inner.check_interactions.call_count == 2
+        assert client.stats()["check_interactions"].expirations == 1
+    
+    def test_lru_eviction(self):
+        inner = spy_client()
+        client = CachingKnowledgeBaseClient(inner, max_sizes={"get_medication_info": 2})
+        
+        for name in ["Metformin", "Lisinopril", "Metformin", "Atorvastatin", "Lisinopril"]:
+            client.get_medication_info(name)
+            
+        stats = client.stats()["get_medication_info"]
+        assert stats.evictions == 2
+        assert stats.size == 2
+        assert inner.get_medication_info.call_count == 4
+    
+    def test_explicit_invalidation(self):
+        inner = spy_client()
+        client = CachingKnowledgeBaseClient(inner)
+        
+        client.identify_red_flags("urgent", ["Aspirin"])
+        client.invalidate("identify_red_flags", "urgent", ["Aspirin"])
+        client.identify_red_flags("urgent", ["Aspirin"])
+        client.invalidate()
+        client.identify_red_flags("urgent", ["Aspirin"])
+        
+        assert inner.identify_red_flags.call_count == 3
+    
+    def test_drop_in_for_agent(self):
+        inner = spy_client()
+        agent = MedicalAnalysisAgent(knowledge_base_client=CachingKnowledgeBaseClient(inner))
+        plain = MedicalAnalysisAgent()
+        parsed = ParsedDocument(text="Metformin 500mg twice daily. Warfarin and Amoxicillin.", metadata={})
+        
+        results = [agent.analyze_document(parsed) for _ in range(3)]
+        
+        assert all(r.model_dump_json() == plain.analyze_document(parsed).model_dump_json() for r in results)
+        assert inner.get_medication_info.call_count == 3
+        assert agent.kb_client.lookup_medication("Glucophage").key == "metformin"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
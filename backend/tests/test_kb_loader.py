@@ -0,0 +1,189 @@
+import asyncio
+
+import pytest
+
+from backend.app.schemas import ParsedDocument
+from backend.app.services.async_knowledge_base_client import AsyncMedicalKnowledgeBaseClient
+from backend.app.services.kb_bundle import compile_bundle
+from backend.app.services.kb_cache import CachingKnowledgeBaseClient
+from backend.app.services.kb_loader import MedicationInfoLoader
+from backend.app.services.kb_stub_server import KnowledgeBaseStubServer
+from backend.app.services.knowledge_base_client import KnowledgeBaseError, MedicalKnowledgeBaseClient
+from backend.app.services.medical_agent import MedicalAnalysisAgent
+
+
+class RecordingAsyncClient:
+    """Async client double that records every bulk request."""
+    
+    def __init__(self, fail: bool = False):
+        self.local = MedicalKnowledgeBaseClient()
+        self.requests = []
+        self.fail = fail
+    
+    async def get_medication_info_many(self, names):
+        self.requests.append(list(names))
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise KnowledgeBaseError("backend down")
+        return self.local.get_medication_info_many(names)
+
+
+class CountingKnowledgeBaseClient(MedicalKnowledgeBaseClient):
+    """Knowledge base client that records bulk lookups."""
+    
+    def __init__(self):
+        super().__init__()
+        self.bulk_calls = []
+    
+    def get_medication_info_many(self, medication_names):
+        self.bulk_calls.append(list(medication_names))
+        return super().get_medication_info_many(medication_names)
+
+
+class TestBulkLookups:
+    """Tests for get_medication_info_many across client layers."""
+    
+    def test_bulk_matches_single_lookups(self):
+        client = MedicalKnowledgeBaseClient()
+        
+        infos = client.get_medication_info_many(["Metformin", "Lipitor", "Metformin", "Unknownium"])
+        
+        assert list(infos) == ["Metformin", "Lipitor", "Unknownium"]
+        for name, info in infos.items():
+            assert info == client.get_medication_info(name)
+    
+    def test_caching_client_fetches_only_misses(self):
+        backend = CountingKnowledgeBaseClient()
+        client = CachingKnowledgeBaseClient(backend)
+        client.get_medication_info("Metformin")
+        
+        infos = client.get_medication_info_many(["Metformin", "Lisinopril", "Unknownium"])
+        client.get_medication_info_many(["Lisinopril", "Unknownium"])
+        
+        assert backend.bulk_calls == [["Lisinopril", "Unknownium"]]
+        assert infos["Lisinopril"]["class"] == "ACE Inhibitor"
+        assert client.stats()["get_medication_info"].negative_hits == 1
+    
+    def test_stub_server_bulk_endpoint(self):
+        with KnowledgeBaseStubServer() as server:
+            client = AsyncMedicalKnowledgeBaseClient(base_url=server.base_url)
+            
+            infos = asyncio.run(client.get_medication_info_many(["Amoxil", "Warfarin", "Amoxil"]))
+            
+            assert server.request_count == 1
+        assert infos == server.client.get_medication_info_many(["Amoxil", "Warfarin"])
+    
+    def test_sync_parse_makes_one_bulk_call(self):
+        client = CountingKnowledgeBaseClient()
+        agent = MedicalAnalysisAgent(knowledge_base_client=client)
+        
+        agent.analyze_document(ParsedDocument(text="Metformin 500mg daily. Lisinopril 10mg. Amoxicillin 250mg."))
+        
+        assert client.bulk_calls == [["Metformin", "Lisinopril", "Amoxicillin"]]
+
+
+class TestMedicationInfoLoader:
+    """Tests for coalescing lookups into bulk requests."""
+    
+    def test_same_tick_lookups_share_one_request(self):
+        client = RecordingAsyncClient()
+        loader = MedicationInfoLoader(client)
+        
+        async def run():
+            return await asyncio.gather(
+                loader.load("Metformin"),
+                loader.load("Lipitor"),
+                loader.load("Metformin"),
+                loader.load_many(["Warfarin", "Lipitor"])
+            )
+        
+        metformin, lipitor, again, many = asyncio.run(run())
+        
+        assert client.requests == [["Metformin", "Lipitor", "Warfarin"]]
+        assert metformin is again
+        assert lipitor["generic_name"] == "Atorvastatin"
+        assert many["Lipitor"] is lipitor
+    
+    def test_batch_window_collects_staggered_lookups(self):
+        client = RecordingAsyncClient()
+        loader = MedicationInfoLoader(client, batch_window=0.05)
+        
+        async def delayed(name, delay):
+            await asyncio.sleep(delay)
+            return await loader.load(name)
+            
+        async def run():
+            await asyncio.gather(delayed("Metformin", 0), delayed("Lisinopril", 0.01), delayed("Aspirin", 0.02))
+            
+        asyncio.run(run())
+        
+        assert client.requests == [["Metformin", "Lisinopril", "Aspirin"]]
+    
+    def test_max_batch_size_splits_requests(self):
+        client = RecordingAsyncClient()
+        loader = MedicationInfoLoader(client, max_batch_size=2)
+        
+        async def run():
+            await loader.load_many(["a", "b", "c"])
+            
+        asyncio.run(run())
+        
+        assert client.requests == [["a", "b"], ["c"]]
+    
+    def test_errors_reach_every_waiter(self):
+        loader = MedicationInfoLoader(RecordingAsyncClient(fail=True))
+        
+        async def run():
+            return await asyncio.gather(loader.load("a"), loader.load("b"), return_exceptions=True)
+            
+        results = asyncio.run(run())
+        
+        assert all(isinstance(result, KnowledgeBaseError) for result in results)
+    
+    def test_lookups_are_answered_from_the_callers_bundle(self):
+        client = MedicalKnowledgeBaseClient()
+        old = client.bundle
+        metformin = {**old.data["medications"]["metformin"], "class": "Biguanide"}
+        medications = {**old.data["medications"], "metformin": metformin}
+        new = compile_bundle({**old.data, "medications": medications}, old.interaction_graph, old.rule_engine)
+        loader = MedicationInfoLoader(
+            AsyncMedicalKnowledgeBaseClient(fallback_client=client), batch_key=lambda: client.bundle.version
+        )
+        
+        async def lookup(bundle):
+            with client.pinned(bundle):
+                return await loader.load("Metformin")
+                
+        async def run():
+            return await asyncio.gather(lookup(old), lookup(new), lookup(old))
+            
+        first, second, third = asyncio.run(run())
+        
+        assert (first["class"], second["class"], third["class"]) == ("Antidiabetic", "Biguanide", "Antidiabetic")
+        assert first is third
+        assert loader.batch_count == 2
+    
+    def test_concurrent_analyses_coalesce_lookups(self):
+        documents = [
+            ParsedDocument(text="Metformin 500mg twice daily. Lisinopril 10mg once daily."),
+            ParsedDocument(text="Amoxicillin 500mg three times daily. Metformin 1000mg daily."),
+            ParsedDocument(text="Warfarin 5mg once daily. Lisinopril 20mg once daily."),
+        ]
+        
+        with KnowledgeBaseStubServer() as server:
+            agent = MedicalAnalysisAgent(
+                async_knowledge_base_client=AsyncMedicalKnowledgeBaseClient(base_url=server.base_url)
+            )
+            
+            async def run():
+                return await asyncio.gather(*(agent.analyze_document_async(doc) for doc in documents))
+                
+            results = asyncio.run(run())
+            
+        assert agent.medication_loader.batch_count == 1
+        for parsed, result in zip(documents, results):
+            assert result.model_dump() == MedicalAnalysisAgent().analyze_document(parsed).model_dump()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
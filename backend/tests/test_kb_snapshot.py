@@ -0,0 +1,121 @@
+from functools import partial
+
+import pytest
+
+from backend.app.schemas import ParsedDocument
+from backend.app.services.batch import analyze_documents
+from backend.app.services.kb_snapshot import KnowledgeBaseSnapshot, SnapshotError, build_snapshot
+from backend.app.services.knowledge_base_client import KnowledgeBaseError, MedicalKnowledgeBaseClient
+from backend.app.services.medical_agent import MedicalAnalysisAgent
+from backend.app.services.medication_index import MedicationIndex, MATCH_NONE
+
+
+MEDICATIONS = {
+    "atorvastatin": {"generic_name": "Atorvastatin", "brand_names": ["Lipitor"], "aliases": ["Atorvastatin Calcium"]},
+    "atenolol": {"generic_name": "Atenolol", "brand_names": ["Tenormin"]},
+    "metformin": {"generic_name": "Metformin", "aliases": ["Metformin HCl"]},
+}
+
+QUERIES = [
+    "Atorvastatin", "  LIPITOR ", "metformin  hcl", "Metformin 500mg", "atorva",
+    "teno", "at", "ate", "aten_x", "unknownium", "",
+]
+
+
+@pytest.fixture
+def builtin_snapshot(tmp_path):
+    path = str(tmp_path / "kb.snapshot")
+    build_snapshot(MedicalKnowledgeBaseClient()._initialize_mock_data(), path)
+    return path
+
+
+class TestKnowledgeBaseSnapshot:
+    """Tests for the memory-mapped knowledge base snapshot."""
+    
+    @pytest.mark.parametrize("query", QUERIES)
+    def test_lookups_match_in_memory_index(self, tmp_path, query):
+        path = str(tmp_path / "kb.snapshot")
+        build_snapshot({"medications": MEDICATIONS}, path)
+        
+        assert KnowledgeBaseSnapshot(path).lookup(query) == MedicationIndex(MEDICATIONS).lookup(query)
+    
+    def test_large_snapshot_lookups(self, tmp_path):
+        medications = {
+            f"drug{i:05d}": {"generic_name": f"Drug{i:05d}", "brand_names": [f"Brand{i:05d}"]}
+            for i in range(20000)
+        }
+        path = str(tmp_path / "kb.snapshot")
+        build_snapshot({"medications": medications, "lexicon": ["extra"]}, path)
+        
+        snapshot = KnowledgeBaseSnapshot(path)
+        
+        assert len(snapshot) == 20000
+        assert snapshot.lookup("Brand12345").info["generic_name"] == "Drug12345"
+        assert snapshot.lookup("drug1999").match == MATCH_NONE
+        assert snapshot.lookup("drug19999").key == "drug19999"
+        assert snapshot.lexicon == ["extra"]
+    
+    def test_rejects_files_of_another_format(self, tmp_path):
+        path = tmp_path / "kb.snapshot"
+        path.write_bytes(b"not a snapshot" * 10)
+        
+        with pytest.raises(SnapshotError):
+            KnowledgeBaseSnapshot(str(path))
+
+
+class TestSnapshotBackedClient:
+    """Tests for MedicalKnowledgeBaseClient answering from a snapshot."""
+    
+    def test_client_answers_like_builtin_data(self, builtin_snapshot):
+        builtin = MedicalKnowledgeBaseClient()
+        client = MedicalKnowledgeBaseClient(snapshot_path=builtin_snapshot)
+        
+        for name in ["Metformin", "Glucophage", "Amoxycillin", "Lipitor 20mg", "Unknownium"]:
+            assert client.get_medication_info(name) == builtin.get_medication_info(name)
+        assert sorted(client.get_medication_lexicon()) == sorted(builtin.get_medication_lexicon())
+        assert client.check_interactions(["Warfarin", "Amoxil"]) == builtin.check_interactions(["Warfarin", "Amoxil"])
+    
+    def test_scanner_is_built_on_first_scan(self, builtin_snapshot):
+        client = MedicalKnowledgeBaseClient(snapshot_path=builtin_snapshot)
+        bundle = client.bundle
+        
+        assert bundle._scanner is None
+        assert client.get_medication_info("Lipitor")["generic_name"] == "Atorvastatin"
+        assert bundle._scanner is None
+        
+        agent = MedicalAnalysisAgent(knowledge_base_client=client)
+        assert agent.medication_scanner is bundle.medication_scanner
+        assert bundle.snapshot.names()[0] in bundle.lexicon
+    
+    def test_analysis_matches_builtin_data(self, builtin_snapshot):
+        parsed = ParsedDocument(text="Metformin 500mg twice daily. Warfarin 5mg and Amoxil 500mg.", metadata={})
+        
+        expected = MedicalAnalysisAgent().analyze_document(parsed)
+        result = MedicalAnalysisAgent(
+            knowledge_base_client=MedicalKnowledgeBaseClient(snapshot_path=builtin_snapshot)
+        ).analyze_document(parsed)
+        
+        ignored = {"knowledge_base_version"}
+        assert result.model_dump(exclude=ignored) == expected.model_dump(exclude=ignored)
+    
+    def test_batch_workers_open_the_snapshot(self, builtin_snapshot):
+        documents = [ParsedDocument(text="Glucophage 500mg twice daily.", metadata={})] * 4
+        
+        results = list(analyze_documents(
+            documents,
+            workers=2,
+            knowledge_base_factory=partial(MedicalKnowledgeBaseClient, snapshot_path=builtin_snapshot)
+        ))
+        
+        assert all(item.ok for item in results)
+        assert results[0].result.prescription_summary.items[0].medication_name == "Glucophage"
+    
+    def test_formulary_cannot_be_merged_into_snapshot(self, builtin_snapshot, tmp_path):
+        client = MedicalKnowledgeBaseClient(snapshot_path=builtin_snapshot)
+        
+        with pytest.raises(KnowledgeBaseError):
+            client.load_formulary(str(tmp_path / "formulary.json"))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
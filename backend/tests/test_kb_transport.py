@@ -0,0 +1,160 @@
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import json
+import threading
+
+import pytest
+
+from backend.app.schemas import ParsedDocument
+from backend.app.services.kb_stub_server import KnowledgeBaseStubServer
+from backend.app.services.kb_transport import HTTPTransport
+from backend.app.services.knowledge_base_client import KnowledgeBaseError, MedicalKnowledgeBaseClient
+from backend.app.services.medical_agent import MedicalAnalysisAgent
+
+
+DOCUMENTS = [
+    ParsedDocument(text="Metformin 500mg twice daily. Lisinopril 10mg once daily for blood pressure."),
+    ParsedDocument(text="Warfarin 5mg and Amoxicillin 500mg three times daily for 7 days."),
+    ParsedDocument(text="Glucophage 1000mg daily. Urgent follow-up with endocrinologist."),
+    ParsedDocument(text="Lipitor 20mg at bedtime. Blood work needed in 3 months."),
+]
+
+
+def failing_first(count: int, status: int = 503):
+    """Fault injector that fails the first ``count`` requests."""
+    counter = itertools.count()
+    lock = threading.Lock()
+    
+    def fault(path):
+        with lock:
+            return status if next(counter) < count else None
+    
+    return fault
+
+
+class TestHTTPTransport:
+    """Tests for the pooled keep-alive transport against the stub server."""
+    
+    def test_sequential_requests_reuse_one_connection(self):
+        with KnowledgeBaseStubServer() as server, HTTPTransport(server.base_url) as transport:
+            client = MedicalKnowledgeBaseClient(transport=transport)
+            
+            for _ in range(20):
+                assert client.get_medication_info("Metformin")["class"] == "Antidiabetic"
+                
+            assert transport.connections_opened == 1
+            assert server.connection_count == 1
+            assert server.request_count == 20
+    
+    def test_keep_alive_disabled_opens_a_connection_per_request(self):
+        with KnowledgeBaseStubServer() as server, HTTPTransport(server.base_url, keep_alive=False) as transport:
+            for _ in range(5):
+                transport.request("GET", "/lexicon")
+                
+            assert server.connection_count == 5
+    
+    def test_remote_client_matches_local_client(self):
+        local = MedicalKnowledgeBaseClient()
+        
+        with KnowledgeBaseStubServer() as server, HTTPTransport(server.base_url) as transport:
+            remote = MedicalKnowledgeBaseClient(transport=transport)
+            
+            assert remote.get_medication_info("Amoxil") == local.get_medication_info("Amoxil")
+            assert remote.get_medication_info_many(["Lipitor", "x"]) == local.get_medication_info_many(["Lipitor", "x"])
+            assert remote.check_interactions(["Warfarin", "Amoxicillin"]) == local.check_interactions(["Warfarin", "Amoxicillin"])
+            assert remote.get_specialty_recommendations(["diabetes"]) == local.get_specialty_recommendations(["diabetes"])
+            assert remote.identify_red_flags("urgent", []) == local.identify_red_flags("urgent", [])
+            assert remote.get_medication_lexicon() == local.get_medication_lexicon()
+            assert remote.data_version == local.data_version
+    
+    def test_remote_version_is_refreshed_after_its_ttl(self, tmp_path):
+        formulary = tmp_path / "formulary.json"
+        formulary.write_text(json.dumps({"medications": {}, "lexicon": ["zolpidem"]}), encoding="utf-8")
+        
+        with KnowledgeBaseStubServer() as server, HTTPTransport(server.base_url) as transport:
+            cached = MedicalKnowledgeBaseClient(transport=transport)
+            expiring = MedicalKnowledgeBaseClient(transport=transport, version_ttl=0)
+            before = cached.data_version
+            
+            assert expiring.data_version == before
+            server.client.load_formulary(str(formulary))
+            
+            assert cached.data_version == before
+            assert expiring.data_version == server.client.data_version != before
+    
+    def test_agent_fetches_remote_lexicon_lazily_and_after_version_changes(self, tmp_path):
+        formulary = tmp_path / "formulary.json"
+        formulary.write_text(json.dumps({"medications": {}, "lexicon": ["zolpidem"]}), encoding="utf-8")
+        document = ParsedDocument(text="Zolpidem 5mg at bedtime.")
+        
+        with KnowledgeBaseStubServer() as server, HTTPTransport(server.base_url) as transport:
+            agent = MedicalAnalysisAgent(
+                knowledge_base_client=MedicalKnowledgeBaseClient(transport=transport, version_ttl=0)
+            )
+            assert agent._remote_scanner is None
+            assert agent.medication_scanner.find_all("Zolpidem 5mg") == []
+            
+            server.client.load_formulary(str(formulary))
+            
+            names = [item.medication_name for item in agent.analyze_document(document).prescription_summary.items]
+            assert names == ["Zolpidem"]
+    
+    def test_retries_transient_failures(self):
+        with KnowledgeBaseStubServer(fault=failing_first(2)) as server:
+            transport = HTTPTransport(server.base_url, max_retries=2, backoff=0.001)
+            
+            lexicon = transport.request("GET", "/lexicon")
+            
+            assert "metformin" in lexicon
+            assert server.request_count == 3
+    
+    def test_gives_up_after_max_retries(self):
+        with KnowledgeBaseStubServer(fault=failing_first(10)) as server:
+            transport = HTTPTransport(server.base_url, max_retries=2, backoff=0.001)
+            
+            with pytest.raises(KnowledgeBaseError):
+                transport.request("GET", "/lexicon")
+                
+            assert server.request_count == 3
+    
+    def test_client_errors_are_not_retried(self):
+        with KnowledgeBaseStubServer() as server:
+            transport = HTTPTransport(server.base_url, backoff=0.001)
+            
+            with pytest.raises(KnowledgeBaseError):
+                transport.request("GET", "/missing")
+                
+            assert server.request_count == 1
+    
+    def test_connection_errors_raise_after_retries(self):
+        with KnowledgeBaseStubServer() as server:
+            base_url = server.base_url
+        transport = HTTPTransport(base_url, max_retries=1, backoff=0.001, timeout=1.0)
+        
+        with pytest.raises(KnowledgeBaseError):
+            transport.request("GET", "/lexicon")
+
+
+class TestConcurrentRemoteAnalysis:
+    """Throughput test: 100 concurrent analyses over a small connection pool."""
+    
+    def test_hundred_concurrent_analyses_share_the_pool(self):
+        expected = [MedicalAnalysisAgent().analyze_document(doc).model_dump() for doc in DOCUMENTS]
+        
+        with KnowledgeBaseStubServer(latency=0.005) as server, HTTPTransport(server.base_url, pool_size=8) as transport:
+            agent = MedicalAnalysisAgent(knowledge_base_client=MedicalKnowledgeBaseClient(transport=transport))
+            
+            with ThreadPoolExecutor(max_workers=100) as pool:
+                results = list(pool.map(
+                    lambda i: agent.analyze_document(DOCUMENTS[i % len(DOCUMENTS)]).model_dump(),
+                    range(100)
+                ))
+            
+            assert server.connection_count <= 8
+            assert server.request_count > 100
+            
+        assert results == [expected[i % len(DOCUMENTS)] for i in range(100)]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
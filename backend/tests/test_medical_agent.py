@@ -1,8 +1,15 @@
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import Mock, patch
 
 from backend.app.schemas import ParsedDocument, AnalysisResult
-from backend.app.services.medical_agent import MedicalAnalysisAgent, analyze_document
+from backend.app.services.medical_agent import (
+    MedicalAnalysisAgent,
+    analyze_document,
+    configure_agent,
+    get_agent,
+    reset_agent,
+)
 from backend.app.services.knowledge_base_client import MedicalKnowledgeBaseClient
 
 
@@ -216,6 +223,15 @@ class TestMedicalAnalysisAgent:
         assert result.suggestions is not None
         assert result.additional_insights is not None
     
+    def test_analyze_document_with_glued_dosage(self):
+        agent = MedicalAnalysisAgent()
+        
+        result = agent.analyze_document(ParsedDocument(text="Metformin500mg twice daily."))
+        
+        assert [item.medication_name for item in result.prescription_summary.items] == ["Metformin"]
+        assert result.prescription_summary.items[0].dosage == "500mg"
+        assert any(doctor.specialty == "Endocrinologist" for doctor in result.suggestions.doctors)
+    
     def test_analyze_document_complex(self):
         agent = MedicalAnalysisAgent()
         parsed = ParsedDocument(
@@ -311,15 +327,43 @@ class TestConvenienceFunction:
         assert isinstance(result, AnalysisResult)
         assert result.prescription_summary is not None
     
-    def test_analyze_document_function_creates_new_agent(self):
+    def test_analyze_document_function_reuses_shared_agent(self):
         parsed1 = ParsedDocument(text="Test 1", metadata={})
         parsed2 = ParsedDocument(text="Test 2", metadata={})
         
         result1 = analyze_document(parsed1)
+        agent = get_agent()
         result2 = analyze_document(parsed2)
         
         assert isinstance(result1, AnalysisResult)
         assert isinstance(result2, AnalysisResult)
+        assert get_agent() is agent
+    
+    def test_get_agent_is_thread_safe(self):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            agents = list(executor.map(lambda _: get_agent(), range(32)))
+        
+        assert all(agent is agents[0] for agent in agents)
+    
+    def test_reset_agent_creates_fresh_agent(self):
+        agent = get_agent()
+        
+        reset_agent()
+        
+        assert get_agent() is not agent
+    
+    def test_configure_agent_swaps_knowledge_base_client(self):
+        custom_client = MedicalKnowledgeBaseClient()
+        custom_client.check_interactions = Mock(return_value=[])
+        
+        configure_agent(knowledge_base_client=custom_client)
+        analyze_document(ParsedDocument(text="Warfarin and Amoxicillin.", metadata={}))
+        
+        assert get_agent().kb_client is custom_client
+        custom_client.check_interactions.assert_called_once()
+        
+        reset_agent()
+        assert get_agent().kb_client is not custom_client
 
 
 if __name__ == "__main__":
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from backend.app.services.knowledge_base_client import MedicalKnowledgeBaseClient
+from backend.app.services.medication_index import (
+    MedicationIndex,
+    MATCH_ALIAS,
+    MATCH_BRAND,
+    MATCH_EXACT,
+    MATCH_NONE,
+    MATCH_PREFIX,
+    MATCH_TOKEN,
+)
+
+
+MEDICATIONS = {
+    "atorvastatin": {"generic_name": "Atorvastatin", "brand_names": ["Lipitor"], "aliases": ["Atorvastatin Calcium"]},
+    "atenolol": {"generic_name": "Atenolol", "brand_names": ["Tenormin"]},
+    "metformin": {"generic_name": "Metformin", "aliases": ["Metformin HCl"]},
+}
+
+
+class TestMedicationIndex:
+    """Tests for the knowledge base medication lookup index."""
+    
+    @pytest.mark.parametrize("query, key, match", [
+        ("Atorvastatin", "atorvastatin", MATCH_EXACT),
+        ("  LIPITOR ", "atorvastatin", MATCH_BRAND),
+        ("metformin  hcl", "metformin", MATCH_ALIAS),
+        ("Metformin 500mg", "metformin", MATCH_TOKEN),
+        ("atorva", "atorvastatin", MATCH_PREFIX),
+        ("teno", "atenolol", MATCH_PREFIX),
+    ])
+    def test_resolves_with_match_quality(self, query, key, match):
+        lookup = MedicationIndex(MEDICATIONS).lookup(query)
+        
+        assert lookup.key == key
+        assert lookup.match == match
+        assert lookup.info is MEDICATIONS[key]
+    
+    @pytest.mark.parametrize("query", ["at", "aten_x", "ate", "unknownium"])
+    def test_short_ambiguous_or_unknown_queries_do_not_match(self, query):
+        lookup = MedicationIndex(MEDICATIONS).lookup(query)
+        
+        assert lookup.match == MATCH_NONE
+        assert lookup.info is None
+    
+    def test_ambiguous_prefix_is_rejected(self):
+        index = MedicationIndex(MEDICATIONS, min_prefix=2)
+        
+        assert index.lookup("at").match == MATCH_NONE
+        assert index.lookup("ator").key == "atorvastatin"
+
+
+class TestFormularyLoading:
+    """Tests for loading a large formulary from a local file."""
+    
+    def test_large_formulary_lookups(self, tmp_path):
+        medications = {
+            f"drug{i:05d}": {
+                "generic_name": f"Drug{i:05d}",
+                "class": "Synthetic",
+                "brand_names": [f"Brand{i:05d}"],
+                "precautions": [f"Precaution {i}"],
+            }
+            for i in range(20000)
+        }
+        path = tmp_path / "formulary.json"
+        path.write_text(json.dumps({"medications": medications}))
+        
+        client = MedicalKnowledgeBaseClient(formulary_path=str(path))
+        
+        assert client.get_medication_info("Drug12345")["precautions"] == ["Precaution 12345"]
+        assert client.lookup_medication("brand19999").key == "drug19999"
+        assert client.get_medication_info("Amoxicillin")["class"] == "Antibiotic"
+        assert "brand00042" in client.get_medication_lexicon()
+    
+    def test_brand_name_lookup_through_client(self):
+        client = MedicalKnowledgeBaseClient()
+        
+        info = client.get_medication_info("Glucophage")
+        
+        assert info["generic_name"] == "Metformin"
+        assert client.lookup_medication("Glucophage").match == MATCH_BRAND
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
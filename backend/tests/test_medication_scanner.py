@@ -0,0 +1,76 @@
+import pytest
+
+from backend.app.services.medication_scanner import MedicationScanner, MedicationMatch
+
+
+class TestMedicationScanner:
+    """Tests for the multi-pattern medication scanner."""
+    
+    def test_finds_all_mentions_with_spans(self):
+        scanner = MedicationScanner(["metformin", "lisinopril"])
+        text = "Metformin 500mg, then lisinopril 10mg. Continue Metformin."
+        
+        matches = scanner.find_all(text)
+        
+        assert [m.name for m in matches] == ["metformin", "lisinopril", "metformin"]
+        for match in matches:
+            assert text[match.start:match.end].lower() == match.name
+    
+    def test_case_insensitive(self):
+        scanner = MedicationScanner(["Atorvastatin"])
+        
+        matches = scanner.find_all("ATORVASTATIN 20mg at bedtime")
+        
+        assert matches == [MedicationMatch(0, 12, "atorvastatin")]
+    
+    def test_respects_word_boundaries(self):
+        scanner = MedicationScanner(["aspirin"])
+        
+        assert scanner.find_all("Babyaspirin daily") == []
+        assert len(scanner.find_all("aspirin-free regimen")) == 1
+    
+    def test_letter_digit_change_is_a_boundary(self):
+        scanner = MedicationScanner(["metformin", "vitamin b12"])
+        
+        assert [m.name for m in scanner.find_all("Metformin500mg, 2metformin, Vitamin B123")] == ["metformin"] * 2
+        assert [m.name for m in scanner.find_all("vitamin b12 1000mcg")] == ["vitamin b12"]
+        assert scanner.find_all("metformine") == []
+    
+    def test_word_boundaries_can_be_disabled(self):
+        scanner = MedicationScanner(["aspirin"], word_boundaries=False)
+        
+        assert len(scanner.find_all("Babyaspirin daily")) == 1
+    
+    def test_prefers_leftmost_longest_match(self):
+        scanner = MedicationScanner(["metformin", "metformin er", "er"])
+        
+        matches = scanner.find_all("Metformin ER 750mg")
+        
+        assert [m.name for m in matches] == ["metformin er"]
+    
+    def test_overlapping_patterns_via_failure_links(self):
+        scanner = MedicationScanner(["abcd", "bc", "bcx"])
+        
+        matches = scanner.find_all("abcx bc")
+        
+        assert [m.name for m in matches] == ["bc"]
+        assert matches[0].start == 5
+    
+    def test_offsets_survive_length_changing_lowercase(self):
+        scanner = MedicationScanner(["omeprazole"])
+        text = "İ omeprazole"
+        
+        matches = scanner.find_all(text)
+        
+        assert len(matches) == 1
+        assert text[matches[0].start:matches[0].end] == "omeprazole"
+    
+    def test_empty_lexicon(self):
+        scanner = MedicationScanner([])
+        
+        assert len(scanner) == 0
+        assert scanner.find_all("Metformin 500mg") == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
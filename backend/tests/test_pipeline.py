@@ -0,0 +1,199 @@
+import asyncio
+import threading
+
+import pytest
+
+from backend.app.schemas import ParsedDocument
+from backend.app.services.instrumentation import Tracer
+from backend.app.services.medical_agent import DEFAULT_STAGES, MedicalAnalysisAgent
+from backend.app.services.pipeline import (
+    AnalysisPipeline,
+    AsyncStageExecutor,
+    SequentialExecutor,
+    Stage,
+    ThreadPoolStageExecutor,
+)
+
+
+DOCUMENT = ParsedDocument(
+    text="Metformin 500mg twice daily for diabetes.\nWarfarin 5mg and Aspirin 81mg daily.\nUrgent blood work.",
+    metadata={}
+)
+
+
+def constant(value):
+    return lambda agent, *args: value
+
+
+def after_barrier(barrier, stage):
+    def run(*args):
+        barrier.wait()
+        return stage(*args)
+    return run
+
+
+@pytest.fixture
+def thread_executor():
+    executor = ThreadPoolStageExecutor(max_workers=4)
+    yield executor
+    executor.shutdown()
+
+
+class TestAnalysisPipeline:
+    """Tests for the stage graph."""
+    
+    def test_default_order_follows_registration(self):
+        order = [stage.name for stage in AnalysisPipeline(DEFAULT_STAGES).order()]
+        
+        assert order == [
+            "medications",
+            "prescriptions",
+            "prescription_summary",
+            "medication_timing",
+            "suggestions",
+            "additional_insights",
+        ]
+    
+    def test_stage_runs_after_its_requirements_even_if_registered_first(self):
+        pipeline = AnalysisPipeline([
+            Stage("b", constant(2), ("a",)),
+            Stage("a", constant(1), ("text",)),
+        ])
+        
+        assert [stage.name for stage in pipeline.order()] == ["a", "b"]
+    
+    @pytest.mark.parametrize("stages,message", [
+        ([Stage("a", constant(1), ("missing",))], "unknown values: missing"),
+        ([Stage("a", constant(1), ("b",)), Stage("b", constant(2), ("a",))], "cycle"),
+    ])
+    def test_invalid_graphs(self, stages, message):
+        with pytest.raises(ValueError, match=message):
+            AnalysisPipeline(stages).order()
+    
+    def test_duplicate_names_need_replace(self):
+        pipeline = AnalysisPipeline([Stage("a", constant(1))])
+        
+        with pytest.raises(ValueError):
+            pipeline.register_stage(Stage("a", constant(2)))
+        with pytest.raises(ValueError):
+            pipeline.register_stage(Stage("text", constant(2)))
+        pipeline.register_stage(Stage("a", constant(2)), replace=True)
+        
+        assert SequentialExecutor().run(pipeline, None, {"text": ""})["a"] == 2
+    
+    def test_subgraph_keeps_only_required_stages(self):
+        pipeline = AnalysisPipeline(DEFAULT_STAGES)
+        
+        subgraph = pipeline.subgraph(["medication_timing", "suggestions"])
+        
+        assert [stage.name for stage in subgraph.order()] == [
+            "medications", "prescriptions", "medication_timing", "suggestions"
+        ]
+        assert pipeline.subgraph(["suggestions", "medication_timing"]) is subgraph
+        with pytest.raises(ValueError, match="unknown"):
+            pipeline.subgraph(["unknown"])
+    
+    def test_registering_a_stage_invalidates_subgraphs(self):
+        pipeline = AnalysisPipeline([Stage("a", constant(1), ("text",)), Stage("b", constant(2), ("text",))])
+        before = pipeline.subgraph(["b"])
+        
+        pipeline.register_stage(Stage("b", constant(3), ("a",)), replace=True)
+        
+        assert [stage.name for stage in before.order()] == ["b"]
+        assert [stage.name for stage in pipeline.subgraph(["b"]).order()] == ["a", "b"]
+
+
+class TestExecutors:
+    """Tests for sequential, threaded and asyncio execution."""
+    
+    def test_thread_pool_matches_sequential(self, thread_executor):
+        sequential = MedicalAnalysisAgent().analyze_document(DOCUMENT)
+        
+        threaded = MedicalAnalysisAgent(executor=thread_executor).analyze_document(DOCUMENT)
+        
+        assert threaded == sequential
+    
+    def test_independent_stages_run_concurrently(self, thread_executor):
+        agent = MedicalAnalysisAgent(executor=thread_executor)
+        barrier = threading.Barrier(2, timeout=5)
+        agent._generate_suggestions = after_barrier(barrier, agent._generate_suggestions)
+        agent._generate_insights = after_barrier(barrier, agent._generate_insights)
+        
+        result = agent.analyze_document(DOCUMENT)
+        
+        assert result.suggestions.doctors
+    
+    def test_thread_pool_spans_keep_their_parent(self, thread_executor):
+        spans = []
+        agent = MedicalAnalysisAgent(instrumentation=Tracer(spans.append), executor=thread_executor)
+        spans.clear()
+        
+        agent.analyze_document(DOCUMENT)
+        
+        root = spans[-1]
+        stages = [span for span in spans if span.name in ("generate_suggestions", "generate_insights")]
+        assert root.name == "analyze_document"
+        assert len(stages) == 2 and all(span.parent_span_id == root.span_id for span in stages)
+    
+    def test_stage_error_propagates(self, thread_executor):
+        agent = MedicalAnalysisAgent(executor=thread_executor)
+        agent._generate_insights = None
+        
+        with pytest.raises(TypeError):
+            agent.analyze_document(DOCUMENT)
+    
+    def test_async_executor_awaits_async_variants(self):
+        calls = []
+        
+        async def slow(agent, value):
+            calls.append("async")
+            await asyncio.sleep(0)
+            return value * 2
+            
+        pipeline = AnalysisPipeline([
+            Stage("a", constant(1), ("text",)),
+            Stage("b", constant(None), ("a",), async_func=slow),
+            Stage("c", lambda agent, a, b: a + b, ("a", "b")),
+        ])
+        
+        values = asyncio.run(AsyncStageExecutor().run(pipeline, None, {"text": ""}))
+        
+        assert values["c"] == 3
+        assert calls == ["async"]
+
+
+class TestExtraStages:
+    """Tests for registering stages on an agent."""
+    
+    def test_extra_stage_output_is_returned_by_run_pipeline(self):
+        agent = MedicalAnalysisAgent()
+        agent.register_stage(Stage(
+            "high_alert",
+            lambda agent, medications: [name for name in medications if name in ("Warfarin", "Insulin")],
+            ("medications",)
+        ))
+        
+        values = agent.run_pipeline(DOCUMENT)
+        
+        assert values["high_alert"] == ["Warfarin"]
+        assert agent.analyze_document(DOCUMENT) == MedicalAnalysisAgent().analyze_document(DOCUMENT)
+    
+    def test_replacing_a_section_stage_changes_the_result(self):
+        agent = MedicalAnalysisAgent()
+        original = agent.analyze_document(DOCUMENT).suggestions
+        agent.register_stage(
+            Stage("suggestions", lambda agent, suggestions: suggestions._replace(hospitals=[]), ("default_suggestions",)),
+            replace=True
+        )
+        agent.register_stage(Stage("default_suggestions", "_generate_suggestions", ("text", "medications")))
+        
+        result = agent.analyze_document(DOCUMENT)
+        
+        assert original.hospitals and result.suggestions.hospitals == []
+        assert result.suggestions.doctors == original.doctors
+    
+    def test_agents_do_not_share_registered_stages(self):
+        agent = MedicalAnalysisAgent()
+        agent.register_stage(Stage("extra", constant(1), ("text",)))
+        
+        assert "extra" not in MedicalAnalysisAgent().pipeline
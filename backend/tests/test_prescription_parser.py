@@ -0,0 +1,103 @@
+import pytest
+
+from backend.app.services.prescription_parser import (
+    AttributeIndex,
+    parse_prescription_details,
+    DEFAULT_DOSAGE,
+    DEFAULT_FREQUENCY,
+)
+
+
+class TestAttributeIndex:
+    """Tests for the prescription attribute span index."""
+    
+    def test_indexes_attribute_kinds(self):
+        text = "Amoxicillin 500mg three times daily for 7 days."
+        index = AttributeIndex(text)
+        
+        attributes = index.nearest(0, len("Amoxicillin"))
+        
+        assert attributes["dosage"].value == "500mg"
+        assert attributes["frequency"].value == "three times"
+        assert attributes["duration"].value == "7 days"
+    
+    def test_segments_split_lines_and_sentences(self):
+        index = AttributeIndex("first line\nsecond. third")
+        
+        assert index.segment_of(0) == 0
+        assert index.segment_of(11) == 1
+        assert index.segment_of(19) == 2
+
+
+class TestParsePrescriptionDetails:
+    """Tests for span-based prescription parsing."""
+    
+    def test_binds_attributes_per_line(self):
+        text = (
+            "Metformin 1000mg twice daily\n"
+            "Lisinopril 10mg once daily for 30 days\n"
+            "Atorvastatin 20mg every 8 hours"
+        )
+        
+        details = parse_prescription_details(text, ["Metformin", "Lisinopril", "Atorvastatin"])
+        
+        assert [(d.dosage, d.frequency, d.duration) for d in details] == [
+            ("1000mg", "twice", None),
+            ("10mg", "once", "30 days"),
+            ("20mg", "every 8 hours", None),
+        ]
+    
+    def test_binds_nearest_on_shared_line(self):
+        text = "Take Aspirin 81mg and Omeprazole 20mg each morning."
+        
+        details = parse_prescription_details(text, ["Aspirin", "Omeprazole"])
+        
+        assert details[0].dosage == "81mg"
+        assert details[1].dosage == "20mg"
+    
+    def test_frequency_does_not_leak_across_lines(self):
+        text = "Ibuprofen 400mg\nAmoxicillin 500mg 3 times daily"
+        
+        details = parse_prescription_details(text, ["Ibuprofen", "Amoxicillin"])
+        
+        assert details[0].frequency == DEFAULT_FREQUENCY
+        assert details[1].frequency == "3 times daily"
+    
+    @pytest.mark.parametrize("text", [
+        "Amoxicillin 500 mg. Take three times daily for 10 days.",
+        "Amoxicillin\n500 mg\n",
+        "Amoxicillin 500 mg.\n\nTake three times daily for 10 days.",
+    ])
+    def test_binds_forward_into_next_segment(self, text):
+        details = parse_prescription_details(text, ["Amoxicillin"])
+        
+        assert details[0].dosage == "500 mg"
+        if "daily" in text:
+            assert (details[0].frequency, details[0].duration) == ("three times", "10 days")
+    
+    def test_does_not_bind_forward_into_another_medication(self):
+        text = "Ibuprofen as needed.\nAmoxicillin 500mg twice daily."
+        
+        details = parse_prescription_details(text, ["Ibuprofen", "Amoxicillin"])
+        
+        assert (details[0].dosage, details[0].frequency) == (DEFAULT_DOSAGE, DEFAULT_FREQUENCY)
+        assert (details[1].dosage, details[1].frequency) == ("500mg", "twice")
+    
+    def test_uses_first_mention_with_attributes(self):
+        text = "History of Metformin use.\nMetformin 500mg twice daily."
+        
+        details = parse_prescription_details(text, ["Metformin"])
+        
+        assert details[0].dosage == "500mg"
+        assert details[0].frequency == "twice"
+    
+    def test_defaults_for_unmentioned_medication(self):
+        details = parse_prescription_details("No prescriptions.", ["Unknown Medication"])
+        
+        assert details[0].dosage == DEFAULT_DOSAGE
+        assert details[0].frequency == DEFAULT_FREQUENCY
+        assert details[0].duration is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,184 @@
+from pathlib import Path
+import json
+
+import pytest
+
+from backend.app.schemas import ParsedDocument
+from backend.app.services.knowledge_base_client import MedicalKnowledgeBaseClient
+from backend.app.services.medical_agent import MedicalAnalysisAgent
+from backend.app.services.result_cache import (
+    ANALYSIS_MODULES,
+    InMemoryResultCache,
+    SQLiteResultCache,
+    normalize_document_text,
+    result_cache_key,
+    rules_version,
+)
+
+
+DOCUMENT = ParsedDocument(
+    text="Metformin 500mg twice daily.\r\nWarfarin 5mg and Amoxicillin 500mg.\r\nBlood work needed.",
+    metadata={}
+)
+
+
+def counting_agent(result_cache, knowledge_base_client=None):
+    agent = MedicalAnalysisAgent(knowledge_base_client=knowledge_base_client, result_cache=result_cache)
+    calls = []
+    original = agent._extract_medications_from_text
+    
+    def extract(text):
+        calls.append(text)
+        return original(text)
+    
+    agent._extract_medications_from_text = extract
+    return agent, calls
+
+
+class TestResultCacheKey:
+    """Tests for content-addressed result cache keys."""
+    
+    def test_line_endings_share_a_key(self):
+        unix = normalize_document_text("a\nb")
+        
+        assert normalize_document_text("a\r\nb") == unix
+        assert normalize_document_text("a\rb") == unix
+    
+    def test_key_changes_with_every_component(self):
+        base = result_cache_key("text", "kb1", "rules1")
+        
+        assert result_cache_key("text", "kb1", "rules1") == base
+        assert result_cache_key("text!", "kb1", "rules1") != base
+        assert result_cache_key("text", "kb2", "rules1") != base
+        assert result_cache_key("text", "kb1", "rules2") != base
+    
+    @pytest.mark.parametrize("module", [
+        "schemas.py", "services/medication_scanner.py", "services/rule_engine.py", "services/document_context.py",
+        "services/pipeline.py", "services/kb_bundle.py", "services/analysis_stream.py", "services/serialization.py",
+    ])
+    def test_rules_version_changes_with_analysis_code(self, module, monkeypatch):
+        read_bytes = Path.read_bytes
+        base = rules_version.__wrapped__()
+        
+        assert module in ANALYSIS_MODULES
+        monkeypatch.setattr(
+            Path, "read_bytes", lambda path: read_bytes(path) + (b"#" if path.as_posix().endswith(module) else b"")
+        )
+        assert rules_version.__wrapped__() != base
+    
+    def test_kb_version_changes_when_formulary_loads(self, tmp_path):
+        path = tmp_path / "formulary.json"
+        path.write_text(json.dumps({"medications": {"newdrug": {"generic_name": "Newdrug"}}}))
+        client = MedicalKnowledgeBaseClient()
+        before = client.data_version
+        
+        client.load_formulary(str(path))
+        
+        assert client.data_version != before
+        assert MedicalKnowledgeBaseClient().data_version == before
+
+
+class TestAgentResultCache:
+    """Tests for result caching in MedicalAnalysisAgent.analyze_document."""
+    
+    def test_cache_hit_skips_pipeline(self):
+        agent, calls = counting_agent(InMemoryResultCache())
+        
+        first = agent.analyze_document(DOCUMENT)
+        second = agent.analyze_document(ParsedDocument(text=DOCUMENT.text.replace("\r\n", "\n")))
+        
+        assert len(calls) == 1
+        assert second.model_dump_json() == first.model_dump_json()
+    
+    def test_sqlite_cache_persists_across_agents(self, tmp_path):
+        path = str(tmp_path / "results.db")
+        first_agent, first_calls = counting_agent(SQLiteResultCache(path))
+        expected = first_agent.analyze_document(DOCUMENT)
+        
+        second_agent, second_calls = counting_agent(SQLiteResultCache(path))
+        result = second_agent.analyze_document(DOCUMENT)
+        
+        assert len(first_calls) == 1
+        assert second_calls == []
+        assert result.model_dump_json() == expected.model_dump_json()
+    
+    def test_kb_change_invalidates_cached_results(self, tmp_path):
+        path = tmp_path / "formulary.json"
+        path.write_text(json.dumps({"medications": {"newdrug": {"generic_name": "Newdrug"}}}))
+        cache = InMemoryResultCache()
+        agent, calls = counting_agent(cache)
+        
+        agent.analyze_document(DOCUMENT)
+        agent.kb_client.load_formulary(str(path))
+        agent.analyze_document(DOCUMENT)
+        
+        assert len(calls) == 2
+        assert len(cache) == 2
+    
+    
+    @pytest.mark.parametrize("payload", ["{not json", '{"prescriptions": 5}'])
+    def test_unreadable_cached_result_is_a_miss(self, tmp_path, payload):
+        cache = SQLiteResultCache(str(tmp_path / "results.db"))
+        agent, calls = counting_agent(cache)
+        expected = agent.analyze_document(DOCUMENT)
+        key = agent.result_cache_key(normalize_document_text(DOCUMENT.text))
+        cache.put(key, payload)
+        
+        result = agent.analyze_document(DOCUMENT)
+        
+        assert len(calls) == 2
+        assert result.model_dump_json() == expected.model_dump_json()
+        assert cache.get(key) not in (None, payload)
+
+
+class TestResultCacheBackends:
+    """Tests for size-based eviction in the cache backends."""
+    
+    def test_in_memory_evicts_least_recently_used(self):
+        cache = InMemoryResultCache(max_bytes=10)
+        cache.put("a", "xxxx")
+        cache.put("b", "yyyy")
+        cache.get("a")
+        cache.put("c", "zzzz")
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == "xxxx"
+        assert cache.size_bytes == 8
+    
+    def test_sqlite_evicts_least_recently_used(self, tmp_path):
+        cache = SQLiteResultCache(str(tmp_path / "results.db"), max_bytes=10)
+        cache.put("a", "xxxx")
+        cache.put("b", "yyyy")
+        cache.get("a")
+        cache.put("c", "zzzz")
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == "xxxx"
+        assert cache.size_bytes == 8
+        assert len(cache) == 2
+    
+    def test_sqlite_size_total_tracks_writes(self, tmp_path):
+        path = str(tmp_path / "results.db")
+        cache = SQLiteResultCache(path, max_bytes=10)
+        cache.put("a", "xxxx")
+        cache.put("a", "xx")
+        cache.put("b", "yyyy")
+        cache.delete("a")
+        cache.delete("missing")
+        
+        assert cache.size_bytes == 4
+        cache.close()
+        reopened = SQLiteResultCache(path, max_bytes=10)
+        reopened.put("c", "zzzz")
+        assert reopened.size_bytes == 8
+        reopened.clear()
+        assert reopened.size_bytes == 0
+    
+    def test_oversized_payloads_are_not_cached(self, tmp_path):
+        for cache in (InMemoryResultCache(max_bytes=3), SQLiteResultCache(str(tmp_path / "r.db"), max_bytes=3)):
+            cache.put("a", "xxxx")
+            assert cache.get("a") is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
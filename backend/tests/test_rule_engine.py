@@ -0,0 +1,186 @@
+import json
+import random
+import re
+
+import pytest
+
+from backend.app.schemas import ParsedDocument
+from backend.app.services.knowledge_base_client import DEFAULT_RULES_PATH, MedicalKnowledgeBaseClient
+from backend.app.services.medical_agent import MedicalAnalysisAgent
+from backend.app.services.rule_engine import RuleEngine, keyword_words
+
+
+# Keyword lists and substring semantics of the rules before the rule table,
+# and phrasings they recognized; the table must keep firing for these.
+BASELINE_RULES = {
+    "specialties": ("specialty", {
+        "Endocrinologist": ["diabetes", "metformin", "blood sugar"],
+        "Cardiologist": ["heart", "blood pressure", "lisinopril", "atorvastatin"],
+        "General Practitioner": ["antibiotic", "infection", "amoxicillin"],
+    }),
+    "facilities": ("facility_type", {
+        "Laboratory": ["test", "lab", "blood work", "screening"],
+        "Imaging Center": ["x-ray", "mri", "ct scan", "imaging"],
+        "Emergency Department": ["emergency", "urgent", "immediate"],
+    }),
+    "red_flags": ("category", {
+        "Urgency": ["severe", "emergency", "immediate", "urgent", "critical"],
+        "Allergies": ["allergy", "allergies", "allergic", "adverse reaction"],
+        "Contraindication": ["contraindicated", "should not", "avoid", "discontinue"],
+    }),
+}
+
+BASELINE_PHRASINGS = [
+    "Send the sample to the laboratory.",
+    "Results from both laboratories are pending.",
+    "Blood sugar tested weekly; HbA1c retested in March.",
+    "Annual cancer screenings recommended.",
+    "Labwork due before the next visit.",
+    "The tester calibrated the glucometer in the laboratory.",
+    "Patient avoided NSAIDs; avoidance of alcohol advised.",
+    "Avoids grapefruit juice.",
+    "Discontinues warfarin five days before surgery.",
+    "Discontinuing aspirin was discussed.",
+    "Two MRIs and an x-rayed wrist on file.",
+    "Irregular heartbeats noted; blood pressures stable.",
+    "Urgently needs X-rays; severely dehydrated and critically ill.",
+    "Immediately report adverse reactions to antibiotics.",
+    "Treated for infections with amoxicillin; should not drive.",
+    "Allergic to penicillin. Metformin for diabetes.",
+]
+
+
+def baseline_fired(kind, text):
+    field, keywords = BASELINE_RULES[kind]
+    return {name for name, words in keywords.items() if any(word in text.lower() for word in words)}
+
+
+def rule(name, *keywords, **conditions):
+    return dict(conditions, keywords=list(keywords), result={"name": name})
+
+
+def fired(engine, kind, text, medication_count=0):
+    return [result["name"] for result in engine.evaluate(kind, text, medication_count)]
+
+
+def reference_match(keywords, text):
+    """Whole-word match of each keyword on its own."""
+    found = set()
+    for keyword in keywords:
+        words = keyword_words(keyword)
+        pattern = r"(?:[^\S\n]|-)+".join(map(re.escape, words))
+        if re.search(rf"(?<!\w){pattern}(?!\w)", text.lower()):
+            found.add(words)
+    return found
+
+
+class TestRuleEngine:
+    """Tests for the compiled keyword rule table."""
+    
+    def test_keywords_match_whole_words(self):
+        engine = RuleEngine({"facilities": [rule("lab", "lab", "labs")]})
+        
+        assert fired(engine, "facilities", "Labs due Monday.") == ["lab"]
+        assert fired(engine, "facilities", "Read the label.") == []
+    
+    def test_phrases_allow_spaces_and_hyphens_but_not_line_breaks(self):
+        engine = RuleEngine({"facilities": [rule("imaging", "x-ray", "blood work")]})
+        
+        assert fired(engine, "facilities", "Chest X ray today") == ["imaging"]
+        assert fired(engine, "facilities", "Blood-work in the morning") == ["imaging"]
+        assert fired(engine, "facilities", "blood\nwork") == []
+    
+    def test_results_follow_table_order_and_kind(self):
+        engine = RuleEngine({
+            "red_flags": [rule("urgency", "urgent"), rule("allergy", "allergic"), rule("other", "urgent")],
+            "facilities": [rule("emergency", "urgent")],
+        })
+        
+        assert fired(engine, "red_flags", "Allergic reaction, urgent review") == ["urgency", "allergy", "other"]
+        assert fired(engine, "facilities", "Allergic reaction, urgent review") == ["emergency"]
+    
+    def test_keywords_inside_longer_matches_fire(self):
+        engine = RuleEngine({"k": [rule("scan", "scan"), rule("ct", "ct scan"), rule("ct scans", "ct scans")]})
+        
+        assert fired(engine, "k", "Book a CT scan.") == ["scan", "ct"]
+        assert fired(engine, "k", "Two CT scans.") == ["ct scans"]
+    
+    def test_overlapping_keywords_fire(self):
+        engine = RuleEngine({"k": [rule("blood", "blood work"), rule("workup", "work up")]})
+        
+        assert fired(engine, "k", "Blood work up before surgery") == ["blood", "workup"]
+    
+    def test_medication_count_condition_and_placeholder(self):
+        engine = RuleEngine({"red_flags": [{
+            "min_medications": 6,
+            "result": {"description": "Patient on {medication_count} medications", "severity": "medium"},
+        }]})
+        
+        assert engine.evaluate("red_flags", "", 5) == []
+        assert engine.evaluate("red_flags", "", 7) == [{"description": "Patient on 7 medications", "severity": "medium"}]
+    
+    def test_several_texts_are_matched_separately(self):
+        engine = RuleEngine({"k": [rule("sugar", "blood sugar")]})
+        
+        assert fired(engine, "k", ["Metformin", "monitor blood sugar"]) == ["sugar"]
+        assert fired(engine, "k", ["blood", "sugar"]) == []
+    
+    def test_matches_reference_on_random_texts(self):
+        vocabulary = ["blood", "work", "up", "sugar", "ct", "scan", "scans", "x", "ray", "label", "lab", "urgent"]
+        keywords = ["blood work", "work up", "blood sugar", "ct scan", "scan", "x-ray", "lab", "urgent", "up"]
+        engine = RuleEngine({"k": [rule(keyword, keyword) for keyword in keywords]})
+        generator = random.Random(7)
+        
+        for _ in range(300):
+            text = "".join(
+                generator.choice(vocabulary) + generator.choice([" ", "-", "\n", ", ", "  "])
+                for _ in range(generator.randint(1, 12))
+            )
+            assert engine.matched_keywords(text) == reference_match(keywords, text), text
+    
+    def test_invalid_keyword_is_rejected(self):
+        with pytest.raises(ValueError):
+            RuleEngine({"k": [rule("empty", " - ")]})
+
+
+class TestKnowledgeBaseRules:
+    """Tests for the rule table loaded by the knowledge base client."""
+    
+    @pytest.mark.parametrize("text", BASELINE_PHRASINGS)
+    def test_recall_covers_baseline_substring_rules(self, text):
+        engine = MedicalKnowledgeBaseClient().rule_engine
+        
+        for kind, (field, _) in BASELINE_RULES.items():
+            fired_names = {result[field] for result in engine.evaluate(kind, text)}
+            assert baseline_fired(kind, text) <= fired_names, kind
+    
+    def test_inflected_keywords_fire(self):
+        engine = MedicalKnowledgeBaseClient().rule_engine
+        
+        assert [flag["category"] for flag in engine.evaluate("red_flags", "Discontinuing aspirin.")] == ["Contraindication"]
+        assert [site["facility_type"] for site in engine.evaluate("facilities", "Screenings at the laboratory.")] == [
+            "Laboratory"
+        ]
+    
+    def test_custom_rule_file_changes_results_and_version(self, tmp_path):
+        with open(DEFAULT_RULES_PATH, encoding="utf-8") as handle:
+            rules = json.load(handle)
+        rules["specialties"].append({
+            "keywords": ["kidney"],
+            "result": {"specialty": "Nephrologist", "reason": "Kidney function", "priority": "high"},
+        })
+        rules["facilities"].append({
+            "keywords": ["dialysis"],
+            "result": {"facility_type": "Dialysis Center", "purpose": "Dialysis", "urgency": "soon"},
+        })
+        path = tmp_path / "rules.json"
+        path.write_text(json.dumps(rules), encoding="utf-8")
+        client = MedicalKnowledgeBaseClient(rules_path=str(path))
+        
+        result = MedicalAnalysisAgent(knowledge_base_client=client).analyze_document(
+            ParsedDocument(text="Check kidney function before dialysis.")
+        )
+        
+        assert [doctor.specialty for doctor in result.suggestions.doctors] == ["Nephrologist"]
+        assert [hospital.facility_type for hospital in result.suggestions.hospitals] == ["Dialysis Center"]
+        assert client.data_version != MedicalKnowledgeBaseClient().data_version
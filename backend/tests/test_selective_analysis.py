@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from backend.app.schemas import AnalysisResult, ParsedDocument, PartialAnalysisResult
+from backend.app.services.analysis_stream import SECTIONS, select_sections
+from backend.app.services.medical_agent import MedicalAnalysisAgent
+from backend.app.services.result_cache import InMemoryResultCache
+
+
+DOCUMENT = ParsedDocument(
+    text="Metformin 500mg twice daily for diabetes.\nWarfarin 5mg and Aspirin 81mg daily.\nUrgent blood work.",
+    metadata={}
+)
+
+
+def recording_agent(**options):
+    agent = MedicalAnalysisAgent(**options)
+    calls = []
+    for name in ("_parse_prescription_details", "_generate_timing_schedule", "_generate_suggestions", "_generate_insights"):
+        method = getattr(agent, name)
+        setattr(agent, name, lambda *args, method=method, name=name: calls.append(name) or method(*args))
+    return agent, calls
+
+
+class TestSelectSections:
+    """Tests for resolving include/exclude selections."""
+    
+    @pytest.mark.parametrize("include,exclude,expected", [
+        (None, None, None),
+        (["additional_insights", "prescription_summary"], None, ("prescription_summary", "additional_insights")),
+        (None, ["medication_timing"], ("prescription_summary", "suggestions", "additional_insights")),
+        (SECTIONS, ["suggestions"], ("prescription_summary", "medication_timing", "additional_insights")),
+    ])
+    def test_selection(self, include, exclude, expected):
+        assert select_sections(include, exclude) == expected
+    
+    @pytest.mark.parametrize("include,exclude", [
+        (["red_flags"], None),
+        (None, ["medications"]),
+        (["suggestions"], ["suggestions"]),
+        ([], None),
+    ])
+    def test_invalid_selection(self, include, exclude):
+        with pytest.raises(ValueError):
+            select_sections(include, exclude)
+
+
+class TestSelectiveAnalysis:
+    """Tests for analyzing only some sections of a document."""
+    
+    def test_selected_sections_match_full_analysis(self):
+        full = MedicalAnalysisAgent().analyze_document(DOCUMENT)
+        
+        result = MedicalAnalysisAgent().analyze_document(DOCUMENT, include=["suggestions", "medication_timing"])
+        
+        assert isinstance(result, PartialAnalysisResult)
+        assert result.suggestions == full.suggestions
+        assert result.medication_timing == full.medication_timing
+        assert result.prescription_summary is None and result.additional_insights is None
+    
+    def test_only_required_stages_run(self):
+        agent, calls = recording_agent()
+        
+        agent.analyze_document(DOCUMENT, include=["additional_insights"])
+        
+        assert calls == ["_generate_insights"]
+    
+    def test_exclude_skips_stages(self):
+        agent, calls = recording_agent()
+        
+        result = agent.analyze_document(DOCUMENT, exclude=["medication_timing", "suggestions"])
+        
+        assert calls == ["_parse_prescription_details", "_generate_insights"]
+        assert result.prescription_summary.total_medications == 3
+    
+    def test_no_selection_returns_full_result(self):
+        assert isinstance(MedicalAnalysisAgent().analyze_document(DOCUMENT), AnalysisResult)
+    
+    def test_partial_results_are_not_cached_but_use_cached_full_results(self):
+        agent, calls = recording_agent(result_cache=InMemoryResultCache())
+        
+        agent.analyze_document(DOCUMENT, include=["suggestions"])
+        agent.analyze_document(DOCUMENT, include=["suggestions"])
+        full = agent.analyze_document(DOCUMENT)
+        calls.clear()
+        partial = agent.analyze_document(DOCUMENT, include=["additional_insights"])
+        
+        assert calls == []
+        assert partial.additional_insights == full.additional_insights
+        assert partial.suggestions is None
+    
+    def test_stream_yields_selected_sections(self):
+        agent, calls = recording_agent()
+        
+        events = list(agent.analyze_document_stream(DOCUMENT, include=["suggestions", "prescription_summary"]))
+        
+        assert [event.section for event in events] == ["prescription_summary", "suggestions"]
+        assert "_generate_timing_schedule" not in calls
+    
+    def test_async_selection(self):
+        agent = MedicalAnalysisAgent()
+        
+        result = asyncio.run(agent.analyze_document_async(DOCUMENT, include=["prescription_summary"]))
+        
+        assert result.prescription_summary == agent.analyze_document(DOCUMENT).prescription_summary
+        assert result.medication_timing is None
+    
+    def test_unknown_section_is_rejected(self):
+        with pytest.raises(ValueError, match="red_flags"):
+            MedicalAnalysisAgent().analyze_document(DOCUMENT, include=["red_flags"])
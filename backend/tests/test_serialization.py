@@ -0,0 +1,91 @@
+import io
+
+import pytest
+
+from backend.app.schemas import AnalysisResult, ParsedDocument, PrescriptionItem
+from backend.app.services import serialization
+from backend.app.services.medical_agent import MedicalAnalysisAgent
+from backend.app.services.serialization import (
+    NDJSONWriter,
+    dumps,
+    iter_ndjson,
+    iter_ndjson_data,
+    loads,
+    write_ndjson,
+)
+
+
+DOCUMENT = ParsedDocument(
+    text="Metformin 500mg twice daily for diabetes.\nWarfarin 5mg and Amoxicillin 500mg.\nUrgent follow-up, café.",
+    metadata={}
+)
+
+
+@pytest.fixture(scope="module")
+def result():
+    return MedicalAnalysisAgent().analyze_document(DOCUMENT)
+
+
+@pytest.fixture(params=["fast", "stdlib"])
+def backend(request, monkeypatch):
+    if request.param == "stdlib":
+        monkeypatch.setattr(serialization, "orjson", None)
+    elif serialization.orjson is None:
+        pytest.skip("orjson is not installed")
+    return request.param
+
+
+class TestDumps:
+    """Tests for JSON encoding of schemas models."""
+    
+    def test_matches_model_dump_json(self, backend, result):
+        assert dumps(result) == result.model_dump_json().encode("utf-8")
+        assert dumps(result.suggestions) == result.suggestions.model_dump_json().encode("utf-8")
+    
+    def test_models_nested_in_plain_data(self, backend, result):
+        payload = {"id": 7, "result": result}
+        
+        assert loads(dumps(payload)) == {"id": 7, "result": result.model_dump()}
+    
+    def test_unknown_objects_raise_type_error(self, backend):
+        with pytest.raises(TypeError):
+            dumps({"value": object()})
+    
+    def test_every_schemas_model_is_precomputed(self):
+        assert serialization._serializers[PrescriptionItem] is serialization._instance_dict
+        assert serialization._serializers[AnalysisResult] is serialization._instance_dict
+
+
+class TestNDJSON:
+    """Tests for the streaming NDJSON writer and reader."""
+    
+    def test_round_trip_binary(self, backend, result):
+        handle = io.BytesIO()
+        writer = NDJSONWriter(handle)
+        
+        assert writer.write_many(iter([result, result])) == 2
+        writer.write(result)
+        
+        assert writer.count == 3
+        assert handle.getvalue().count(b"\n") == 3
+        handle.seek(0)
+        assert list(iter_ndjson(handle)) == [result] * 3
+    
+    def test_round_trip_text_file(self, backend, result, tmp_path):
+        path = tmp_path / "results.ndjson"
+        with open(path, "w", encoding="utf-8") as handle:
+            assert write_ndjson(handle, (result for _ in range(2))) == 2
+            
+        with open(path, encoding="utf-8") as handle:
+            assert list(iter_ndjson(handle)) == [result, result]
+        with open(path, "rb") as handle:
+            assert next(iter_ndjson_data(handle)) == result.model_dump()
+    
+    def test_reader_skips_blank_lines_and_reports_bad_line(self, result):
+        handle = io.BytesIO(dumps(result) + b"\n\n" + dumps(result) + b'\n{"prescription_summary": 1}\n')
+        reader = iter_ndjson(handle)
+        
+        assert next(reader) == result
+        assert next(reader) == result
+        with pytest.raises(ValueError, match="NDJSON line 4"):
+            next(reader)